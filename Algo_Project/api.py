@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+api script contains the functions performing the transform, inversion,
+compression and decompression on sequences, bytes or file paths,
+without any dialog window
+"""
+
+from burrows_wheeler_transform import (bwt_from_sequence, bwt_into, cached_bwt, check_sequence,
+                                       lf_inverse, store_bwt, suffix_array)
+from fasta import clean_sequence, load_sequence, map_file, map_output
+from fm_index import save_index
+from streaming import (DEFAULT_BLOCK_SIZE, append_file, compress_file, decompress_file,
+                       extract, read_decompressed, split_blocks, stage_flags, verify_file,
+                       verify_files, write_compressed, write_sequences)
+import io
+import os
+
+
+def as_text(sequence):
+    """
+    This function converts a sequence given as bytes in a string.
+    """
+    if isinstance(sequence, (bytes, bytearray, memoryview)):
+        return bytes(sequence).decode("ascii")
+    return sequence
+
+
+
+def transform_sequence(sequence, engine="sais"):
+    """
+    This function performs the Burrows-Wheeler transform of a DNA sequence.
+
+    Parameters
+    ----------
+    sequence : the DNA sequence (str or bytes), without $
+    engine : "sais" (linear suffix array, default) or "rotation" (naive matrix)
+
+    Returns
+    -------
+    bwt_pattern : bwt tranformed sequence
+    """
+    sequence = check_sequence(as_text(sequence).replace("\n", ""))
+    return bwt_from_sequence(sequence + "$", engine)[0]
+
+
+
+def inverse_sequence(bwt):
+    """
+    This function performs the Burrows-Wheeler reconstruction of a bwt sequence.
+
+    Returns
+    -------
+    inverse_bwt : the original sequence without the $
+    """
+    return lf_inverse(as_text(bwt).replace("\n", ""))
+
+
+
+def compress_bytes(data, bwt=True, block_size=DEFAULT_BLOCK_SIZE, mtf=False, rle=False,
+                   keep_case=False, coder="huffman"):
+    """
+    This function compresses a DNA sequence given in memory.
+
+    Parameters
+    ----------
+    data : the DNA sequence (bytes or str)
+    bwt : if True the bwt of each block is compressed
+    block_size : number of letters of a block
+    mtf : if True the move-to-front stage is applied before the compression
+    rle : if True the runs of zeros of the move-to-front stage are coded
+    keep_case : if True the lower case letters (soft-masked bases) are kept
+    coder : entropy coder of the blocks, "huffman" or "rans"
+
+    Returns
+    -------
+    comp_data : the content of the compressed file (bytes)
+    """
+    if isinstance(data, str):
+        data = data.encode("ascii")
+    buffer = io.BytesIO()
+    chunks = [(0, None, clean_sequence(bytes(data), keep_case))]
+    write_compressed(buffer, split_blocks(chunks, block_size), block_size,
+                     stage_flags(bwt, mtf, rle, coder))
+    return buffer.getvalue()
+
+
+
+def decompress_bytes(comp_data):
+    """
+    This function decompresses the content of a compressed file.
+
+    Returns
+    -------
+    data : the original sequence (bytes)
+    """
+    header, sequences = read_decompressed(io.BytesIO(comp_data))
+    buffer = io.BytesIO()
+    write_sequences(buffer, sequences, header["flags"])
+    return buffer.getvalue()
+
+
+
+def transform_file(file, created_file=None, engine="sais", index=True):
+    """
+    This function saves the Burrows-Wheeler transform of the sequence of
+    a file in a new file ending with _bwt.txt, and its FM-index.
+    With the "sais" engine the sequence is kept in a single buffer and
+    the bwt is written directly in the memory-mapped output file, or
+    copied from the cache if the sequence was already transformed.
+
+    Returns
+    -------
+    created_file : path of the bwt file
+    """
+    if created_file is None:
+        created_file = os.path.splitext(file)[0] + "_bwt.txt"
+    data = load_sequence(file)
+    data += b"$"
+    if engine != "sais":
+        bwt = bwt_from_sequence(data.decode("ascii"), engine)[0]
+        with open(created_file, "w") as file_bwt:
+            file_bwt.write(bwt)
+        if index:
+            save_index(bwt, created_file)
+        return created_file
+
+    digest, cached = cached_bwt(data, index)
+    with map_output(created_file, len(data)) as bwt:
+        if cached is not None:
+            bwt[:] = cached[0]
+            sa = cached[1]
+        else:
+            sa = suffix_array(data)
+            bwt_into(data, sa, bwt)
+            store_bwt(digest, bwt, sa if index else None)
+        if index:
+            save_index(bwt, created_file, sa)
+    return created_file
+
+
+
+def inverse_file(file, created_file=None):
+    """
+    This function saves the Burrows-Wheeler reconstruction of the bwt
+    sequence of a file in a new file ending with _inversion.txt
+    The bwt file is memory-mapped and the original sequence is written
+    directly in the memory-mapped output file.
+
+    Returns
+    -------
+    created_file : path of the reconstructed file
+    """
+    if created_file is None:
+        created_file = os.path.splitext(file)[0] + "_inversion.txt"
+    with map_file(file) as bwt:
+        #the line breaks are removed, which needs a copy of the file
+        if bwt.find(b"\n") >= 0:
+            bwt = bytes(bwt).translate(None, b"\r\n")
+        if len(bwt) == 0:
+            raise ValueError("The bwt sequence must contain a single $")
+        with map_output(created_file, len(bwt) - 1) as inverse_bwt:
+            lf_inverse(bwt, inverse_bwt)
+    return created_file
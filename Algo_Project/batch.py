@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+batch script contains the compression of every sequence file of a
+directory : the files are shared between worker processes, the largest
+files first so the workers finish at about the same time, and a Huffman
+code table trained once on a sample of the files is saved next to the
+compressed files, which only keep its identifier.
+"""
+
+from container import FLAG_RANS, save_table
+from huffman import code_lengths, huffman_tree_code
+from streaming import DEFAULT_BLOCK_SIZE, compress_file, read_blocks, stage_flags, transform_block
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+import json
+import os
+import time
+
+
+#extensions of the sequence files compressed by the batch
+EXTENSIONS = (".txt", ".fa", ".fasta", ".fna", ".fastq", ".fq")
+#files created by the other commands, which are not compressed again
+CREATED_SUFFIXES = ("_compressed.txt", "_decompressed.txt", "_decompressed_original.txt",
+                    "_bwt.txt", "_inversion.txt")
+#number of letters of the sample training the shared code table (4 MB)
+DEFAULT_SAMPLE_SIZE = 1 << 22
+
+
+def find_files(directory):
+    """
+    This function returns the sequence files of a directory and of its
+    subdirectories, the largest first.
+    """
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs.sort()
+        for name in sorted(names):
+            if name.lower().endswith(EXTENSIONS) and not name.endswith(CREATED_SUFFIXES):
+                files.append(os.path.join(root, name))
+    return sorted(files, key=lambda file: -os.path.getsize(file))
+
+
+
+def train_table(files, flags, block_size=DEFAULT_BLOCK_SIZE, sample_size=DEFAULT_SAMPLE_SIZE,
+                keep_case=False):
+    """
+    This function computes the Huffman code lengths of a sample of the
+    files : the same number of letters is read at the start of every file,
+    each piece is transformed like a block (see streaming.transform_block)
+    and the code is built on all the transformed pieces. The files which
+    cannot be read are left out of the sample.
+
+    Parameters
+    ----------
+    files : paths of the sequence files
+    flags : stages of the compression (see streaming.stage_flags)
+    block_size : number of letters of a block, the pieces are not longer
+    sample_size : total number of letters of the sample
+    keep_case : if True the lower case letters are kept
+
+    Returns
+    -------
+    code_lengths : dictionnary symbol -> length of its canonical code,
+    None if the files contain no sequence
+    """
+    share = max(min(sample_size // max(len(files), 1), block_size), 1)
+    pieces = []
+    for file in files:
+        try:
+            first = next(read_blocks(file, share, keep_case), None)
+        except (OSError, ValueError):
+            continue
+        if first is not None:
+            pieces.append(transform_block(first[1], flags)[1])
+    sample = "".join(pieces)
+    if not sample:
+        return None
+    return code_lengths(huffman_tree_code(sample))
+
+
+
+def compressed_path(file, directory, output_dir, bwt):
+    """
+    This function returns the path of the compressed file of a file of
+    the directory, at the same relative path in output_dir if given.
+    """
+    suffix = "_bwt_compressed.txt" if bwt else "_compressed.txt"
+    created_file = os.path.splitext(file)[0] + suffix
+    if output_dir is not None:
+        created_file = os.path.join(output_dir, os.path.relpath(created_file, directory))
+    return created_file
+
+
+
+def compress_one(file, directory, output_dir=None, block_size=DEFAULT_BLOCK_SIZE, bwt=True,
+                 mtf=False, rle=False, coder="huffman", keep_case=False, table=None):
+    """
+    This function compresses a file of the batch in a worker process.
+
+    Returns
+    -------
+    report : dictionnary with the paths of the file and of its compressed
+    file, bytes_in, bytes_out, seconds, ratio and error (the message of
+    the error, None if the file is compressed)
+    """
+    created_file = compressed_path(file, directory, output_dir, bwt)
+    report = {"file": file, "created_file": created_file, "bytes_in": 0,
+              "bytes_out": 0, "seconds": 0.0, "ratio": None, "error": None}
+    start = time.perf_counter()
+    try:
+        report["bytes_in"] = os.path.getsize(file)
+        os.makedirs(os.path.dirname(created_file) or ".", exist_ok=True)
+        compress_file(file, created_file, block_size, bwt, mtf=mtf, rle=rle,
+                      keep_case=keep_case, coder=coder, table=table)
+    except Exception as error:
+        #a failed file is reported without stopping the batch,
+        #and it leaves no partial compressed file
+        if os.path.exists(created_file):
+            os.remove(created_file)
+        report["error"] = str(error) or type(error).__name__
+        return report
+    report["seconds"] = time.perf_counter() - start
+    report["bytes_out"] = os.path.getsize(created_file)
+    if report["bytes_out"]:
+        report["ratio"] = report["bytes_in"] / report["bytes_out"]
+    return report
+
+
+
+def compress_directory(directory, output_dir=None, workers=1, shared_table=True,
+                       sample_size=DEFAULT_SAMPLE_SIZE, block_size=DEFAULT_BLOCK_SIZE, bwt=True,
+                       mtf=False, rle=False, coder="huffman", keep_case=False, report_file=None):
+    """
+    This function compresses every sequence file of a directory (see
+    find_files). The files are sent to the pool of workers the largest
+    first, each file is compressed by a single worker.
+    With shared_table a Huffman code table is trained on a sample of the
+    files (see train_table) and saved once in output_dir (or in the
+    directory), the blocks coded well enough by the table only keep its
+    identifier, the other blocks keep their own codes. The decompression
+    finds the table next to the compressed file or in its parent directories.
+
+    Parameters
+    ----------
+    directory : directory of the sequence files
+    output_dir : directory of the compressed files, by default they are
+    saved next to the sequence files
+    workers : number of files compressed at once
+    shared_table : if True a code table shared by the files is trained
+    (Huffman coder only)
+    sample_size : number of letters of the sample training the table
+    report_file : path of a JSON file receiving the report, if given
+    block_size, bwt, mtf, rle, coder, keep_case : see streaming.compress_file
+
+    Returns
+    -------
+    report : dictionnary with the table identifier (None without table),
+    the number of files, errors, bytes_in, bytes_out, seconds (wall time),
+    ratio, throughput (bytes in per second) and the reports of the files
+    (see compress_one), the largest first
+    """
+    start = time.perf_counter()
+    files = find_files(directory)
+    flags = stage_flags(bwt, mtf, rle, coder)
+    table = None
+    if shared_table and not flags & FLAG_RANS and files:
+        lengths = train_table(files, flags, block_size, sample_size, keep_case)
+        if lengths is not None:
+            table_dir = output_dir if output_dir is not None else directory
+            os.makedirs(table_dir, exist_ok=True)
+            table = (save_table(lengths, table_dir), lengths)
+
+    function = partial(compress_one, directory=directory, output_dir=output_dir,
+                       block_size=block_size, bwt=bwt, mtf=mtf, rle=rle, coder=coder,
+                       keep_case=keep_case, table=table)
+    if workers <= 1:
+        reports = list(map(function, files))
+    else:
+        #the largest files are submitted first and taken first by the free workers
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(function, file): i for i, file in enumerate(files)}
+            reports = [None] * len(files)
+            for future in as_completed(futures):
+                reports[futures[future]] = future.result()
+
+    seconds = time.perf_counter() - start
+    done = [report for report in reports if report["error"] is None]
+    bytes_in = sum(report["bytes_in"] for report in done)
+    bytes_out = sum(report["bytes_out"] for report in done)
+    report = {"directory": directory, "table": table[0] if table is not None else None,
+              "files": len(reports), "errors": len(reports) - len(done),
+              "bytes_in": bytes_in, "bytes_out": bytes_out, "seconds": seconds,
+              "ratio": bytes_in / bytes_out if bytes_out else None,
+              "throughput": bytes_in / seconds if seconds else None,
+              "reports": reports}
+    if report_file is not None:
+        with open(report_file, "w") as open_file:
+            json.dump(report, open_file, indent=2)
+    return report
+
+
+
+def format_report(report):
+    """
+    This function returns the lines of a batch report : one line for each
+    file and the totals of the batch.
+    """
+    lines = []
+    for file_report in report["reports"]:
+        if file_report["error"] is not None:
+            lines.append("Error " + file_report["file"] + " : " + file_report["error"])
+        else:
+            lines.append("%s -> %s : %d -> %d bytes (x%.2f) in %.2f s"
+                         % (file_report["file"], file_report["created_file"],
+                            file_report["bytes_in"], file_report["bytes_out"],
+                            file_report["ratio"] or 0, file_report["seconds"]))
+    lines.append("%d files, %d errors, %d -> %d bytes (x%.2f) in %.2f s, %.2f MB/s"
+                 % (report["files"], report["errors"], report["bytes_in"], report["bytes_out"],
+                    report["ratio"] or 0, report["seconds"], (report["throughput"] or 0) / 1e6))
+    if report["table"] is not None:
+        lines.append("shared code table : " + report["table"])
+    return "\n".join(lines)
@@ -0,0 +1,401 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+benchmark script measures the time and the memory of every stage of the
+pipeline on synthetic DNA sequences of several sizes and compositions,
+and saves the results in JSON and/or CSV files.
+
+Example : python benchmark.py --sizes 10000 100000 1000000 --json results.json
+"""
+
+from api import compress_bytes, decompress_bytes
+from burrows_wheeler_transform import lf_inverse, suffix_array_bwt
+from cache import configure
+from cli import positive_int
+from container import open_container, write_block, write_end, write_header
+from huffman import code_lengths, decode_block, huffman_construction
+import argparse
+import csv
+import io
+import json
+import math
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+
+#probabilities of the letters A, C, G, T of the compositions
+GC_SKEWED = (0.15, 0.35, 0.35, 0.15)
+UNIFORM = (0.25, 0.25, 0.25, 0.25)
+
+#columns of the CSV file
+FIELDS = ["composition", "size", "stage", "seconds", "mean_seconds",
+          "mb_per_second", "peak_bytes", "bits_per_letter", "repeat"]
+
+
+def random_letters(rng, size, weights=UNIFORM):
+    """
+    This function draws size letters among A, C, G, T with the given weights.
+    """
+    return "".join(rng.choices("ACGT", weights, k=size))
+
+
+
+def repetitive_sequence(rng, size, mutation=0.01):
+    """
+    This function builds a sequence made of copies of a few motifs
+    (50 to 300 letters), each copy having about 1 % of mutated letters,
+    like the repeated elements of a genome.
+    """
+    motifs = [random_letters(rng, rng.randint(50, 300)) for i in range(20)]
+    parts = []
+    total = 0
+    while total < size:
+        copy = list(rng.choice(motifs))
+        for i in range(len(copy)):
+            if rng.random() < mutation:
+                copy[i] = rng.choice("ACGT")
+        parts.append("".join(copy))
+        total += len(copy)
+    return "".join(parts)[:size]
+
+
+
+def n_rich_sequence(rng, size, n_fraction=0.2):
+    """
+    This function builds a uniform sequence with runs of N (100 to 5000
+    letters) covering about n_fraction of the sequence, like the gaps of
+    an assembly.
+    """
+    parts = []
+    total = 0
+    while total < size:
+        if rng.random() < n_fraction:
+            part = "N" * rng.randint(100, 5000)
+        else:
+            part = random_letters(rng, rng.randint(100, 5000))
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)[:size]
+
+
+
+#generators of the synthetic sequences : (random generator, size) -> str
+COMPOSITIONS = {
+    "uniform": lambda rng, size: random_letters(rng, size),
+    "gc-skewed": lambda rng, size: random_letters(rng, size, GC_SKEWED),
+    "repetitive": repetitive_sequence,
+    "n-rich": n_rich_sequence,
+}
+
+
+
+def generate_sequence(size, composition="uniform", seed=0):
+    """
+    This function generates a synthetic DNA sequence, the same seed
+    always gives the same sequence.
+
+    Parameters
+    ----------
+    size : number of letters
+    composition : "uniform", "gc-skewed", "repetitive" or "n-rich"
+    seed : seed of the random generator
+
+    Returns
+    -------
+    sequence : the DNA sequence (str)
+    """
+    if composition not in COMPOSITIONS:
+        raise ValueError("Unknown composition : " + str(composition))
+    return COMPOSITIONS[composition](random.Random(seed), size)
+
+
+
+def write_packed(huffman_code, binary_seq, length):
+    """
+    This function writes the Huffman codes and packed bits of a sequence
+    of length letters in a compressed file in memory.
+    """
+    block = {"code_lengths": code_lengths(huffman_code), "padding": binary_seq.added,
+             "length": length, "payload": binary_seq.packed}
+    buffer = io.BytesIO()
+    write_header(buffer)
+    write_block(buffer, block)
+    write_end(buffer)
+    return buffer.getvalue()
+
+
+
+def read_packed(comp_data):
+    """
+    This function decodes the blocks of a compressed file in memory
+    (without the bwt reconstruction).
+    """
+    header, blocks = open_container(io.BytesIO(comp_data))
+    return "".join(decode_block(block) for block in blocks)
+
+
+
+#each prepare function computes the inputs of a stage (not measured)
+#and returns the function to measure
+
+def prepare_transform(sequence):
+    """Burrows-Wheeler transform with the suffix array."""
+    return lambda: suffix_array_bwt(sequence + "$")
+
+
+def prepare_bwt_inverse(sequence):
+    """Burrows-Wheeler reconstruction with the LF-mapping."""
+    bwt = suffix_array_bwt(sequence + "$")[0]
+    return lambda: lf_inverse(bwt)
+
+
+def prepare_huffman_construction(sequence):
+    """Huffman codes and packed bits of the sequence."""
+    return lambda: huffman_construction(sequence)
+
+
+def prepare_binary_to_utf8(sequence):
+    """Writing of the packed bits in a compressed file."""
+    huffman_code, binary_seq = huffman_construction(sequence)
+    return lambda: write_packed(huffman_code, binary_seq, len(sequence))
+
+
+def prepare_binary_to_seq(sequence):
+    """Reading and decoding of a compressed file."""
+    comp_data = write_packed(*huffman_construction(sequence), len(sequence))
+    return lambda: read_packed(comp_data)
+
+
+def prepare_compress(sequence):
+    """Whole compression : blocks, bwt and Huffman compression."""
+    return lambda: compress_bytes(sequence)
+
+
+def prepare_decompress(sequence):
+    """Whole decompression : Huffman decoding and bwt reconstruction."""
+    comp_data = compress_bytes(sequence)
+    return lambda: decompress_bytes(comp_data)
+
+
+def prepare_compress_rans(sequence):
+    """Whole compression with the rANS coder instead of the Huffman codes."""
+    return lambda: compress_bytes(sequence, coder="rans")
+
+
+def prepare_decompress_rans(sequence):
+    """Whole decompression with the rANS coder instead of the Huffman codes."""
+    comp_data = compress_bytes(sequence, coder="rans")
+    return lambda: decompress_bytes(comp_data)
+
+
+
+#stages measured : name -> prepare function
+STAGES = {
+    "transform": prepare_transform,
+    "bwt_inverse": prepare_bwt_inverse,
+    "huffman_construction": prepare_huffman_construction,
+    "binary_to_utf8": prepare_binary_to_utf8,
+    "binary_to_seq": prepare_binary_to_seq,
+    "compress": prepare_compress,
+    "decompress": prepare_decompress,
+    "compress_rans": prepare_compress_rans,
+    "decompress_rans": prepare_decompress_rans,
+}
+
+#stages whose result is a compressed file, their number of bits per letter is saved
+COMPRESSION_STAGES = ("compress", "compress_rans")
+
+
+
+def measure(function, repeat=3, memory=True):
+    """
+    This function measures a function : the best and mean times over
+    repeat runs, then the peak of memory allocated during one more run.
+    The memory is measured in a separate run as tracemalloc slows
+    the allocations down.
+
+    Returns
+    -------
+    result : dictionnary with seconds (best time), mean_seconds,
+    peak_bytes (None without memory measure) and output_bytes (size of
+    the result of the function if it is bytes, else None)
+    """
+    times = []
+    output = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        output = function()
+        times.append(time.perf_counter() - start)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    output_bytes = len(output) if isinstance(output, bytes) else None
+    return {"seconds": min(times), "mean_seconds": sum(times) / len(times),
+            "peak_bytes": peak, "output_bytes": output_bytes}
+
+
+
+def run_benchmark(sizes, compositions=None, stages=None, repeat=3, memory=True,
+                  seed=0, progress=None):
+    """
+    This function measures every stage on every synthetic sequence.
+
+    Parameters
+    ----------
+    sizes : list of the numbers of letters of the sequences
+    compositions : list of compositions, all by default
+    stages : list of stages, all by default
+    repeat : number of timed runs of each stage
+    memory : if True the peak of memory of each stage is measured
+    seed : seed of the random generator
+    progress : function called with each result, if given
+
+    Returns
+    -------
+    results : list of dictionnaries (see FIELDS)
+    """
+    if repeat < 1:
+        raise ValueError("The number of runs must be at least 1, not " + str(repeat))
+    compositions = compositions or list(COMPOSITIONS)
+    stages = stages or list(STAGES)
+    results = []
+    for composition in compositions:
+        for size in sizes:
+            sequence = generate_sequence(size, composition, seed)
+            for stage in stages:
+                result = measure(STAGES[stage](sequence), repeat, memory)
+                seconds = result["seconds"]
+                output_bytes = result.pop("output_bytes")
+                if stage in COMPRESSION_STAGES and output_bytes is not None and size:
+                    result["bits_per_letter"] = 8 * output_bytes / size
+                else:
+                    result["bits_per_letter"] = None
+                result.update({"composition": composition, "size": size, "stage": stage,
+                               "repeat": repeat,
+                               "mb_per_second": size / seconds / 1e6 if seconds else None})
+                results.append(result)
+                if progress is not None:
+                    progress(result)
+    return results
+
+
+
+def scaling(results):
+    """
+    This function estimates the growth of the time of each stage :
+    the exponent k of time ~ size ** k between the smallest and the
+    largest size (1 for a linear stage, 2 for a quadratic stage).
+
+    Returns
+    -------
+    exponents : dictionnary composition -> stage -> exponent
+    """
+    exponents = {}
+    groups = {}
+    for result in results:
+        groups.setdefault((result["composition"], result["stage"]), []).append(result)
+    for (composition, stage), group in groups.items():
+        group.sort(key=lambda result: result["size"])
+        first, last = group[0], group[-1]
+        if last["size"] > first["size"] and first["seconds"] > 0:
+            exponent = math.log(last["seconds"] / first["seconds"]) / \
+                       math.log(last["size"] / first["size"])
+            exponents.setdefault(composition, {})[stage] = round(exponent, 3)
+    return exponents
+
+
+
+def save_json(path, results):
+    """
+    This function saves the results, the scaling exponents and the
+    description of the machine in a JSON file.
+    """
+    report = {"python": platform.python_version(), "platform": platform.platform(),
+              "date": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results,
+              "scaling": scaling(results)}
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+
+def save_csv(path, results):
+    """
+    This function saves the results in a CSV file, one line per stage and sequence.
+    """
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+        for result in results:
+            writer.writerow({field: result[field] for field in FIELDS})
+
+
+
+def format_result(result):
+    """
+    This function returns a result as a text line.
+    """
+    peak = result["peak_bytes"]
+    peak = "-" if peak is None else "%.1f MB" % (peak / 1e6)
+    speed = result["mb_per_second"]
+    speed = "-" if speed is None else "%.2f MB/s" % speed
+    bits = result["bits_per_letter"]
+    bits = "" if bits is None else "%.3f bits/letter" % bits
+    return "%-11s %10d %-21s %9.4f s %12s %10s %s" % (result["composition"], result["size"],
+                                                     result["stage"], result["seconds"],
+                                                     speed, peak, bits)
+
+
+
+def parse_arguments(argv=None):
+    """
+    This function reads the arguments of the command line.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark of the pipeline stages")
+    parser.add_argument("--sizes", type=positive_int, nargs="+", default=[10000, 100000],
+                        help="numbers of letters of the sequences")
+    parser.add_argument("--compositions", nargs="+", choices=list(COMPOSITIONS),
+                        default=None)
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=None)
+    parser.add_argument("--repeat", type=positive_int, default=3,
+                        help="number of timed runs of each stage")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="do not measure the peak of memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, help="JSON file of the results")
+    parser.add_argument("--csv", default=None, help="CSV file of the results")
+    return parser.parse_args(argv)
+
+
+
+def main(argv=None):
+    """
+    This function runs the benchmark, prints each result and saves them.
+    """
+    args = parse_arguments(argv)
+    #a cache enabled by BWT_CACHE_DIR would measure the lookups instead of the stages
+    configure(None)
+    results = run_benchmark(args.sizes, args.compositions, args.stages, args.repeat,
+                            not args.no_memory, args.seed,
+                            progress=lambda result: print(format_result(result)))
+    for composition, exponents in scaling(results).items():
+        print(composition + " scaling : " + ", ".join(
+            "%s %.2f" % (stage, exponent) for stage, exponent in exponents.items()))
+    if args.json:
+        save_json(args.json, results)
+    if args.csv:
+        save_csv(args.csv, results)
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
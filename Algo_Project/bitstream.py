@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bitstream script contains the NumPy backend of the Huffman bit handling :
+the code of every letter is read in lookup arrays and the bits are packed
+and unpacked with np.packbits / np.unpackbits on whole chunks.
+NumPy is optional, the functions of the huffman script fall back on their
+pure python version when it is not installed (see numpy_available).
+NumPy is only imported by the first packing call (see load_numpy), so the
+scripts which never pack bits (service workers, cli commands) start without it.
+"""
+
+import importlib
+import importlib.util
+
+
+#True if NumPy is installed, found without importing it
+NUMPY_INSTALLED = importlib.util.find_spec("numpy") is not None
+#maximal number of bits handled at once when encoding a chunk
+CHUNK_BITS = 1 << 24
+#NumPy module once imported by load_numpy
+numpy_module = None
+
+
+def numpy_available():
+    """
+    This function returns True if NumPy is installed.
+    """
+    return NUMPY_INSTALLED
+
+
+
+def load_numpy():
+    """
+    This function imports NumPy the first time it is called.
+
+    Returns
+    -------
+    np : the numpy module
+    """
+    global numpy_module
+    if numpy_module is None:
+        numpy_module = importlib.import_module("numpy")
+    return numpy_module
+
+
+
+def code_arrays(huffman_code):
+    """
+    This function builds the lookup arrays of the codes.
+
+    Parameters
+    ----------
+    huffman_code : dictionnary letter -> binary code
+
+    Returns
+    -------
+    bits : array (256, longest code) of the bits of the code of each byte,
+    completed with zeros
+    lengths : array of the length of the code of each byte, 0 for the
+    bytes without code
+    """
+    np = load_numpy()
+    width = max([len(code) for code in huffman_code.values()] + [1])
+    bits = np.zeros((256, width), dtype=np.uint8)
+    lengths = np.zeros(256, dtype=np.int64)
+    for letter, code in huffman_code.items():
+        symbol = ord(letter)
+        bits[symbol, :len(code)] = np.frombuffer(code.encode("ascii"), dtype=np.uint8) - 48
+        lengths[symbol] = len(code)
+    return bits, lengths
+
+
+
+def encode_symbols(seq, huffman_code):
+    """
+    This function encodes a sequence and packs its bits in bytes : the
+    codes of a chunk of letters are gathered in a matrix, the bits beyond
+    the length of each code are dropped with a mask and the rest is packed.
+
+    Returns
+    -------
+    added : the number of zeros added at the end of the bits
+    packed : the packed bits (bytes)
+    """
+    np = load_numpy()
+    bits, lengths = code_arrays(huffman_code)
+    width = bits.shape[1]
+    columns = np.arange(width)
+    data = np.frombuffer(seq.encode("latin-1"), dtype=np.uint8)
+    chunk = max(1, CHUNK_BITS // width)
+
+    parts = []
+    remainder = np.zeros(0, dtype=np.uint8)
+    for start in range(0, len(data), chunk):
+        symbols = data[start:start + chunk]
+        code_lengths = lengths[symbols]
+        if not code_lengths.all():
+            raise ValueError("The sequence contains a letter without code")
+        flat = bits[symbols][columns < code_lengths[:, None]]
+        #the bits which do not fill a whole byte go with the next chunk
+        flat = np.concatenate((remainder, flat))
+        whole = len(flat) - len(flat) % 8
+        parts.append(np.packbits(flat[:whole]).tobytes())
+        remainder = flat[whole:]
+    added = -len(remainder) % 8
+    if len(remainder):
+        parts.append(np.packbits(remainder).tobytes())
+    return added, b"".join(parts)
+
+
+
+def pack_string(binary_seq):
+    """
+    This function adds zeros at the end of a binary string so that it is
+    coded on 8 bits, and converts it in bytes.
+
+    Returns
+    -------
+    added : the number of zeros added
+    packed : the bytes
+    """
+    np = load_numpy()
+    added = -len(binary_seq) % 8
+    bits = np.frombuffer(binary_seq.encode("ascii"), dtype=np.uint8) - 48
+    return added, np.packbits(bits).tobytes()
+
+
+
+def unpack_string(packed, added=0):
+    """
+    This function converts bytes in a binary string and removes
+    the zeros added at the end.
+    """
+    np = load_numpy()
+    bits = np.unpackbits(np.frombuffer(packed, dtype=np.uint8))
+    return (bits[:len(bits) - added] + 48).tobytes().decode("ascii")
@@ -5,16 +5,77 @@ BWT script contains functions related to Burrows-Wheeler tranform
 corresponding to a text pre-processing used in data compression
 """
 
-from tkinter import filedialog, messagebox
+from dialogs import filedialog, messagebox
 import os
+from array import array
 from pathlib import Path
+
+from cache import content_hash, get_cache, pack_array, unpack_array
+from fasta import clean_sequence, read_records
+from fm_index import save_index
+from instrument import traced
     
 
 
+def read_sequence(file):
+    """
+    This function reads a whole text file at once
+    and deletes the "\n" of its lines.
+
+    Returns
+    -------
+    sequence : the content of the file in a single line
+    """
+    with open(file, "r") as open_file:
+        return open_file.read().replace("\n", "")
+
+
+
+def check_sequence(sequence):
+    """
+    This function checks that a sequence only contains nucleotides
+    (A,T,C,G) and a possible unidentified nucleotide N, in lower case
+    and/or upper case.
+
+    Returns
+    -------
+    sequence : the sequence in upper case
+
+    Raises
+    ------
+    ValueError : if the sequence contains another letter than ("ACGNT")
+    """
+    #check all the letters at once
+    return clean_sequence(sequence.encode("latin-1")).decode("ascii")
+
+
+
+def check_file(file):
+    """
+    This function reads the sequence of a text, FASTA or FASTQ file
+    (the sequences of the records are joined) and checks its letters.
+
+    Returns
+    -------
+    sequence : sequence with a dollar added at the end
+
+    Raises
+    ------
+    ValueError : if the file is empty or if the sequence contains another
+    letter than ("ACGNT")
+    """
+    if os.stat(file).st_size == 0:
+        raise ValueError("Your file is empty")
+    sequence = "".join(seq for name, seq in read_records(file))
+    return sequence + "$"
+
+
+
 def open_check_file():
     '''
     This functions opens an input file and retrieves its content
-    in a variable named sequence.
+    in a variable named sequence. The file can be a text file or a FASTA or
+    FASTQ file, the sequences of its records are then joined.
     Then it checks that the sequence only contains letters from an alphabet
     here the alphabet contains only nucleotides (A,T,C,G)
     and a possible unidentified nucleotide N.
@@ -28,48 +89,214 @@ def open_check_file():
     #open a text file through a through a dialog window 
     file = filedialog.askopenfilename(title="Select a txt file",\
                                       filetypes=[("Text file", ".txt")])
-    #check that the selected file is not empty 
-    if os.stat(file).st_size != 0 :
-        open_file = open(file, "r")
-        sequence= ""
-        
-        for line in open_file :
-            sequence += line
-            sequence = sequence.strip("\n")
-            valid = 'ACGNT'
-            
-            for letter in sequence.upper():
-                if letter not in valid:
-                    #if the letter is not in the alaphabet raise an error messsage
-                    messagebox.showwarning("Error", "Your file not contain only DNA ")
-                    return False
-                
+    try:
         #return the dna sequence with a $ added at its end and the file path
-        return sequence.upper()+"$", file
-        open_file.close()
-    
-    else :
-        #if the file is empty raise an error message
-        messagebox.showwarning("Error", "Your file is empty ")
+        return check_file(file), file
+    except (OSError, ValueError) as error:
+        #if the file is empty or the letter is not in the alaphabet
+        #raise an error messsage
+        messagebox.showwarning("Error", str(error))
         return False
 
 
 
-def transform():
+def sais(text, upper):
     """
-    This function is the main function of the program
-    it performs the Burrows-Wheeler transform.
+    This function builds the suffix array of a sequence of integers with
+    the SA-IS algorithm (induced sorting), in linear time.
+    The working buffers are arrays of 32 bits integers (64 bits for the
+    sequences of more than 2**31 letters) and the types of the suffixes
+    are kept in a bytearray, so the memory used is a few bytes by letter.
+
+    Parameters
+    ----------
+    text : bytes-like sequence or array of integers between 0 and upper
+    upper : the largest value of the alphabet
+
+    Returns
+    -------
+    sa : the suffix array, starting positions of the sorted suffixes
+    (array of integers)
+    """
+    n = len(text)
+    typecode = "i" if n < 1 << 31 else "q"
+    if n <= 2:
+        order = sorted(range(n), key=lambda i: text[i:])
+        return array(typecode, order)
+
+    #type of each suffix : 1 for S-type, 0 for L-type
+    ls = bytearray(n)
+    for i in range(n - 2, -1, -1):
+        if text[i] == text[i + 1]:
+            ls[i] = ls[i + 1]
+        else:
+            ls[i] = text[i] < text[i + 1]
+
+    #start of the L-type and S-type buckets of each letter
+    sum_l = array(typecode, bytes((upper + 2) * array(typecode).itemsize))
+    sum_s = array(typecode, bytes((upper + 2) * array(typecode).itemsize))
+    for i in range(n):
+        if not ls[i]:
+            sum_s[text[i]] += 1
+        else:
+            sum_l[text[i] + 1] += 1
+    for i in range(upper + 1):
+        sum_s[i] += sum_l[i]
+        if i < upper:
+            sum_l[i + 1] += sum_s[i]
+
+    def induce(lms):
+        sa = array(typecode, [-1]) * n
+        #place the LMS suffixes at the end of their S bucket
+        buf = array(typecode, sum_s)
+        for d in lms:
+            if d == n:
+                continue
+            sa[buf[text[d]]] = d
+            buf[text[d]] += 1
+        #induce the L-type suffixes from left to right
+        buf = array(typecode, sum_l)
+        sa[buf[text[n - 1]]] = n - 1
+        buf[text[n - 1]] += 1
+        for i in range(n):
+            v = sa[i]
+            if v >= 1 and not ls[v - 1]:
+                c = text[v - 1]
+                sa[buf[c]] = v - 1
+                buf[c] += 1
+        #induce the S-type suffixes from right to left
+        buf = array(typecode, sum_l)
+        for i in range(n - 1, -1, -1):
+            v = sa[i]
+            if v >= 1 and ls[v - 1]:
+                c = text[v - 1] + 1
+                buf[c] -= 1
+                sa[buf[c]] = v - 1
+        return sa
+
+    #leftmost S-type positions (LMS)
+    lms_map = array(typecode, [-1]) * (n + 1)
+    lms = array(typecode)
+    for i in range(1, n):
+        if not ls[i - 1] and ls[i]:
+            lms_map[i] = len(lms)
+            lms.append(i)
+    m = len(lms)
+
+    sa = induce(lms)
+
+    if m:
+        #name the sorted LMS substrings and sort them recursively
+        sorted_lms = array(typecode, (v for v in sa if lms_map[v] != -1))
+        del sa
+        rec_text = array(typecode, bytes(m * array(typecode).itemsize))
+        rec_upper = 0
+        rec_text[lms_map[sorted_lms[0]]] = 0
+        for i in range(1, m):
+            left = sorted_lms[i - 1]
+            right = sorted_lms[i]
+            end_l = lms[lms_map[left] + 1] if lms_map[left] + 1 < m else n
+            end_r = lms[lms_map[right] + 1] if lms_map[right] + 1 < m else n
+            same = True
+            if end_l - left != end_r - right:
+                same = False
+            else:
+                while left < end_l:
+                    if text[left] != text[right]:
+                        break
+                    left += 1
+                    right += 1
+                if left == n or text[left] != text[right]:
+                    same = False
+            if not same:
+                rec_upper += 1
+            rec_text[lms_map[sorted_lms[i]]] = rec_upper
+        del sorted_lms, lms_map
+
+        rec_sa = sais(rec_text, rec_upper)
+        del rec_text
+        sorted_lms = array(typecode, (lms[i] for i in rec_sa))
+        del rec_sa
+        sa = induce(sorted_lms)
+
+    return sa
+
+
+
+@traced("suffix_array")
+def suffix_array(sequence):
+    """
+    This function computes the suffix array of a sequence ending with a $.
+    As the $ is the smallest and unique letter of the sequence, sorting the
+    suffixes gives the same order as sorting the rotations.
+
+    Parameters
+    ----------
+    sequence : the sequence with a dollar added at the end (str or
+    bytes-like, a bytes-like sequence is read without copy)
+
+    Returns
+    -------
+    sa : array of the starting positions of the sorted suffixes
+    """
+    if isinstance(sequence, str):
+        sequence = sequence.encode("ascii")
+    return sais(sequence, 255)
+
+
+
+@traced("lcp")
+def lcp_array(data, sa):
+    """
+    This function computes the longest common prefix array of a sequence
+    from its suffix array with the Kasai algorithm, in linear time : the
+    suffixes are read in the order of the sequence, and the common prefix
+    of a suffix is at least the one of the previous suffix minus 1.
+
+    Parameters
+    ----------
+    data : the sequence ending with a $ (bytes-like)
+    sa : suffix array of the sequence
+
+    Returns
+    -------
+    lcp : array of 32 bits integers (64 bits for the sequences of more than
+    2**31 letters), lcp[i] is the length of the common prefix of the
+    suffixes sa[i - 1] and sa[i], lcp[0] is 0
+    """
+    n = len(data)
+    typecode = "i" if n < 1 << 31 else "q"
+    rank = array(typecode, bytes(n * array(typecode).itemsize))
+    for row, position in enumerate(sa):
+        rank[position] = row
+    lcp = array(typecode, bytes(n * array(typecode).itemsize))
+    h = 0
+    for i in range(n):
+        row = rank[i]
+        if row == 0:
+            h = 0
+            continue
+        j = sa[row - 1]
+        while i + h < n and j + h < n and data[i + h] == data[j + h]:
+            h += 1
+        lcp[row] = h
+        if h:
+            h -= 1
+    return lcp
+
+
+
+@traced("rotation_sort")
+def rotation_bwt(sequence):
+    """
+    This function performs the naive Burrows-Wheeler transform
+    by sorting the matrix of every rotation of the sequence.
 
     Returns
     -------
-    sequence : the original sequence with a dollar added at the end
     bwt_pattern : bwt tranformed sequence
-    file : file path
     seq_list : shifted_matrix
     """
-    #retrieve the sequence and the file path
-    sequence, file = open_check_file()
-
     #add each letter of the sequence in a list named nucleotides
     nucleotides = []
     for i in range(0, len(sequence),1):
@@ -99,45 +326,349 @@ def transform():
         i += 1
         #add in a list named bwt
         bwt.append(last)
-        #join every items of the list to retrive bwt sequence in a single item
-        bwt_pattern = "".join(bwt)
+    #join every items of the list to retrive bwt sequence in a single item
+    bwt_pattern = "".join(bwt)
+
+    return bwt_pattern, seq_list
+
+
+
+def suffix_array_bwt(sequence):
+    """
+    This function performs the Burrows-Wheeler transform from the
+    suffix array of the sequence : the bwt letter of each sorted suffix
+    is the letter preceding it in the sequence.
+
+    Returns
+    -------
+    bwt_pattern : bwt tranformed sequence
+    sa : suffix array of the sequence
+    """
+    data = sequence.encode("ascii")
+    sa = suffix_array(data)
+    bwt_pattern = bwt_into(data, sa, bytearray(len(data))).decode("ascii")
+    return bwt_pattern, sa
+
+
+
+@traced("bwt")
+def bwt_into(data, sa, out):
+    """
+    This function writes the bwt letters of a sequence in a writable
+    buffer (bytearray or mmap of the output file) of the same length.
+
+    Parameters
+    ----------
+    data : the sequence ending with a $ (bytes-like)
+    sa : suffix array of the sequence
+    out : writable buffer receiving the bwt sequence
+
+    Returns
+    -------
+    out : the buffer
+    """
+    #sa[i] - 1 is -1 for the suffix starting at 0, giving the final $
+    for row, position in enumerate(sa):
+        out[row] = data[position - 1]
+    return out
+
+
+
+#available engines for the Burrows-Wheeler transform
+BWT_ENGINES = {"sais": suffix_array_bwt, "rotation": rotation_bwt}
+
+
+
+def cached_bwt(sequence, keep_sa=True):
+    """
+    This function looks for the bwt of a sequence ending with a $
+    (str or bytes-like) in the cache, if it is enabled.
+
+    Parameters
+    ----------
+    sequence : the sequence with a dollar added at the end
+    keep_sa : if True the suffix array must be in the cache too
+
+    Returns
+    -------
+    digest : hash of the sequence, None if the cache is disabled
+    result : (bwt sequence as bytes, suffix array or None), None if the
+    result is not in the cache
+    """
+    store = get_cache()
+    if store is None:
+        return None, None
+    digest = content_hash(sequence)
+    bwt = store.get(store.key(digest, "bwt"))
+    sa = store.get(store.key(digest, "sa")) if keep_sa else None
+    if bwt is None or (keep_sa and sa is None):
+        return digest, None
+    return digest, (bwt, unpack_array(sa) if keep_sa else None)
+
+
+
+def store_bwt(digest, bwt, sa=None):
+    """
+    This function saves the bwt (bytes-like) and the suffix array of
+    a sequence in the cache, digest is given by cached_bwt.
+    """
+    store = get_cache()
+    if store is None or digest is None:
+        return
+    store.put(store.key(digest, "bwt"), bytes(bwt))
+    if sa is not None:
+        store.put(store.key(digest, "sa"), pack_array(sa))
+
+
+
+def bwt_from_sequence(sequence, engine="sais", keep_sa=True):
+    """
+    This function performs the Burrows-Wheeler transform of a sequence
+    ending with a $ with the chosen engine. With the "sais" engine the
+    result is read from the cache when the sequence was already transformed.
+
+    Parameters
+    ----------
+    sequence : the sequence with a dollar added at the end
+    engine : "sais" (linear suffix array, default) or "rotation" (naive matrix)
+    keep_sa : if False the suffix array is neither saved in the cache
+    nor read from it (it may then be None)
+
+    Returns
+    -------
+    bwt_pattern : bwt tranformed sequence
+    seq_list : suffix array for "sais", shifted matrix for "rotation"
+    """
+    if engine not in BWT_ENGINES:
+        raise ValueError("Unknown bwt engine : " + str(engine))
+    if engine != "sais":
+        return BWT_ENGINES[engine](sequence)
+
+    digest, result = cached_bwt(sequence, keep_sa)
+    if result is not None:
+        return result[0].decode("ascii"), result[1]
+    bwt_pattern, sa = suffix_array_bwt(sequence)
+    store_bwt(digest, bwt_pattern.encode("ascii"), sa if keep_sa else None)
+    return bwt_pattern, sa
+
+
+
+def transform(engine="sais"):
+    """
+    This function is the main function of the program
+    it performs the Burrows-Wheeler transform.
+
+    Parameters
+    ----------
+    engine : "sais" (linear suffix array, default) or "rotation" (naive matrix)
+
+    Returns
+    -------
+    sequence : the original sequence with a dollar added at the end
+    bwt_pattern : bwt tranformed sequence
+    file : file path
+    seq_list : suffix array for "sais", shifted_matrix for "rotation"
+    """
+    #retrieve the sequence and the file path
+    sequence, file = open_check_file()
+
+    bwt_pattern, seq_list = bwt_from_sequence(sequence, engine)
     
     return sequence, bwt_pattern, file, seq_list
 
 
 
-def save_transform():
+def save_transform_path(file, engine="sais", index=True):
     """
-    This function allows to save the result of Burrows_Wheeler transform
-    in a new created text file ending with _bwt.txt
+    This function saves the Burrows-Wheeler transform of the sequence of
+    a file in a new created text file ending with _bwt.txt
+    and its FM-index in a file ending with _bwt.fmi
+
+    Parameters
+    ----------
+    file : path of the file containing the sequence
+    engine : "sais" (linear suffix array, default) or "rotation" (naive matrix)
+    index : if True the FM-index of the bwt sequence is saved
 
     Returns
     -------
     seq : the original sequence with a dollar added at the end
     bwt : bwt tranformed sequence
+    created_file : path of the bwt file
     """
-    
-    seq, bwt, file, seq_list = transform()
-    
-    #cut the file path by extension and retrieve the first part
-    file_path = os.path.splitext(file)[0]
-    
+    seq = check_file(file)
+    bwt, seq_list = bwt_from_sequence(seq, engine)
+
     #create a new file named with the file name of the file containing the original sequence
     #write the bwt sequence
-    file = open(file_path+ "_bwt.txt", "w")
-    file.write(bwt)
-    file.close()
+    created_file = os.path.splitext(file)[0] + "_bwt.txt"
+    with open(created_file, "w") as file_bwt:
+        file_bwt.write(bwt)
+
+    #save the FM-index, reusing the suffix array when it is available
+    if index:
+        sa = seq_list if engine == "sais" else None
+        save_index(bwt, created_file, sa)
+    return seq, bwt, created_file
+
+
+
+def save_transform(engine="sais", index=True):
+    """
+    This function allows to save the result of Burrows_Wheeler transform
+    of a file chosen in a dialog window (see save_transform_path)
+
+    Parameters
+    ----------
+    engine : "sais" (linear suffix array, default) or "rotation" (naive matrix)
+    index : if True the FM-index of the bwt sequence is saved
+
+    Returns
+    -------
+    seq : the original sequence with a dollar added at the end
+    bwt : bwt tranformed sequence
+    """
+    file = filedialog.askopenfilename(title="Select a txt file",\
+                                      filetypes=[("Text file", ".txt")])
+    try:
+        seq, bwt, created_file = save_transform_path(file, engine, index)
+    except (OSError, ValueError) as error:
+        messagebox.showwarning("Error", str(error))
+        return False
 
-    messagebox.showinfo("Information", "Your bwt result has been saved in" \
-                        +file_path+"_bwt.txt.")
+    messagebox.showinfo("Information", "Your bwt result has been saved in " \
+                        + created_file + ".")
     return seq, bwt
 
     
 
-def bwt_inverse():
+def letter_counts(data, chunk_size=1 << 20):
+    """
+    This function counts the letters of a bytes-like sequence by pieces,
+    so a mapped file is never copied at once.
+
+    Returns
+    -------
+    counts : list of the number of occurrences of each byte value
+    """
+    counts = [0] * 256
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        piece = bytes(view[start:start + chunk_size])
+        for letter in set(piece):
+            counts[letter] += piece.count(letter)
+    view.release()
+    return counts
+
+
+
+@traced("lf_mapping")
+def lf_mapping(bwt_data):
+    """
+    This function computes the LF-mapping of a bwt sequence : the row of
+    the sorted matrix starting with the last letter of each row.
+    It uses the C-array (number of letters smaller than a letter) and
+    the occurrences of the letter before each position.
+
+    Parameters
+    ----------
+    bwt_data : bwt sequence as bytes-like (bytes, bytearray, mmap)
+
+    Returns
+    -------
+    lf : array of integers, lf[i] = C[bwt[i]] + Occ(bwt[i], i)
+    """
+    #C-array : first row of each letter in the sorted first column
+    c_array = [0] * 256
+    total = 0
+    counts = letter_counts(bwt_data)
+    for letter in range(256):
+        c_array[letter] = total
+        total += counts[letter]
+
+    #the running C-array gives C[letter] + Occ(letter, i) at position i,
+    #32 bits integers are enough below 2 GB
+    typecode = "i" if len(bwt_data) < 1 << 31 else "q"
+    lf = array(typecode, bytes(array(typecode).itemsize * len(bwt_data)))
+    view = memoryview(bwt_data)
+    for i, letter in enumerate(view):
+        lf[i] = c_array[letter]
+        c_array[letter] += 1
+    view.release()
+    return lf
+
+
+
+@traced("lf_inverse")
+def lf_inverse(bwt, out=None):
+    """
+    This function performs the Burrows-Wheeler reconstruction in linear
+    time by following the LF-mapping from the row starting with the $.
+
+    Parameters
+    ----------
+    bwt : bwt sequence containing a single $ (str or bytes-like)
+    out : writable buffer of len(bwt) - 1 bytes receiving the original
+    sequence (bytearray or mmap of the output file), if given
+
+    Returns
+    -------
+    inverse_bwt : the original sequence without the $ (str),
+    or the buffer out if given
+    """
+    data = bwt.encode("ascii") if isinstance(bwt, str) else bwt
+    if letter_counts(data)[ord("$")] != 1:
+        raise ValueError("The bwt sequence must contain a single $")
+
+    lf = lf_mapping(data)
+
+    #the first row starts with the $, its last letter is the last letter
+    #of the original sequence, the LF-mapping gives the previous letters
+    original = bytearray(len(data) - 1) if out is None else out
+    row = 0
+    for i in range(len(data) - 2, -1, -1):
+        original[i] = data[row]
+        row = lf[row]
+    if out is None:
+        return original.decode("ascii")
+    return out
+
+
+
+def bwt_inverse_path(file):
     '''
     This function performs the Burrows-Wheeler reconstruction
     from a bwt sequence in a text file, and print it in a new file
+    ending with _inversion.txt
+
+    Returns
+    -------
+    bwt : bwt sequence
+    inverse_bwt : the original sequence
+    created_file : path of the reconstructed file
+    '''
+    if os.stat(file).st_size == 0:
+        raise ValueError("Your file is empty")
+    #retrive the bwt sequence in bwt variable and delete "\n"
+    bwt = read_sequence(file)
+
+    #reconstruction of the original sequence (without the '$')
+    #with the LF-mapping
+    inverse_bwt = lf_inverse(bwt)
+
+    #write the original sequence in a new created file 
+    created_file = os.path.splitext(file)[0] + "_inversion.txt"
+    with open(created_file, "w") as file_inv:
+        file_inv.write(inverse_bwt)
+    return bwt, inverse_bwt, created_file
+
+
+
+def bwt_inverse():
+    '''
+    This function performs the Burrows-Wheeler reconstruction
+    from a bwt sequence in a text file chosen in a dialog window,
+    and print it in a new file
 
     Returns
     -------
@@ -147,47 +678,12 @@ def bwt_inverse():
 
     file = filedialog.askopenfilename(title="Select a txt file" \
                                       ,filetypes=[("Text file", ".txt")])
-    if os.stat(file).st_size != 0 :
-        open_file = open(file, "r")
-        bwt= ""
-        
-        #retrive the bwt sequence in bwt variable and delete "\n"
-        for line in open_file :
-            bwt += line
-            bwt = bwt.strip("\n")
-    
-        #create an empty table according to the size of the bwt sequence
-        table = [""] * len(bwt)
-    
-        #this loop adds each items of the sequence in a list 
-        #perform a lexical sort of the list 
-        #and adds again each items of the sequence in the sorted list before the items already in the list 
-        for i in range(0,len(bwt),1):            
-            table = [bwt[i] + table[i] for i in range(0,len(bwt),1)]
-            table = sorted(table)
-
-        
-        #find the row ending in $ and save it in inverse_bwt variable 
-        #inverse bwt corresponds to the original sequence
-        for row in table : 
-            if row.endswith("$"):
-                inverse_bwt = row
-        
-        #cut the '$' from the reconstructed sequence
-        inverse_bwt = inverse_bwt.rstrip("$")  
-        
-        open_file.close() 
-        
-        #write the original sequence in a new created file 
-        file_path = os.path.splitext(file)[0]
-        file_inv = open(file_path + "_inversion.txt", "w") 
-        file_inv.write(inverse_bwt) 
-        file_inv.close()
-        
-        messagebox.showinfo("Information", "Your bwt inversion has been saved in " \
-                            +file_path +"_inversion.txt file.")
-        return bwt,inverse_bwt
-    
-    else :
-        messagebox.showwarning("Error", "Your file is empty")
+    try:
+        bwt, inverse_bwt, created_file = bwt_inverse_path(file)
+    except (OSError, ValueError) as error:
+        messagebox.showwarning("Error", str(error))
         return False
+
+    messagebox.showinfo("Information", "Your bwt inversion has been saved in " \
+                        + created_file + " file.")
+    return bwt, inverse_bwt
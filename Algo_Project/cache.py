@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+cache script contains the on-disk cache of the results : the bwt
+sequences, suffix arrays and Huffman code lengths are saved in a directory
+under a key made of the hash of the input and of the parameters, so a
+sequence already transformed or compressed is not computed again.
+The directory is bounded in size, the least recently used results are
+removed first.
+
+The cache is enabled by configure (or the BWT_CACHE_DIR environment
+variable), the configuration is kept in the environment so the worker
+processes use the same cache.
+"""
+
+from array import array
+import hashlib
+import os
+import tempfile
+
+
+#environment variables of the configuration
+CACHE_DIR_VARIABLE = "BWT_CACHE_DIR"
+CACHE_SIZE_VARIABLE = "BWT_CACHE_SIZE"
+#directory used by the graphical interface
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "bwt_huffman")
+#maximal size of the directory by default (512 MB)
+DEFAULT_CACHE_SIZE = 512 << 20
+#extension of the files of the results
+SUFFIX = ".cache"
+
+#Cache instances already created : (directory, max_bytes) -> Cache
+_caches = {}
+
+
+class Cache():
+    """
+    A class of directory keeping results in files named by their key.
+    Reading a result updates its modification time, which gives the
+    order of the eviction.
+
+    Attributes
+    ----------
+    directory : path of the directory
+    max_bytes : maximal total size of the results
+    """
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(digest, kind, **params):
+        """
+        This method returns the key of a result from the hash of the input,
+        the kind of result ("bwt", "sa", "huffman") and its parameters.
+        """
+        text = kind + "|" + "|".join("%s=%s" % item for item in sorted(params.items()))
+        return hashlib.sha256(digest + text.encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key):
+        """
+        This method returns the saved result of a key (bytes), None if
+        it is not in the cache.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+            os.utime(path)
+        except OSError:
+            return None
+        return data
+
+    def put(self, key, data):
+        """
+        This method saves a result (bytes) and removes the least recently
+        used results if the directory is too large. A result larger than
+        the cache is not saved.
+        """
+        if len(data) > self.max_bytes:
+            return
+        #the result is written in a temporary file then renamed, so another
+        #process never reads a partial result
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self.path(key))
+        except OSError:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            return
+        self.evict()
+
+    def entries(self):
+        """
+        This method returns the (modification time, size, path) of the results.
+        """
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(SUFFIX):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def size(self):
+        return sum(size for mtime, size, path in self.entries())
+
+    def evict(self):
+        """
+        This method removes the least recently used results until the
+        total size is below max_bytes.
+        """
+        entries = sorted(self.entries())
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            os.remove(path)
+
+
+
+def configure(directory=None, max_bytes=DEFAULT_CACHE_SIZE):
+    """
+    This function enables the cache in a directory, or disables it
+    if the directory is None.
+    """
+    if directory is None:
+        os.environ.pop(CACHE_DIR_VARIABLE, None)
+        os.environ.pop(CACHE_SIZE_VARIABLE, None)
+    else:
+        os.environ[CACHE_DIR_VARIABLE] = os.path.abspath(directory)
+        os.environ[CACHE_SIZE_VARIABLE] = str(max_bytes)
+
+
+
+def get_cache():
+    """
+    This function returns the configured cache, None if it is disabled.
+    """
+    directory = os.environ.get(CACHE_DIR_VARIABLE)
+    if not directory:
+        return None
+    max_bytes = int(os.environ.get(CACHE_SIZE_VARIABLE, DEFAULT_CACHE_SIZE))
+    if (directory, max_bytes) not in _caches:
+        _caches[directory, max_bytes] = Cache(directory, max_bytes)
+    return _caches[directory, max_bytes]
+
+
+
+def content_hash(data):
+    """
+    This function returns the hash of a sequence (str or bytes-like).
+    """
+    if isinstance(data, str):
+        data = data.encode("latin-1")
+    return hashlib.sha256(data).digest()
+
+
+
+def pack_array(values):
+    """
+    This function converts a list of positive integers in bytes :
+    typecode | items, with 32 bits integers when they are small enough.
+    """
+    typecode = "i" if len(values) < 1 << 31 else "q"
+    return typecode.encode("ascii") + array(typecode, values).tobytes()
+
+
+
+def unpack_array(data):
+    """
+    This function reads the integers written by pack_array.
+    """
+    values = array(chr(data[0]))
+    values.frombytes(data[1:])
+    return values
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line script to perform the transform, inversion, compression
+and decompression on many files without the graphical interface
+
+example : python3 cli.py compress --workers 4 sequence1.txt sequence2.txt
+"""
+
+import argparse
+import os
+import sys
+from contextlib import nullcontext
+
+import api
+from batch import DEFAULT_SAMPLE_SIZE, compress_directory, format_report
+from cache import DEFAULT_CACHE_SIZE, configure
+from container import open_container
+from instrument import trace
+from repeats import save_repeats
+from streaming import CODERS, DEFAULT_BLOCK_SIZE, decompressed_path, format_stats
+
+
+def output_path(file, suffix, output_dir):
+    """
+    This function returns the path of the file created from a file,
+    in the output directory if one is given.
+    """
+    created_file = os.path.splitext(file)[0] + suffix
+    if output_dir is not None:
+        created_file = os.path.join(output_dir, os.path.basename(created_file))
+    return created_file
+
+
+
+def run_command(args, file):
+    """
+    This function performs the command on a single file.
+
+    Returns
+    -------
+    created_file : path of the created file
+    """
+    if args.command == "transform":
+        return api.transform_file(file, output_path(file, "_bwt.txt", args.output_dir),
+                                  args.engine, not args.no_index)
+    if args.command == "inverse":
+        return api.inverse_file(file, output_path(file, "_inversion.txt", args.output_dir))
+    if args.command == "compress":
+        suffix = "_compressed.txt" if args.no_bwt else "_bwt_compressed.txt"
+        stats = {} if args.stats else None
+        created_file = api.compress_file(file, output_path(file, suffix, args.output_dir),
+                                         args.block_size, not args.no_bwt, args.workers,
+                                         mtf=args.mtf or args.rle, rle=args.rle, stats=stats,
+                                         keep_case=args.keep_case, coder=args.coder)
+        if args.stats:
+            print(format_stats(stats))
+        return created_file
+    if args.command == "repeats":
+        return save_repeats(file, output_path(file, "_repeats.json", args.output_dir),
+                            args.min_length, args.max_period, args.min_copies, args.limit)
+    if args.command == "append":
+        return api.append_file(args.archive, file, args.workers, reuse_codes=args.reuse_codes,
+                               keep_case=args.keep_case)
+    if args.command == "extract":
+        created_file = output_path(file, "_%d_%d.txt" % (args.start, args.end), args.output_dir)
+        region = api.extract(file, args.start, args.end, args.record)
+        with open(created_file, "w") as file_region:
+            file_region.write(region)
+        return created_file
+    #the name of the decompressed file depends on the header of the file
+    with open(file, "rb") as file_comp:
+        header, blocks = open_container(file_comp)
+    created_file = decompressed_path(file, header["flags"])
+    if args.output_dir is not None:
+        created_file = os.path.join(args.output_dir, os.path.basename(created_file))
+    return api.decompress_file(file, created_file, args.workers)
+
+
+
+def run_verify(args):
+    """
+    This function checks the compressed files, shared between the workers,
+    and prints a line for each file.
+
+    Returns
+    -------
+    status : 0 if every files are valid, else 1
+    """
+    status = 0
+    for report in api.verify_files(args.files, args.workers, args.full):
+        if report["errors"]:
+            for error in report["errors"]:
+                print("Error " + report["file"] + " : " + error, file=sys.stderr)
+            status = 1
+        elif report["checksums"] or args.full:
+            print(report["file"] + " : ok (%d blocks)" % report["blocks"])
+        else:
+            print(report["file"] + " : no checksums, use --full to decompress it")
+    return status
+
+
+
+def run_batch(args):
+    """
+    This function compresses the sequence files of every directory and
+    prints the report of each directory.
+
+    Returns
+    -------
+    status : 0 if every files are compressed, else 1
+    """
+    status = 0
+    for directory in args.files:
+        if not os.path.isdir(directory):
+            print("Error " + directory + " : not a directory", file=sys.stderr)
+            status = 1
+            continue
+        report_file = None
+        if args.report is not None:
+            #one report for each directory when there are many directories
+            report_file = args.report if len(args.files) == 1 else \
+                os.path.splitext(args.report)[0] + "_" + os.path.basename(
+                    os.path.normpath(directory)) + ".json"
+        report = compress_directory(directory, args.output_dir, args.workers,
+                                    not args.no_shared_table, args.sample_size,
+                                    args.block_size, not args.no_bwt, args.mtf or args.rle,
+                                    args.rle, args.coder, args.keep_case, report_file)
+        print(format_report(report))
+        if report["errors"]:
+            status = 1
+    return status
+
+
+
+def positive_int(text):
+    """
+    This function converts an argument in an integer of at least 1,
+    argparse reports the other values as an error of the command line.
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid int value: " + repr(text))
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be >= 1, not " + text)
+    return value
+
+
+
+def parse_arguments(argv=None):
+    """
+    This function reads the arguments of the command line.
+    """
+    parser = argparse.ArgumentParser(description="BWT & Huffman compression of DNA sequences")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    transform = subparsers.add_parser("transform", help="Burrows-Wheeler transform")
+    transform.add_argument("--engine", choices=["sais", "rotation"], default="sais")
+    transform.add_argument("--no-index", action="store_true",
+                           help="do not save the FM-index of the bwt")
+
+    subparsers.add_parser("inverse", help="Burrows-Wheeler reconstruction")
+
+    compress = subparsers.add_parser("compress", help="BWT + Huffman compression")
+    compress.add_argument("--no-bwt", action="store_true",
+                          help="Huffman compression without bwt")
+    compress.add_argument("--block-size", type=positive_int, default=DEFAULT_BLOCK_SIZE)
+    compress.add_argument("--workers", type=positive_int, default=1)
+    compress.add_argument("--mtf", action="store_true",
+                          help="move-to-front stage before the compression")
+    compress.add_argument("--rle", action="store_true",
+                          help="move-to-front and run-length stages before the compression")
+    compress.add_argument("--coder", choices=CODERS, default="huffman",
+                          help="entropy coder of the blocks")
+    compress.add_argument("--keep-case", action="store_true",
+                          help="keep the lower case (soft-masked) letters")
+    compress.add_argument("--stats", action="store_true",
+                          help="print the throughput of each stage")
+
+    decompress = subparsers.add_parser("decompress", help="decompression")
+    decompress.add_argument("--workers", type=positive_int, default=1)
+
+    append = subparsers.add_parser("append",
+                                   help="compression of new sequences at the end of a compressed file")
+    append.add_argument("--archive", required=True,
+                        help="compressed file receiving the sequences of the files")
+    append.add_argument("--workers", type=positive_int, default=1)
+    append.add_argument("--reuse-codes", action="store_true",
+                        help="reuse the Huffman codes of the last block when they fit")
+    append.add_argument("--keep-case", action="store_true",
+                        help="keep the lower case (soft-masked) letters")
+
+    repeats = subparsers.add_parser("repeats", help="repeats of the sequences (JSON report)")
+    repeats.add_argument("--min-length", type=positive_int, default=20,
+                         help="minimal length of the maximal repeats")
+    repeats.add_argument("--max-period", type=positive_int, default=6,
+                         help="maximal length of the unit of the tandem repeats")
+    repeats.add_argument("--min-copies", type=positive_int, default=3,
+                         help="minimal number of copies of the tandem repeats")
+    repeats.add_argument("--limit", type=positive_int, default=1000,
+                         help="maximal number of repeats of each kind in the report")
+
+    verify = subparsers.add_parser("verify", help="check of compressed files without output")
+    verify.add_argument("--workers", type=positive_int, default=1,
+                        help="number of files checked at once")
+    verify.add_argument("--full", action="store_true",
+                        help="decompress the blocks and check the checksums of the sequences")
+
+    batch = subparsers.add_parser("batch",
+                                  help="compression of every sequence file of directories")
+    batch.add_argument("--workers", type=positive_int, default=1, help="number of files compressed at once")
+    batch.add_argument("--no-shared-table", action="store_true",
+                       help="every block keeps its own Huffman codes")
+    batch.add_argument("--sample-size", type=positive_int, default=DEFAULT_SAMPLE_SIZE,
+                       help="number of letters of the sample training the shared code table")
+    batch.add_argument("--block-size", type=positive_int, default=DEFAULT_BLOCK_SIZE)
+    batch.add_argument("--no-bwt", action="store_true", help="Huffman compression without bwt")
+    batch.add_argument("--mtf", action="store_true",
+                       help="move-to-front stage before the compression")
+    batch.add_argument("--rle", action="store_true",
+                       help="move-to-front and run-length stages before the compression")
+    batch.add_argument("--coder", choices=CODERS, default="huffman",
+                       help="entropy coder of the blocks")
+    batch.add_argument("--keep-case", action="store_true",
+                       help="keep the lower case (soft-masked) letters")
+    batch.add_argument("--report", default=None,
+                       help="JSON file of the statistics of every file")
+
+    extract = subparsers.add_parser("extract", help="decompression of a range of letters")
+    extract.add_argument("--start", type=int, required=True,
+                         help="position of the first letter, from 0")
+    extract.add_argument("--end", type=int, required=True,
+                         help="position following the last letter")
+    extract.add_argument("--record", default=None,
+                         help="name of the record, the positions are counted in this record")
+
+    for subparser in subparsers.choices.values():
+        subparser.add_argument("files", nargs="+", help="files to process")
+        subparser.add_argument("-o", "--output-dir", default=None,
+                               help="directory of the created files")
+        subparser.add_argument("--trace", default=None,
+                               help="JSON lines file of the time and sizes of every stage")
+        subparser.add_argument("--trace-memory", action="store_true",
+                               help="add the peak allocation of every stage to the trace")
+        subparser.add_argument("--cache-dir", default=None,
+                               help="directory keeping the bwt, suffix arrays and Huffman codes")
+        subparser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE >> 20,
+                               help="maximal size of the cache directory in MB")
+    return parser.parse_args(argv)
+
+
+
+def main(argv=None):
+    """
+    This function performs the command on every files, a file which
+    cannot be processed is reported and the next files are processed.
+
+    Returns
+    -------
+    status : 0 if every files have been processed, else 1
+    """
+    args = parse_arguments(argv)
+    status = 0
+    if args.cache_dir:
+        configure(args.cache_dir, args.cache_size << 20)
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    recorder = trace(args.trace, args.trace_memory) if args.trace else nullcontext()
+    with recorder:
+        if args.command == "verify":
+            return run_verify(args)
+        if args.command == "batch":
+            return run_batch(args)
+        for file in args.files:
+            try:
+                created_file = run_command(args, file)
+            except (OSError, ValueError) as error:
+                print("Error " + file + " : " + str(error), file=sys.stderr)
+                status = 1
+            else:
+                print(file + " -> " + created_file)
+    return status
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
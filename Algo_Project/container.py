@@ -0,0 +1,578 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+container script contains the functions writing and reading
+the binary file format of the compressed sequences
+"""
+
+import hashlib
+import json
+import os
+import struct
+import zlib
+
+
+#identifier written at the start of every compressed file
+MAGIC = b"DNAZ"
+#version of the binary format, the files of the first version of the
+#interface (json dictionnary line) are read as version 0
+VERSION = 1
+
+#flags of the header : stages applied to the blocks before the compression
+FLAG_BWT = 1
+FLAG_MTF = 2
+FLAG_RLE = 4
+#the blocks start with the name of their record (FASTA/FASTQ files)
+FLAG_RECORDS = 8
+#the blocks are coded with the rANS coder instead of the Huffman codes
+FLAG_RANS = 16
+#the blocks contain the CRC32 of their payload and of their original sequence
+FLAG_CHECKSUMS = 32
+#the header gives the identifier of a shared code table, used by the blocks
+#saved without code lengths
+FLAG_SHARED_TABLE = 64
+
+#magic, version, flags
+HEADER = struct.Struct("<4sBB")
+#number of symbols of the code lengths, of the move-to-front alphabet
+SYMBOLS = struct.Struct("<B")
+#number of interleaved rANS states, number of symbols
+STREAMS = struct.Struct("<BB")
+#symbol, quantized rANS frequency
+FREQUENCY = struct.Struct("<BH")
+#CRC32 of the payload, CRC32 of the original sequence of the block
+CHECKSUMS = struct.Struct("<II")
+#identifier of the shared code table
+TABLE_ID = struct.Struct("<8s")
+#identifier and extension of the files of the shared code tables
+TABLE_MAGIC = b"DNAT"
+TABLE_SUFFIX = ".dnat"
+
+#type of the records following the header
+RECORD_END = 0
+RECORD_BLOCK = 1
+
+#block index written after the end record : number of blocks, then for
+#each block its offset in the file, the position of its first letter in
+#the original sequences, its number of letters and the number of its record
+#(varints), then the footer :
+#offset of the index, identifier, at the very end of the file
+INDEX_FOOTER = struct.Struct("<Q4s")
+INDEX_MAGIC = b"DNAI"
+
+
+def pack_varint(value):
+    """
+    This function converts a positive integer in a varint : 7 bits
+    by byte from the lowest bits, the highest bit of a byte is set when
+    another byte follows.
+    """
+    data = bytearray()
+    while value > 127:
+        data.append(value & 127 | 128)
+        value >>= 7
+    data.append(value)
+    return bytes(data)
+
+
+
+def unpack_varint(data, offset):
+    """
+    This function reads a varint written by pack_varint.
+
+    Returns
+    -------
+    value : the integer
+    offset : position following the varint
+    """
+    value = shift = 0
+    while True:
+        if offset >= len(data):
+            raise ValueError("Truncated compressed file")
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 127) << shift
+        if byte < 128:
+            return value, offset
+        shift += 7
+
+
+
+def read_exactly(file, size):
+    """
+    This function reads size bytes of a compressed file, a file ending
+    before them is truncated.
+    """
+    data = file.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated compressed file")
+    return data
+
+
+
+def read_varint(file):
+    """
+    This function reads a varint at the current position of a file.
+    """
+    value = shift = 0
+    while True:
+        (byte,) = read_exactly(file, 1)
+        value |= (byte & 127) << shift
+        if byte < 128:
+            return value
+        shift += 7
+
+
+
+def pack_code_lengths(code_lengths):
+    """
+    This function converts the code lengths in bytes :
+    number of symbols | (symbol, code length) * n
+    """
+    header = bytearray(SYMBOLS.pack(len(code_lengths)))
+    for symbol in sorted(code_lengths):
+        header += bytes((ord(symbol), code_lengths[symbol]))
+    return bytes(header)
+
+
+
+def unpack_code_lengths(data, offset):
+    """
+    This function reads the code lengths written by pack_code_lengths.
+
+    Returns
+    -------
+    code_lengths : dictionnary symbol -> length of its canonical code
+    offset : position following the code lengths
+    """
+    (n_symbols,) = SYMBOLS.unpack_from(data, offset)
+    offset += SYMBOLS.size
+    code_lengths = {}
+    for i in range(n_symbols):
+        code_lengths[chr(data[offset])] = data[offset + 1]
+        offset += 2
+    return code_lengths, offset
+
+
+
+def pack_frequencies(frequencies, streams):
+    """
+    This function converts the rANS frequencies in bytes :
+    number of streams | number of symbols | (symbol, frequency) * n
+    """
+    data = bytearray(STREAMS.pack(streams, len(frequencies)))
+    for symbol in sorted(frequencies):
+        data += FREQUENCY.pack(ord(symbol), frequencies[symbol])
+    return bytes(data)
+
+
+
+def unpack_frequencies(data, offset):
+    """
+    This function reads the frequencies written by pack_frequencies.
+
+    Returns
+    -------
+    frequencies : dictionnary symbol -> quantized frequency
+    streams : number of interleaved states
+    offset : position following the frequencies
+    """
+    streams, n_symbols = STREAMS.unpack_from(data, offset)
+    offset += STREAMS.size
+    frequencies = {}
+    for i in range(n_symbols):
+        symbol, frequency = FREQUENCY.unpack_from(data, offset)
+        frequencies[chr(symbol)] = frequency
+        offset += FREQUENCY.size
+    return frequencies, streams, offset
+
+
+
+def table_id(code_lengths):
+    """
+    This function returns the identifier of a code table, the hash of
+    its code lengths (16 hexadecimal characters).
+    """
+    return hashlib.sha256(pack_code_lengths(code_lengths)).hexdigest()[:2 * TABLE_ID.size]
+
+
+
+def save_table(code_lengths, directory):
+    """
+    This function saves a code table shared by many compressed files
+    in a file named by its identifier : identifier | code lengths
+
+    Returns
+    -------
+    identifier : identifier of the table
+    """
+    identifier = table_id(code_lengths)
+    with open(os.path.join(directory, identifier + TABLE_SUFFIX), "wb") as file:
+        file.write(TABLE_MAGIC + pack_code_lengths(code_lengths))
+    return identifier
+
+
+
+def find_table(identifier, directories):
+    """
+    This function reads the shared code table of an identifier, in the
+    first directory containing it.
+
+    Returns
+    -------
+    code_lengths : dictionnary symbol -> length of its canonical code
+    """
+    for directory in directories:
+        path = os.path.join(directory, identifier + TABLE_SUFFIX)
+        if os.path.exists(path):
+            with open(path, "rb") as file:
+                data = file.read()
+            if not data.startswith(TABLE_MAGIC):
+                raise ValueError("Corrupted code table " + path)
+            return unpack_code_lengths(data, len(TABLE_MAGIC))[0]
+    raise ValueError("The shared code table " + identifier + " is missing")
+
+
+
+def table_directories(file, table_dir=None):
+    """
+    This function returns the directories where the shared code table of
+    a compressed file is looked for : table_dir if given, then the
+    directory of the file and its parent directories.
+    """
+    directories = [table_dir] if table_dir is not None else []
+    name = getattr(file, "name", None)
+    if isinstance(name, str):
+        directory = os.path.dirname(os.path.abspath(name))
+        while True:
+            directories.append(directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                break
+            directory = parent
+    return directories
+
+
+
+def write_header(file, flags=0, block_size=0, table=None):
+    """
+    This function writes the header of a compressed file :
+    magic | version | flags | block size (varint) | [shared table identifier]
+    """
+    file.write(HEADER.pack(MAGIC, VERSION, flags))
+    file.write(pack_varint(block_size))
+    if flags & FLAG_SHARED_TABLE:
+        file.write(TABLE_ID.pack(bytes.fromhex(table)))
+
+
+
+def write_block(file, block, flags=0):
+    """
+    This function writes a compressed block after the header :
+    record type | [record name] | [move-to-front alphabet] |
+    code lengths (or rANS frequencies) | padding bits | length (varint) |
+    payload size (varint) | [checksums] | payload
+
+    Parameters
+    ----------
+    file : file opened in binary mode
+    block : dictionnary with the code lengths (symbol -> length of its
+    canonical code), padding (number of zeros added at the end of the bits),
+    length (number of symbols of the block), payload (the packed bits),
+    alphabet (the sorted letters of the move-to-front stage), name (name
+    of the record starting with the block, None if the block continues
+    the record of the previous block), for the rANS coder the frequencies
+    and the number of streams instead of the code lengths, shared (True if
+    the block uses the shared code table, its code lengths are not saved)
+    and, with FLAG_CHECKSUMS, data_crc (CRC32 of the original sequence)
+    flags : flags of the header of the file
+    """
+    record = bytearray((RECORD_BLOCK,))
+    if flags & FLAG_RECORDS:
+        if block.get("name") is None:
+            record.append(0)
+        else:
+            name = block["name"].encode("utf-8")
+            record += bytes((1,)) + pack_varint(len(name)) + name
+    if flags & FLAG_MTF:
+        record += SYMBOLS.pack(len(block["alphabet"])) + block["alphabet"].encode("latin-1")
+    if flags & FLAG_RANS:
+        record += pack_frequencies(block["frequencies"], block["streams"])
+    elif block.get("shared"):
+        record += pack_code_lengths({})
+    else:
+        record += pack_code_lengths(block["code_lengths"])
+    record += bytes((block["padding"],)) + pack_varint(block["length"]) + \
+              pack_varint(len(block["payload"]))
+    if flags & FLAG_CHECKSUMS:
+        record += CHECKSUMS.pack(zlib.crc32(block["payload"]), block["data_crc"])
+    file.write(record)
+    file.write(block["payload"])
+
+
+
+def write_end(file):
+    """
+    This function writes the record closing the list of blocks.
+    """
+    file.write(bytes((RECORD_END,)))
+
+
+
+def write_index(file, entries):
+    """
+    This function writes the block index after the end record :
+    number of blocks | (offset, start, span, record) * n | index offset | identifier
+    The numbers before the index offset are varints. A file of a single
+    block has no index (see streaming.block_index).
+
+    Parameters
+    ----------
+    file : file opened in binary mode, after the end record
+    entries : list of (offset of the block record in the file, position of
+    the first letter of the block, number of letters of the block, number
+    of the record of the block)
+    """
+    if len(entries) < 2:
+        return
+    offset = file.tell()
+    index = bytearray(pack_varint(len(entries)))
+    for entry in entries:
+        for value in entry:
+            index += pack_varint(value)
+    index += INDEX_FOOTER.pack(offset, INDEX_MAGIC)
+    file.write(index)
+
+
+
+def read_header(file):
+    """
+    This function reads the header of a compressed file.
+
+    Returns
+    -------
+    header : dictionnary with the version, flags, block size and
+    identifier of the shared code table (None without table)
+    """
+    data = file.read(HEADER.size)
+    if len(data) < HEADER.size or not data.startswith(MAGIC):
+        raise ValueError("This file is not a compressed file")
+    magic, version, flags = HEADER.unpack_from(data, 0)
+    if version != VERSION:
+        raise ValueError("Unsupported compressed file version : " + str(version))
+    block_size = read_varint(file)
+    table = None
+    if flags & FLAG_SHARED_TABLE:
+        table = TABLE_ID.unpack(read_exactly(file, TABLE_ID.size))[0].hex()
+    return {"version": version, "flags": flags, "block_size": block_size, "table": table}
+
+
+
+def read_block(file, flags=0, shared=None):
+    """
+    This function reads the next block of a compressed file.
+
+    Parameters
+    ----------
+    file : file opened in binary mode
+    flags : flags of the header of the file
+    shared : code lengths of the shared code table of the file, given to
+    the blocks saved without code lengths
+
+    Returns
+    -------
+    block : dictionnary with the code lengths (or the rANS frequencies and
+    streams), padding, length, packed bits, move-to-front alphabet,
+    record name and checksums (payload_crc and data_crc, None without
+    FLAG_CHECKSUMS) of the block, None after the last block
+
+    Raises
+    ------
+    ValueError : if the file ends before the end record (truncated file)
+    """
+    (record,) = read_exactly(file, 1)
+    if record == RECORD_END:
+        return None
+    if record != RECORD_BLOCK:
+        raise ValueError("Corrupted compressed file")
+    name = None
+    if flags & FLAG_RECORDS and read_exactly(file, 1)[0]:
+        name = read_exactly(file, read_varint(file)).decode("utf-8")
+    alphabet = None
+    if flags & FLAG_MTF:
+        alphabet = read_exactly(file, read_exactly(file, SYMBOLS.size)[0]).decode("latin-1")
+    block = {"codes": None, "code_lengths": None, "alphabet": alphabet, "name": name}
+    #the padding byte follows the code lengths
+    if flags & FLAG_RANS:
+        data = read_exactly(file, STREAMS.size)
+        data += read_exactly(file, FREQUENCY.size * data[1] + 1)
+        block["frequencies"], block["streams"], offset = unpack_frequencies(data, 0)
+    else:
+        data = read_exactly(file, SYMBOLS.size)
+        data += read_exactly(file, 2 * data[0] + 1)
+        block["code_lengths"], offset = unpack_code_lengths(data, 0)
+        if not block["code_lengths"] and shared is not None:
+            block["code_lengths"] = shared
+            block["shared"] = True
+    padding = data[offset]
+    length = read_varint(file)
+    size = read_varint(file)
+    payload_crc = data_crc = None
+    if flags & FLAG_CHECKSUMS:
+        payload_crc, data_crc = CHECKSUMS.unpack(read_exactly(file, CHECKSUMS.size))
+    payload = read_exactly(file, size)
+    block.update({"padding": padding, "length": length, "payload": payload,
+                  "payload_crc": payload_crc, "data_crc": data_crc})
+    return block
+
+
+
+def read_index(file):
+    """
+    This function reads the block index at the end of a compressed file,
+    the position in the file is kept.
+
+    Returns
+    -------
+    entries : list of (offset, start, span, record) of the blocks,
+    None if the file has no index (a file of a single block)
+    """
+    position = file.tell()
+    try:
+        file.seek(0, 2)
+        end = file.tell()
+        if end < HEADER.size + INDEX_FOOTER.size:
+            return None
+        file.seek(end - INDEX_FOOTER.size)
+        offset, magic = INDEX_FOOTER.unpack(file.read(INDEX_FOOTER.size))
+        if magic != INDEX_MAGIC or offset >= end:
+            return None
+        file.seek(offset)
+        data = file.read(end - INDEX_FOOTER.size - offset)
+        count, offset = unpack_varint(data, 0)
+        values = []
+        for i in range(4 * count):
+            value, offset = unpack_varint(data, offset)
+            values.append(value)
+        if offset != len(data):
+            raise ValueError("Corrupted block index")
+        return [tuple(values[i:i + 4]) for i in range(0, len(values), 4)]
+    finally:
+        file.seek(position)
+
+
+
+def remove_index(file):
+    """
+    This function removes the end record and the block index of a
+    compressed file opened in "r+b" mode, so that
+    new blocks can be written after the last block. The blocks are not read.
+
+    Returns
+    -------
+    entries : list of (offset, start, span, record) of the blocks, None
+    for a file without index (a single block)
+    """
+    entries = read_index(file)
+    if entries is None:
+        #the end record is the last byte of a file without index
+        file.seek(0, 2)
+        offset = file.tell()
+    else:
+        file.seek(-INDEX_FOOTER.size, 2)
+        offset, magic = INDEX_FOOTER.unpack(file.read(INDEX_FOOTER.size))
+    if offset < 1:
+        raise ValueError("Corrupted compressed file")
+    file.seek(offset - 1)
+    if file.read(1) != bytes((RECORD_END,)):
+        raise ValueError("Corrupted compressed file")
+    file.seek(offset - 1)
+    file.truncate()
+    return entries
+
+
+
+def iter_blocks(file, flags=0, shared=None):
+    """
+    This function yields the blocks of a compressed file one by one,
+    the header must have been read before.
+    """
+    block = read_block(file, flags, shared)
+    while block is not None:
+        yield block
+        block = read_block(file, flags, shared)
+
+
+
+def is_legacy(data):
+    """
+    This function returns True if the content of a file is in the former
+    format : a json dictionnary line followed by utf-8 characters.
+    """
+    return not data.startswith(MAGIC)
+
+
+
+def read_legacy(data):
+    """
+    This function reads the content of a file in the former format.
+
+    Returns
+    -------
+    container : dictionnary with a single block containing the codes,
+    padding and packed bits
+    """
+    text = data.decode("utf-8")
+    head, _, comp_seq = text.partition("\n")
+    codes = json.loads(head)
+    if not isinstance(codes, dict) or "add" not in codes:
+        raise ValueError("This file is not a compressed file")
+    padding = int(codes.pop("add"))
+    block = {"codes": codes, "code_lengths": None, "padding": padding,
+             "length": None, "payload": comp_seq.encode("latin-1")}
+    return {"version": 0, "flags": 0, "block_size": 0, "blocks": [block]}
+
+
+
+def open_container(file, table_dir=None):
+    """
+    This function reads the header of a compressed file opened in binary
+    mode. The blocks of a file in the binary format are then read one by
+    one from the file, the files of the former format are read at once.
+    The shared code table of the file is looked for in table_dir, then
+    next to the file and in its parent directories.
+
+    Returns
+    -------
+    header : dictionnary with the version, flags, block size and the code
+    lengths of the shared table ("shared", None without table)
+    blocks : iterator over the blocks of the file
+    """
+    start = file.read(HEADER.size)
+    if is_legacy(start):
+        container = read_legacy(start + file.read())
+        return container, iter(container.pop("blocks"))
+    file.seek(0)
+    header = read_header(file)
+    header["shared"] = None
+    if header["table"] is not None:
+        header["shared"] = find_table(header["table"], table_directories(file, table_dir))
+    return header, iter_blocks(file, header["flags"], header["shared"])
+
+
+
+def read_container(path):
+    """
+    This function reads a compressed file, in the binary format or in
+    the former format.
+
+    Returns
+    -------
+    container : dictionnary with the version, flags, block size and the
+    list of blocks, each block containing its code lengths (or its codes
+    for the former format), padding, length and packed bits
+    """
+    with open(path, "rb") as file:
+        container, blocks = open_container(file)
+        container["blocks"] = list(blocks)
+    return container
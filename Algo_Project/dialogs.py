@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+dialogs script gives access to the tkinter dialog windows,
+tkinter is only imported when a dialog window is opened so the
+algorithms can be used without a graphical interface
+"""
+
+import importlib
+
+
+class LazyModule():
+    """
+    A class loading a module the first time one of its attributes is used.
+
+    Attributes
+    ----------
+    name : name of the module
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attribute):
+        module = importlib.import_module(self.name)
+        return getattr(module, attribute)
+
+    def __str__(self):
+        return 'LazyModule(%s)' % self.name
+
+
+
+filedialog = LazyModule("tkinter.filedialog")
+messagebox = LazyModule("tkinter.messagebox")
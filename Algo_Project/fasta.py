@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fasta script contains the reading of sequence files : plain text files,
+FASTA and FASTQ files with one or several records.
+The files are memory-mapped and the letters are checked by pieces
+with bytes.translate, so a whole file never needs to be kept in memory.
+"""
+
+from instrument import traced
+from contextlib import contextmanager
+import mmap
+import os
+
+
+#letters accepted in a sequence, in upper case and lower case (soft-masked)
+VALID = b"ACGNT"
+VALID_MASKED = VALID + VALID.lower()
+#characters deleted from the sequence lines
+BLANKS = b" \t\r\n"
+#characters of the qualities of a FASTQ file (Phred scores from ! to ~)
+QUALITIES = bytes(range(ord("!"), ord("~") + 1))
+#number of letters of the pieces given by iter_chunks
+CHUNK_SIZE = 1 << 16
+
+
+@traced("validation")
+def clean_sequence(data, keep_case=False):
+    """
+    This function deletes the blanks and line breaks of a piece of sequence
+    and checks all its letters at once.
+
+    Parameters
+    ----------
+    data : piece of sequence (bytes)
+    keep_case : if True the lower case letters (soft-masked bases) are kept,
+    else the sequence is converted in upper case
+
+    Returns
+    -------
+    data : the cleaned piece of sequence (bytes)
+
+    Raises
+    ------
+    ValueError : if the sequence contains another letter than ("ACGNT")
+    """
+    data = data.translate(None, BLANKS)
+    if not keep_case:
+        data = data.upper()
+    invalid = data.translate(None, VALID_MASKED if keep_case else VALID)
+    if invalid:
+        raise ValueError("Your file not contain only DNA (letter %r)" % chr(invalid[0]))
+    return data
+
+
+
+@contextmanager
+def map_file(file):
+    """
+    This function maps a file in memory in read-only mode, the pages of
+    the file are loaded by the system when they are read.
+
+    Returns
+    -------
+    data : mmap of the file (bytes-like), empty bytes for an empty file
+    """
+    with open(file, "rb") as open_file:
+        if os.fstat(open_file.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(open_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield data
+
+
+
+@contextmanager
+def map_output(file, size):
+    """
+    This function creates a file of size bytes and maps it in memory,
+    so the result of a transformation can be written directly in the file.
+
+    Returns
+    -------
+    data : writable mmap of the file, empty bytearray for a size of 0
+    (the file is removed if an error occurs)
+    """
+    try:
+        with open(file, "w+b") as open_file:
+            if size == 0:
+                yield bytearray()
+                return
+            open_file.truncate(size)
+            with mmap.mmap(open_file.fileno(), size) as data:
+                yield data
+                data.flush()
+    except BaseException:
+        #no partial file is left when the transformation fails
+        os.remove(file)
+        raise
+
+
+
+def detect_format(file):
+    """
+    This function returns the format of a sequence file from its first
+    character : "fasta" (>), "fastq" (@) or "text".
+    """
+    with open(file, "rb") as open_file:
+        for line in open_file:
+            line = line.strip()
+            if line:
+                if line.startswith(b">"):
+                    return "fasta"
+                if line.startswith(b"@"):
+                    return "fastq"
+                return "text"
+    return "text"
+
+
+
+def iter_chunks(file, keep_case=False, chunk_size=CHUNK_SIZE):
+    """
+    This function reads a sequence file and yields its sequences by pieces
+    of about chunk_size letters, with the record they belong to.
+    The qualities of a FASTQ file are read and checked (characters ! to ~,
+    as many as the letters of the sequence) but not returned.
+
+    Parameters
+    ----------
+    file : path of a text, FASTA or FASTQ file
+    keep_case : if True the lower case letters (soft-masked bases) are kept
+    chunk_size : number of letters of the pieces
+
+    Returns
+    -------
+    generator of (record number, record name, piece of sequence), the name
+    is None for a text file
+
+    Raises
+    ------
+    ValueError : if a letter or a quality is invalid, or if a record has
+    no sequence (the compressed files cannot keep an empty record)
+    """
+    file_format = detect_format(file)
+    with map_file(file) as data:
+        if file_format == "text":
+            #a single sequence : the pieces are cut directly in the mapped file
+            for start in range(0, len(data), chunk_size):
+                chunk = clean_sequence(data[start:start + chunk_size], keep_case)
+                if chunk:
+                    yield 0, None, chunk
+            return
+
+        number = -1
+        name = None
+        lines = []
+        size = 0
+        quality = 0
+        in_quality = False
+        #number of letters of the current record
+        letters = 0
+
+        for line in iter(data.readline, b""):
+            if file_format == "fastq" and in_quality:
+                #quality lines until they are as long as the sequence
+                qualities = line.strip()
+                if qualities.translate(None, QUALITIES):
+                    raise ValueError("Invalid quality character in the record " + name)
+                quality -= len(qualities)
+                if quality < 0:
+                    raise ValueError("The qualities of the record " + name
+                                     + " are longer than its sequence")
+                in_quality = quality > 0
+                continue
+
+            start = line[:1]
+            if (file_format == "fasta" and start == b">") or \
+               (file_format == "fastq" and start == b"@"):
+                if lines:
+                    chunk = clean_sequence(b"".join(lines), keep_case)
+                    letters += len(chunk)
+                    yield number, name, chunk
+                if number >= 0 and not letters:
+                    raise ValueError("The record " + name + " has no sequence")
+                number += 1
+                name = line[1:].strip().decode("utf-8", "replace")
+                lines = []
+                size = 0
+                quality = 0
+                letters = 0
+            elif file_format == "fastq" and start == b"+":
+                if lines:
+                    chunk = clean_sequence(b"".join(lines), keep_case)
+                    letters += len(chunk)
+                    yield number, name, chunk
+                lines = []
+                size = 0
+                in_quality = quality > 0
+            else:
+                if number < 0:
+                    raise ValueError("The sequence file does not start with a header")
+                lines.append(line)
+                size += len(line)
+                quality += len(line.strip())
+                if size >= chunk_size:
+                    chunk = clean_sequence(b"".join(lines), keep_case)
+                    letters += len(chunk)
+                    yield number, name, chunk
+                    lines = []
+                    size = 0
+
+        if in_quality:
+            raise ValueError("The qualities of the record " + name
+                             + " are shorter than its sequence")
+        if lines:
+            chunk = clean_sequence(b"".join(lines), keep_case)
+            letters += len(chunk)
+            yield number, name, chunk
+        if number >= 0 and not letters:
+            raise ValueError("The record " + name + " has no sequence")
+
+
+
+def load_sequence(file, keep_case=False):
+    """
+    This function reads the sequences of a text, FASTA or FASTQ file
+    joined in a single buffer, without intermediate string copies.
+
+    Returns
+    -------
+    sequence : bytearray of the checked letters
+    """
+    sequence = bytearray()
+    for number, name, chunk in iter_chunks(file, keep_case):
+        sequence += chunk
+    return sequence
+
+
+
+def read_records(file, keep_case=False):
+    """
+    This function reads the records of a sequence file one by one.
+
+    Returns
+    -------
+    generator of (name, sequence), with the file name for a text file
+    """
+    current = None
+    name = None
+    pieces = []
+    for number, record_name, chunk in iter_chunks(file, keep_case):
+        if number != current:
+            if current is not None:
+                yield name, b"".join(pieces).decode("ascii")
+            current = number
+            name = record_name
+            pieces = []
+        pieces.append(chunk)
+    if current is not None:
+        if name is None:
+            name = os.path.splitext(os.path.basename(file))[0]
+        yield name, b"".join(pieces).decode("ascii")
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+fm_index script contains the FM-index built from a bwt sequence,
+it allows to count and locate a pattern with a backward search
+without reconstructing the original sequence
+"""
+
+from array import array
+import os
+import struct
+import sys
+
+
+#identifier and version written at the start of an index file
+MAGIC = b"FMI1"
+VERSION = 1
+HEADER = struct.Struct("<4sBQIIB")
+
+
+def _write_array(file, values):
+    """
+    This function writes an array of 64 bits integers in little endian.
+    """
+    values = array("q", values)
+    if sys.byteorder == "big":
+        values.byteswap()
+    file.write(struct.pack("<Q", len(values)))
+    file.write(values.tobytes())
+
+
+def _read_array(file):
+    """
+    This function reads an array written by _write_array.
+    """
+    (length,) = struct.unpack("<Q", file.read(8))
+    values = array("q")
+    values.frombytes(file.read(8 * length))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+
+class FMIndex():
+    """
+    A class corresponding to the FM-index of a bwt sequence.
+
+    Attributes
+    ----------
+    bwt : the bwt sequence as bytes (containing a single $)
+    occ_step : distance between two occurrence checkpoints
+    sa_step : distance between two sampled positions of the sequence
+    c_array : dictionnary letter -> first row of the letter in the sorted matrix
+    checkpoints : dictionnary letter -> occurrences before each checkpoint
+    marks : 1 for the rows whose suffix array value is sampled, else 0
+    mark_ranks : number of marked rows before each checkpoint
+    samples : sampled suffix array values, in the order of the rows
+    """
+    def __init__(self, bwt, sa=None, occ_step=64, sa_step=32):
+        if isinstance(bwt, str):
+            bwt = bwt.encode("ascii")
+        bwt = bytes(bwt)
+        if bwt.count(b"$") != 1:
+            raise ValueError("The bwt sequence must contain a single $")
+
+        self.bwt = bwt
+        self.occ_step = occ_step
+        self.sa_step = sa_step
+        n = len(bwt)
+
+        #C-array
+        self.c_array = {}
+        total = 0
+        for letter in sorted(set(bwt)):
+            self.c_array[letter] = total
+            total += bwt.count(letter)
+
+        #occurrences of each letter before every occ_step positions
+        self.checkpoints = {}
+        for letter in self.c_array:
+            counts = array("q", [0])
+            for start in range(0, n, occ_step):
+                counts.append(counts[-1] + bwt.count(letter, start, start + occ_step))
+            self.checkpoints[letter] = counts
+
+        #sampled suffix array : the position of every sa_step letters
+        positions = sa if sa is not None else self._suffix_positions()
+        self.marks = bytearray(n)
+        self.samples = array("q")
+        for row, position in enumerate(positions):
+            if position % sa_step == 0:
+                self.marks[row] = 1
+                self.samples.append(position)
+        self.mark_ranks = array("q", [0])
+        for start in range(0, n, occ_step):
+            self.mark_ranks.append(self.mark_ranks[-1]
+                                   + self.marks.count(1, start, start + occ_step))
+
+    def _suffix_positions(self):
+        """
+        This function rebuilds the suffix array from the bwt alone by
+        following the LF-mapping from the row starting with the $.
+        """
+        n = len(self.bwt)
+        running = dict(self.c_array)
+        lf = array("q", bytes(8 * n))
+        for row, letter in enumerate(self.bwt):
+            lf[row] = running[letter]
+            running[letter] += 1
+
+        sa = array("q", bytes(8 * n))
+        row = 0
+        for position in range(n - 1, -1, -1):
+            sa[row] = position
+            row = lf[row]
+        return sa
+
+    def __len__(self):
+        return len(self.bwt)
+
+    def occ(self, letter, row):
+        """
+        This function returns the number of letter in bwt[:row].
+        """
+        counts = self.checkpoints.get(letter)
+        if counts is None:
+            return 0
+        block = row // self.occ_step
+        start = block * self.occ_step
+        return counts[block] + self.bwt.count(letter, start, row)
+
+    def lf(self, row):
+        """
+        This function returns the row starting with the last letter of row.
+        """
+        letter = self.bwt[row]
+        return self.c_array[letter] + self.occ(letter, row)
+
+    def backward_search(self, pattern):
+        """
+        This function finds the rows of the sorted matrix starting with
+        the pattern, reading the pattern from its end.
+
+        Returns
+        -------
+        top, bottom : the rows starting with the pattern are top to bottom - 1
+        """
+        if isinstance(pattern, str):
+            pattern = pattern.upper().encode("ascii")
+        top, bottom = 0, len(self.bwt)
+        for letter in reversed(pattern):
+            if letter not in self.c_array:
+                return 0, 0
+            top = self.c_array[letter] + self.occ(letter, top)
+            bottom = self.c_array[letter] + self.occ(letter, bottom)
+            if top >= bottom:
+                return 0, 0
+        return top, bottom
+
+    def count(self, pattern):
+        """
+        This function returns the number of occurrences of the pattern.
+        """
+        top, bottom = self.backward_search(pattern)
+        return bottom - top
+
+    def locate(self, pattern):
+        """
+        This function returns the sorted positions of the pattern
+        in the original sequence (starting at 0).
+        """
+        top, bottom = self.backward_search(pattern)
+        positions = []
+        for row in range(top, bottom):
+            steps = 0
+            #go back in the sequence until a sampled position
+            while not self.marks[row]:
+                row = self.lf(row)
+                steps += 1
+            block = row // self.occ_step
+            rank = self.mark_ranks[block] + self.marks.count(1, block * self.occ_step, row)
+            positions.append(self.samples[rank] + steps)
+        return sorted(positions)
+
+    def save(self, path):
+        """
+        This function saves the index in a binary file.
+        """
+        letters = bytes(sorted(self.c_array))
+        with open(path, "wb") as file:
+            file.write(HEADER.pack(MAGIC, VERSION, len(self.bwt), self.occ_step,
+                                   self.sa_step, len(letters)))
+            file.write(letters)
+            _write_array(file, [self.c_array[letter] for letter in letters])
+            file.write(self.bwt)
+            for letter in letters:
+                _write_array(file, self.checkpoints[letter])
+            file.write(self.marks)
+            _write_array(file, self.mark_ranks)
+            _write_array(file, self.samples)
+
+    @classmethod
+    def load(cls, path):
+        """
+        This function loads an index saved with save.
+        """
+        index = cls.__new__(cls)
+        with open(path, "rb") as file:
+            magic, version, n, occ_step, sa_step, n_letters = \
+                HEADER.unpack(file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(path + " is not a FM-index file")
+            letters = file.read(n_letters)
+            index.c_array = dict(zip(letters, _read_array(file)))
+            index.bwt = file.read(n)
+            index.checkpoints = {letter: _read_array(file) for letter in letters}
+            index.marks = bytearray(file.read(n))
+            index.mark_ranks = _read_array(file)
+            index.samples = _read_array(file)
+        index.occ_step = occ_step
+        index.sa_step = sa_step
+        return index
+
+    def __str__(self):
+        return 'FMIndex(%d letters)' % len(self.bwt)
+
+
+
+def index_path(bwt_file):
+    """
+    This function returns the path of the index saved next to a bwt file,
+    example : sequence_bwt.txt -> sequence_bwt.fmi
+    """
+    return os.path.splitext(bwt_file)[0] + ".fmi"
+
+
+
+def save_index(bwt, bwt_file, sa=None):
+    """
+    This function builds the FM-index of a bwt sequence and saves it
+    next to the bwt file.
+
+    Returns
+    -------
+    index : the FM-index
+    """
+    index = FMIndex(bwt, sa)
+    index.save(index_path(bwt_file))
+    return index
+
+
+
+def load_index(bwt_file):
+    """
+    This function loads the FM-index saved next to a bwt file,
+    or builds and saves it if it does not exist yet.
+
+    Returns
+    -------
+    index : the FM-index
+    """
+    path = index_path(bwt_file)
+    if os.path.exists(path):
+        return FMIndex.load(path)
+    with open(bwt_file, "r") as file:
+        bwt = file.read().replace("\n", "")
+    return save_index(bwt, bwt_file)
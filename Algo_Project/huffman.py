@@ -6,12 +6,26 @@ to the Huffman Compression
 """
 
 from burrows_wheeler_transform import * 
-import json
-
-from tkinter import filedialog, messagebox
+from bitstream import encode_symbols, numpy_available, pack_string, unpack_string
+from cache import content_hash, get_cache
+from container import FLAG_BWT, pack_code_lengths, read_container, unpack_code_lengths
+from instrument import second_size, traced
+from rans import rans_decode
+from stages import undo_stages
+
+from dialogs import filedialog, messagebox
+import heapq
+import math
 import os
 
 
+#backend of the bit packing : "numpy" (lookup arrays and np.packbits) when
+#NumPy is installed, else "python" (str.translate and int conversions)
+BIT_BACKEND = "numpy" if numpy_available() else "python"
+#a code is reused for a sequence if it codes it with at most 15 % more bits than its entropy
+REUSE_TOLERANCE = 0.15
+
+
 class NodeTree():
     """
     A class corresponding to nodes of a huffman coding tree.
@@ -62,6 +76,327 @@ def huffman_code_tree(node, left=True, binString=''):
 
 
 
+def code_lengths(huffman_code):
+    """
+    This function returns the length of the binary code of each letter,
+    a letter alone in the sequence gets a code of length 1.
+    """
+    return {letter: max(len(code), 1) for letter, code in huffman_code.items()}
+
+
+
+def canonical_code(lengths):
+    """
+    This function assigns the canonical Huffman codes from the code lengths :
+    letters are sorted by code length then by letter, and each code is
+    the previous code plus one, shifted to the new length.
+    Only the lengths are then needed to rebuild the codes.
+
+    Parameters
+    ----------
+    lengths : dictionnary letter -> length of its code
+
+    Returns
+    -------
+    huffman_code : dictionnary letter -> binary code
+    """
+    huffman_code = {}
+    code = 0
+    previous = 0
+    for letter, length in sorted(lengths.items(), key=lambda x: (x[1], x[0])):
+        code <<= length - previous
+        huffman_code[letter] = format(code, "0%db" % length)
+        code += 1
+        previous = length
+    return huffman_code
+
+
+
+@traced("pack_bits", second_size)
+def pack_bits(binary_seq):
+    """
+    This function adds zeros at the end of a binary string so that it is
+    coded on 8 bits, and converts it in bytes.
+
+    Returns
+    -------
+    added : the number of zeros added
+    packed : the bytes
+    """
+    if BIT_BACKEND == "numpy":
+        return pack_string(binary_seq)
+    added = -len(binary_seq) % 8
+    binary_seq += "0" * added
+    if not binary_seq:
+        return added, b""
+    return added, int(binary_seq, 2).to_bytes(len(binary_seq) // 8, "big")
+
+
+
+def unpack_bits(packed, added=0):
+    """
+    This function converts bytes in a binary string and removes
+    the zeros added at the end.
+    """
+    if not packed:
+        return ""
+    if BIT_BACKEND == "numpy":
+        return unpack_string(packed, added)
+    bin_str = format(int.from_bytes(packed, "big"), "0%db" % (8 * len(packed)))
+    return bin_str[:len(bin_str) - added]
+
+
+
+class PackedBits():
+    """
+    A class giving a read-only view of packed bytes as a binary string,
+    the bits are only converted in characters when a slice is read.
+
+    Attributes
+    ----------
+    packed : the bytes
+    added : the number of zeros added at the end of the bits
+    """
+    def __init__(self, packed, added=0):
+        self.packed = packed
+        self.added = added
+
+    def __len__(self):
+        return 8 * len(self.packed) - self.added if self.packed else 0
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            index = slice(index, index + 1 if index != -1 else None)
+        start, stop, step = index.indices(len(self))
+        if stop <= start:
+            return ""
+        bits = unpack_bits(self.packed[start // 8:(stop + 7) // 8])
+        offset = start - start % 8
+        return bits[start - offset:stop - offset:step]
+
+    def __str__(self):
+        return unpack_bits(self.packed, self.added)
+
+
+
+def decoding_table(huffman_code):
+    """
+    This function builds the table decoding a whole byte at once.
+    The states are the internal nodes of the code tree (0 is the root),
+    for each state and each byte the table gives the decoded letters
+    and the state reached after the 8 bits.
+
+    Parameters
+    ----------
+    huffman_code : dictionnary letter -> binary code
+
+    Returns
+    -------
+    table : list of (letters, next state * 256) for index state * 256 + byte,
+    letters is None if the bits are not a valid code
+    children : the code tree, children[node] = [child 0, child 1] where
+    a child is a node number, a letter or None
+    """
+    #construction of the code tree
+    children = [[None, None]]
+    for letter, code in huffman_code.items():
+        if not isinstance(code, str):
+            continue
+        node = 0
+        for bit in code[:-1]:
+            child = children[node][int(bit)]
+            if child is None:
+                children.append([None, None])
+                child = len(children) - 1
+                children[node][int(bit)] = child
+            node = child
+        children[node][int(code[-1])] = letter
+
+    table = []
+    for state in range(len(children)):
+        for byte in range(256):
+            node = state
+            letters = []
+            for shift in range(7, -1, -1):
+                child = children[node][(byte >> shift) & 1]
+                if child is None:
+                    letters = None
+                    node = 0
+                    break
+                if isinstance(child, str):
+                    letters.append(child)
+                    node = 0
+                else:
+                    node = child
+            table.append(("".join(letters) if letters is not None else None, node << 8))
+    return table, children
+
+
+
+@traced("huffman_decode")
+def decode_bits(packed, huffman_code, added=0):
+    """
+    This function decodes packed bytes with the decoding table :
+    each byte gives all the letters it contains in a single lookup,
+    only the last byte containing the zeros added is decoded bit by bit.
+
+    Parameters
+    ----------
+    packed : the compressed bytes
+    huffman_code : dictionnary letter -> binary code
+    added : the number of zeros added at the end of the bits
+
+    Returns
+    -------
+    dna_seq : the decoded sequence
+    """
+    if not packed:
+        return ""
+    table, children = decoding_table(huffman_code)
+
+    parts = []
+    append = parts.append
+    state = 0
+    for byte in memoryview(packed)[:-1]:
+        letters, state = table[state | byte]
+        append(letters)
+
+    #last byte without the zeros added
+    node = state >> 8
+    last = packed[-1]
+    for shift in range(7, added - 1, -1):
+        child = children[node][(last >> shift) & 1]
+        if child is None:
+            append(None)
+            break
+        if isinstance(child, str):
+            append(child)
+            node = 0
+        else:
+            node = child
+
+    if None in parts or node != 0:
+        raise ValueError("The compressed sequence does not match its codes")
+    return "".join(parts)
+
+
+
+@traced("huffman_tree")
+def huffman_tree_code(seq):
+    """
+    This function calculate the frequency for each items of the sequence, 
+    and build the tree according to these frequencies with a heap :
+    the two nodes with the lowest frequencies are merged until one remains.
+    Ties are broken by the order of creation of the nodes so the codes
+    are the same on every run.
+
+    Returns
+    -------
+    huffman_code : dictionnary letter -> canonical binary code
+    """
+    # Calculating frequency
+    freq = {letter: seq.count(letter) for letter in sorted(set(seq))}
+
+    nodes = [(count, order, letter) for order, (letter, count) in enumerate(freq.items())]
+    heapq.heapify(nodes)
+    order = len(nodes)
+    while len(nodes) > 1:
+        (c1, _, key1) = heapq.heappop(nodes)
+        (c2, _, key2) = heapq.heappop(nodes)
+        node = NodeTree(key1, key2)
+        heapq.heappush(nodes, (c1 + c2, order, node))
+        order += 1
+
+    #canonical codes with the lengths of the tree codes
+    return canonical_code(code_lengths(huffman_code_tree(nodes[0][2])))
+
+
+
+@traced("huffman_encode", second_size)
+def encode_sequence(seq, huffman_code, chunk=1 << 20):
+    """
+    This function encodes a sequence with a lookup table giving the code
+    of each letter, and packs the bits in bytes chunk by chunk.
+
+    Parameters
+    ----------
+    seq : the sequence to be compressed
+    huffman_code : dictionnary letter -> binary code
+    chunk : number of letters encoded at once
+
+    Returns
+    -------
+    added : the number of zeros added at the end of the bits
+    packed : the packed bits (bytes)
+    """
+    if BIT_BACKEND == "numpy":
+        return encode_symbols(seq, huffman_code)
+    table = str.maketrans(huffman_code)
+    packed = bytearray()
+    remainder, remainder_length = 0, 0
+    for start in range(0, len(seq), chunk):
+        bits = seq[start:start + chunk].translate(table)
+        value = int(bits, 2) | (remainder << len(bits))
+        length = len(bits) + remainder_length
+        #keep the bits which do not fill a whole byte for the next chunk
+        remainder_length = length % 8
+        packed += (value >> remainder_length).to_bytes(length // 8, "big")
+        remainder = value & ((1 << remainder_length) - 1)
+    added = -remainder_length % 8
+    if remainder_length:
+        packed.append(remainder << added)
+    return added, bytes(packed)
+
+
+
+def cached_huffman_code(seq):
+    """
+    This function returns the canonical Huffman codes of a sequence,
+    the code lengths are read from the cache when the sequence was
+    already compressed (if the cache is enabled).
+    """
+    store = get_cache()
+    if store is None:
+        return huffman_tree_code(seq)
+    key = store.key(content_hash(seq), "huffman")
+    data = store.get(key)
+    if data is not None:
+        return canonical_code(unpack_code_lengths(data, 0)[0])
+    huffman_code = huffman_tree_code(seq)
+    store.put(key, pack_code_lengths(code_lengths(huffman_code)))
+    return huffman_code
+
+
+
+def compatible_code(seq, lengths, tolerance=REUSE_TOLERANCE):
+    """
+    This function checks if the code of another sequence (for example the
+    last block of a compressed file) can code a sequence : every letter
+    must have a code and the coded sequence must not be longer than
+    (1 + tolerance) times the entropy of the sequence.
+
+    Parameters
+    ----------
+    seq : the sequence to be compressed
+    lengths : dictionnary letter -> length of its canonical code
+
+    Returns
+    -------
+    huffman_code : the canonical codes of the lengths, None if they are
+    not compatible with the sequence
+    """
+    counts = {letter: seq.count(letter) for letter in set(seq)}
+    if not counts or any(letter not in lengths for letter in counts):
+        return None
+    total = len(seq)
+    entropy = -sum(count * math.log2(count / total) for count in counts.values())
+    bits = sum(count * lengths[letter] for letter, count in counts.items())
+    if bits > (1 + tolerance) * entropy + 8:
+        return None
+    return canonical_code(lengths)
+
+
+
 def huffman_construction(seq) : 
     """
     This function calculate the frequency for each items of the sequence, 
@@ -74,40 +409,15 @@ def huffman_construction(seq) :
     Returns
     -------
     huffman_code = the dictionnary containing binary coding 
-    binary_seq = the binary sequence code 
+    binary_seq = the binary sequence code, as a view of the packed bytes
 
     """
-    # Calculating frequency
-    freq = {}
-    for c in seq:
-        if c in freq:
-            freq[c] += 1
-        else:
-            freq[c] = 1
-
-    freq = sorted(freq.items(), key=lambda x: x[1], reverse=True)
-    nodes = freq
+    huffman_code = cached_huffman_code(seq)
 
-    while len(nodes) > 1:
-        (key1, c1) = nodes[-1]
-        (key2, c2) = nodes[-2]
-        nodes = nodes[:-2]
-        node = NodeTree(key1, key2)
-        nodes.append((node, c1 + c2))
-        nodes = sorted(nodes, key=lambda x: x[1], reverse=True)
-
-    huffman_code = huffman_code_tree(nodes[0][0])
-
-    #construction of the binary sequence code
-    #for each items of the sequence we search the corresponding code 
-    #in the dictionnary example : {"T":001}
-    #and add the corresponding code in a list and join it 
-    binary_list= []
-    for element in seq:
-        for key in huffman_code.keys():
-            if element == key:
-                binary_list += huffman_code[key]
-                binary_seq ="".join(binary_list)
+    #construction of the binary sequence code with the lookup table
+    #of the codes example : {"T":001}
+    added, packed = encode_sequence(seq, huffman_code)
+    binary_seq = PackedBits(packed, added)
 
     return huffman_code, binary_seq
 
@@ -122,25 +432,18 @@ def binary_conversion():
     Returns
     -------
     added : the number of zeros added at the end of the binary sequence
-    binary_seq : the resulting binary sequence
+    binary_seq : the resulting binary sequence, as a view of the packed bytes
     seq : the sequence to be compressed
     file : file path of the file containing the sequence
     """
     file = filedialog.askopenfilename(title="Select a txt ",filetypes=[("Text file", ".txt")])
     if os.stat(file).st_size != 0:
-        open_file = open(file, "r")
-        seq = ""
-        for line in open_file :
-            seq += line
-            seq = seq.strip("\n")
+        seq = read_sequence(file)
             
         huffman_code, binary_seq = huffman_construction(seq)
-        #count the number of "0" added
-        added = 0 
-        while len(binary_seq) % 8 !=0:
-            added +=1 
-            binary_seq += '0'
-        open_file.close()
+        #the number of "0" added is kept in the binary sequence
+        added = binary_seq.added
+        binary_seq = PackedBits(binary_seq.packed)
         
     else :
         messagebox.showwarning("Error", "Your file is empty ")
@@ -164,22 +467,61 @@ def binary_to_utf8():
     """
     added, binary_seq, seq, file = binary_conversion()
     
-    comp_seq = ""
-    for bit in range(0, len(binary_seq), 8):
-        #cut the sequence each 8 bits
-        byte = binary_seq[bit:bit+8]
-        code = int(byte, 2)
-        #transforms 8 bits into a single character coded in utf-8
-        comp_seq += chr(code)
+    #transforms each 8 bits into a single character
+    comp_seq = binary_seq.packed.decode("latin-1")
 
     return added, comp_seq, binary_seq, seq, file
 
 
 
+def compress_path(file, bwt):
+    """
+    This function compresses a file with streaming.compress_file, so the
+    file has the same format as the files of the command line (checksums
+    and block index), and reads its blocks back for the display.
+
+    Returns
+    -------
+    seq : the sequence given to the Huffman compression (the bwt with bwt)
+    binary_seq : the packed bits, as a binary string
+    comp_seq : the compressed sequence
+    created_file : path of the compressed file
+    """
+    #streaming imports this script, it is only imported to write the file
+    from streaming import compress_file
+    if os.stat(file).st_size == 0:
+        raise ValueError("Your file is empty")
+    #the letters of a compressed sequence are kept as they are
+    created_file = compress_file(file, bwt=bwt, keep_case=not bwt)
+    blocks, comp_seq = read_compressed_path(created_file)
+    seq = "".join(decode_block(block) for block in blocks)
+    binary_seq = PackedBits(comp_seq.encode("latin-1"), int(blocks[-1]["padding"]))
+    return seq, binary_seq, comp_seq, created_file
+
+
+
+def save_compression_path(file):
+    """
+    This function compresses the sequence of a file and saves the code
+    lengths and the compressed sequence in a binary file ending
+    with _compressed.txt (see compress_path)
+
+    Returns
+    -------
+    comp_seq : the compressed sequence 
+    binary_seq : the sequence coded by a binary string 
+    seq : the original sequencen not compressed
+    created_file : path of the compressed file
+    """
+    seq, binary_seq, comp_seq, created_file = compress_path(file, False)
+    return comp_seq, binary_seq, seq, created_file
+
+
+
 def save_compression(): 
     """
-    This function allows to save the dictionnary and the compressed sequence 
-    in a file ending with _compressed.txt
+    This function allows to save the code lengths and the compressed sequence 
+    of a file chosen in a dialog window (see save_compression_path)
 
     Returns
     -------
@@ -187,27 +529,39 @@ def save_compression():
     binary_seq : the sequence coded by a binary string 
     seq : the original sequencen not compressed
     """
-    added,comp_seq, binary_seq, seq, file = binary_to_utf8()
-    huffman_code, binary_seq = huffman_construction(seq)
-    
-    #save the number of zeroes added to the dictionnary 
-    huffman_code["add"]= added
-    created_file = os.path.splitext(file)[0]
-    file_comp = open(created_file + "_compressed.txt", "w") 
-    
-    #save the dictionnary in the file and the compressed sequence
-    json.dump(huffman_code, file_comp)
-    file_comp.write("\n"+comp_seq) 
-    file_comp.close()
+    file = filedialog.askopenfilename(title="Select a txt ",filetypes=[("Text file", ".txt")])
+    try:
+        comp_seq, binary_seq, seq, created_file = save_compression_path(file)
+    except (OSError, ValueError) as error:
+        messagebox.showwarning("Error", str(error))
+        return False
     
-    messagebox.showinfo("Information", "Your compression has been saved in "+created_file +"_compressed.txt file.")
+    messagebox.showinfo("Information", "Your compression has been saved in "+created_file +" file.")
     return comp_seq, binary_seq, seq
 
 
 
+def bwt_binary_conversion_path(file):
+    """
+    This function performs the bwt of the sequence of a file and its
+    compression, saved in a binary file ending with _bwt_compressed.txt
+    (see compress_path)
+
+    Returns
+    -------
+    seq : The bwt sequence
+    binary_seq : the sequence coded by a binary string 
+    comp_seq : the compressed sequence 
+    created_file : path of the compressed file
+    """
+    return compress_path(file, True)
+
+
+
 def bwt_binary_conversion():
     """
     This function allows to perform the bwt algorithm and a compression
+    of a file chosen in a dialog window (see bwt_binary_conversion_path)
 
     Returns
     -------
@@ -215,69 +569,63 @@ def bwt_binary_conversion():
     binary_seq : the sequence coded by a binary string 
     comp_seq : the compressed sequence 
     """
-    #call bwt function
-    sequence,bwt_pattern, file, seq_list = transform()
-    seq = bwt_pattern
-    #retrieve the dictionnary containing binary code and the binary sequence
-    huffman_code, binary_seq = huffman_construction(seq)
-    
-    #add zeroes
-    added = 0 
-    while len(binary_seq) % 8 !=0:
-        added +=1 
-        binary_seq += '0'
+    file = filedialog.askopenfilename(title="Select a txt file",\
+                                      filetypes=[("Text file", ".txt")])
+    try:
+        seq, binary_seq, comp_seq, created_file = bwt_binary_conversion_path(file)
+    except (OSError, ValueError) as error:
+        messagebox.showwarning("Error", str(error))
+        return False
     
-    #convert binary sequence in utf-8 sequence
-    comp_seq = ""
-    for bit in range(0, len(binary_seq), 8):
-        byte = binary_seq[bit:bit+8]
-        code = int(byte, 2)
-        comp_seq += chr(code)
-    
-    #save the number of zeroes added 
-    huffman_code["add"]= added
-    
-    #save the dictionnary in the file and the compressed sequence
-    created_file = os.path.splitext(file)[0]
-    file_comp = open(created_file + "_bwt_compressed.txt", "w") 
-    json.dump(huffman_code, file_comp)
-    file_comp.write("\n"+comp_seq) 
-    
-    file_comp.close()
-    
-    messagebox.showinfo("Information", "Your compression has been saved in "+created_file +"_bwt_compressed.txt file.")
+    messagebox.showinfo("Information", "Your compression has been saved in "+created_file +" file.")
     
     return seq, binary_seq, comp_seq
 
 
 
+def read_compressed_path(file_comp):
+    """
+    This function reads a file containing a compressed sequence, 
+    and retrieves its blocks and the compressed sequence.
+    Files in the former format (json dictionnary and utf-8 characters)
+    are still accepted.
+
+    Returns
+    -------
+    blocks : the list of compressed blocks, with their dictionnary
+    containing binary coding in "codes"
+    comp_seq : the compressed sequence
+    """
+    if os.stat(file_comp).st_size == 0:
+        raise ValueError("Your file is empty")
+    container = read_container(file_comp)
+    blocks = container["blocks"]
+    #rebuild the canonical codes from the code lengths
+    #and keep the stages applied before the compression
+    for block in blocks:
+        if block["codes"] is None and block["code_lengths"] is not None:
+            block["codes"] = canonical_code(block["code_lengths"])
+        block["flags"] = container["flags"]
+    comp_seq = b"".join(block["payload"] for block in blocks).decode("latin-1")
+    return blocks, comp_seq
+
+
+
 def read_compressed_file():
     """
     This function read the file containing the compressed sequence, 
-    retrieve the dictionnary and the compressed sequence
+    chosen in a dialog window, retrieve the dictionnary and the compressed sequence.
 
     Returns
     -------
-    dico_binary : the dictionnary containing binary coding 
+    blocks : the list of compressed blocks, with their dictionnary
+    containing binary coding in "codes"
     comp_seq : the compressed sequence
     file_comp : the path of the file 
     """
     file_comp = filedialog.askopenfilename(title="Select a txt ",filetypes=[("Text file", ".txt")])
-
-    if os.stat(file_comp).st_size != 0:
-        file = open(file_comp, "r")
-        head = file.readline()
-        dico_binary = json.loads(head)
-        comp_seq = ""
-        for line in file :
-            comp_seq += line
-    
-        file.close()
-        
-    else :
-        messagebox.showwarning("Error", "Your file is empty ")
-        
-    return dico_binary, comp_seq, file_comp
+    blocks, comp_seq = read_compressed_path(file_comp)
+    return blocks, comp_seq, file_comp
 
 
 
@@ -287,29 +635,39 @@ def utf8_to_binary() :
 
     Returns
     -------
-    bin_seq : binary sequence
-    dico_binary : the dictionnary containing binary coding 
+    bin_seq : binary sequence, as a view of the packed bytes
+    blocks : the list of compressed blocks
     comp_seq : the compressed sequence
     file_comp : the path of the file 
     """
-    dico_binary, comp_seq, file_comp = read_compressed_file()
+    blocks, comp_seq, file_comp = read_compressed_file()
     
-    #for each items of the sequence convert it in binary string on 8 bits
-    bin_str = ""
-    for value in comp_seq:
-        code = ord(value)
-        bin_str += '{:08b}'.format(code)
-        
-    #remove the number of zeroes added 
-    
-    added = int(dico_binary["add"])
-    #if the padding is equal to 0, don't cut anathing from the sequence
-    if added == 0: 
-        bin_seq = bin_str
-    else: 
-        bin_seq = bin_str[:-added]
+    #convert each items of the sequence in binary string on 8 bits
+    #and remove the number of zeroes added to the last block
+    added = int(blocks[-1]["padding"])
+    bin_seq = PackedBits(comp_seq.encode("latin-1"), added)
     
-    return bin_seq, dico_binary, comp_seq, file_comp
+    return bin_seq, blocks, comp_seq, file_comp
+
+
+
+def decode_block(block):
+    """
+    This function decodes a compressed block read in a compressed file,
+    coded with Huffman codes or with the rANS coder.
+
+    Returns
+    -------
+    dna_seq : the sequence of the block
+    """
+    if block.get("frequencies") is not None:
+        return rans_decode(block["payload"], block["frequencies"], block["length"],
+                           block["streams"])
+    codes = block["codes"]
+    if codes is None:
+        codes = canonical_code(block["code_lengths"])
+    return decode_bits(block["payload"], codes, block["padding"])
+
 
 
 def binary_to_seq():
@@ -324,90 +682,132 @@ def binary_to_seq():
     comp_seq : the compressed sequence
     file_comp : the path of the file 
     """
-    bin_seq, dico_binary, comp_seq, file_comp = utf8_to_binary()
+    bin_seq, blocks, comp_seq, file_comp = utf8_to_binary()
     
-    #for each binary value associate the corresponding letter (key) 
-    #according to the dictionnary 
-    dna_seq = ""
-    reading_binary = ""
-    for value in bin_seq:
-        reading_binary += value
-        for letter, code in dico_binary.items():
-            if code == reading_binary:
-                dna_seq += letter
-                reading_binary = ""
-                break
+    #decode the packed bytes of each block with a table giving
+    #the letters of each byte
+    dna_seq = "".join(undo_stages(decode_block(block), block["flags"], block.get("alphabet"))
+                      for block in blocks)
     
-    #print(dna_seq, bin_seq, comp_seq, file_comp)
     return dna_seq, bin_seq, comp_seq, file_comp
 
 
 
-def save_decompression(): 
+def save_decompression_path(file_comp):
     """
-    This function saves the decompressed sequence in a new file
+    This function decompresses a compressed file and saves the decompressed
+    sequence in a new file ending with _decompressed.txt
 
     Returns
     -------
     comp_seq : the compressed sequence
     dna_seq : original sequence decompressed 
     bin_seq : binary sequence
+    created_file : path of the decompressed file
     """
-    dna_seq, bin_seq, comp_seq, file_comp = binary_to_seq()
+    blocks, comp_seq = read_compressed_path(file_comp)
+    bin_seq = PackedBits(comp_seq.encode("latin-1"), int(blocks[-1]["padding"]))
+
+    #decode the packed bytes of each block with a table giving
+    #the letters of each byte
+    dna_seq = "".join(undo_stages(decode_block(block), block["flags"], block.get("alphabet"))
+                      for block in blocks)
     
     #create a new file containing the original sequence
-    file_path = os.path.splitext(file_comp)[0]
-    file = open(file_path+ "_decompressed.txt", "w")
-    file.write(dna_seq)
-    file.close()
+    created_file = os.path.splitext(file_comp)[0] + "_decompressed.txt"
+    with open(created_file, "w") as file:
+        file.write(dna_seq)
+    return comp_seq, dna_seq, bin_seq, created_file
+
+
+
+def save_decompression(): 
+    """
+    This function saves the decompressed sequence of a compressed file
+    chosen in a dialog window in a new file (see save_decompression_path)
+
+    Returns
+    -------
+    comp_seq : the compressed sequence
+    dna_seq : original sequence decompressed 
+    bin_seq : binary sequence
+    """
+    file_comp = filedialog.askopenfilename(title="Select a txt ",filetypes=[("Text file", ".txt")])
+    try:
+        comp_seq, dna_seq, bin_seq, created_file = save_decompression_path(file_comp)
+    except (OSError, ValueError) as error:
+        messagebox.showwarning("Error", str(error))
+        return False
     
     #show a message for saving
     messagebox.showinfo("Information", "Your decompression has been saved in "
-                        +file_path+"_decompressed.txt.")
-    
-    #print(comp_seq, dna_seq, bin_seq)
+                        +created_file+".")
     return comp_seq, dna_seq, bin_seq
 
 
 
-def decompression_inversion(): 
+def decompression_inversion_path(file_comp):
     """
     This function performs a decompression followed by a bwt reconstruction
     from a file containing a bwt compressed sequence. 
-    And saves the result in a new file 
+    And saves the result in a new file ending with _decompressed_original.txt
+    with streaming.decompress_file, so the checksums of the blocks are
+    checked and the records of a FASTA/FASTQ file keep their names.
 
     Returns
     -------
     dna_seq : the sequence decompressed
     comp_seq : the compressed sequence
-    inverse_bwt : the original sequence after bwt reconstruction
+    inverse_bwt : the original sequence after bwt reconstruction (the
+    content of the created file)
+    created_file : path of the reconstructed file
+    """
+    #streaming imports this script, it is only imported to write the file
+    from streaming import decompress_file
+    blocks, comp_seq = read_compressed_path(file_comp)
+    created_file = os.path.splitext(file_comp)[0] + "_decompressed_original.txt"
+    #the blocks are checked by the decompression before being displayed
+    if blocks[0]["flags"] & FLAG_BWT:
+        decompress_file(file_comp, created_file)
+    bwt_blocks = [undo_stages(decode_block(block), block["flags"], block.get("alphabet"))
+                  for block in blocks]
+    dna_seq = "".join(bwt_blocks)
+
+    if blocks[0]["flags"] & FLAG_BWT:
+        with open(created_file) as file_inv:
+            inverse_bwt = file_inv.read()
+        return dna_seq, comp_seq, inverse_bwt, created_file
+
+    #the files of the former format have no flags : the bwt reconstruction
+    #of each block is done with the LF-mapping
+    inverse_bwt = "".join(lf_inverse(bwt) for bwt in bwt_blocks)
+    with open(created_file, "w") as file_inv:
+        file_inv.write(inverse_bwt)
+    return dna_seq, comp_seq, inverse_bwt, created_file
+
+
 
+def decompression_inversion(): 
     """
-    dna_seq, bin_seq, comp_seq, file_comp = binary_to_seq()
-    
-    #bwt reconstruction
-    table = [""] * len(dna_seq)
+    This function performs a decompression followed by a bwt reconstruction
+    from a file containing a bwt compressed sequence, chosen in a dialog
+    window (see decompression_inversion_path)
 
-    for i in range(0,len(dna_seq),1):
-        table = [dna_seq[i] + table[i] for i in range(0,len(dna_seq))]
-        table = sorted(table)
-    
-    original_seq = None 
-    for row in table : 
-        if row.endswith("$"):
-           original_seq = row
+    Returns
+    -------
+    dna_seq : the sequence decompressed
+    comp_seq : the compressed sequence
+    inverse_bwt : the original sequence after bwt reconstruction
 
-    inverse_bwt = original_seq.rstrip("$")  
-    
-    
-    #write the original sequence in a new created file 
-    file_path = os.path.splitext(file_comp)[0]
-    file_inv = open(file_path + "_decompressed_original.txt", "w") 
-    file_inv.write(inverse_bwt) 
-    file_inv.close()
+    """
+    file_comp = filedialog.askopenfilename(title="Select a txt ",filetypes=[("Text file", ".txt")])
+    try:
+        dna_seq, comp_seq, inverse_bwt, created_file = decompression_inversion_path(file_comp)
+    except (OSError, ValueError) as error:
+        messagebox.showwarning("Error", str(error))
+        return False
     
     messagebox.showinfo("Information", "Your decompressed and bwt reconstruction has been saved in " \
-                        +file_path +"_decompressed_original.txt file.")
+                        +created_file +" file.")
  
     return dna_seq, comp_seq, inverse_bwt
-   
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+instrument script contains the measure of the stages of the pipeline :
+the functions decorated with traced send a record (time, sizes in and out,
+peak allocation, symbol counts) to the hooks registered with add_hook.
+Without any hook the decorated functions are called directly, so the
+instrumentation can stay in the code at almost no cost.
+"""
+
+from contextlib import contextmanager
+from functools import wraps
+import json
+import os
+import time
+import tracemalloc
+
+
+#functions called with the record of every traced stage
+HOOKS = []
+#peaks of the traced stages being run, the last one is the innermost stage
+_peaks = []
+
+
+def add_hook(hook):
+    """
+    This function registers a function called with the record of every
+    traced stage, a record is a dictionnary with the stage name, pid,
+    start (time.time()), seconds, bytes_in, bytes_out, peak_bytes
+    (None without memory measure) and symbols (count of each letter of
+    the input sequence, None if the input is not a str or bytes).
+    """
+    HOOKS.append(hook)
+    return hook
+
+
+
+def remove_hook(hook):
+    """
+    This function unregisters a hook added with add_hook.
+    """
+    HOOKS.remove(hook)
+
+
+
+def enable_memory(enabled=True):
+    """
+    This function starts (or stops) the measure of the peak allocation of
+    the stages with tracemalloc, which slows the allocations down.
+    """
+    if enabled and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    elif not enabled and tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+
+def tracing():
+    """
+    This function returns the tracing options to give to collect in
+    another process : None if no hook is registered.
+    """
+    if not HOOKS:
+        return None
+    return {"memory": tracemalloc.is_tracing()}
+
+
+
+def emit(record):
+    """
+    This function sends a record to every hook.
+    """
+    for hook in list(HOOKS):
+        hook(record)
+
+
+
+@contextmanager
+def collect(memory=False):
+    """
+    This function gathers the records of the stages run in the block,
+    used in the worker processes whose records are sent back to the
+    main process and given to emit.
+
+    Returns
+    -------
+    records : list filled with the records
+    """
+    records = []
+    add_hook(records.append)
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield records
+    finally:
+        if started:
+            tracemalloc.stop()
+        remove_hook(records.append)
+
+
+
+def size_of(value):
+    """
+    This function returns the number of letters or bytes of a value,
+    of its first element for a tuple, None if it has no length.
+    """
+    if isinstance(value, tuple) and value:
+        value = value[0]
+    try:
+        return len(value)
+    except TypeError:
+        return None
+
+
+
+def second_size(value):
+    """
+    This function returns the length of the second element of a tuple,
+    for the functions returning (padding or alphabet, data).
+    """
+    return len(value[1])
+
+
+
+def symbol_counts(value):
+    """
+    This function counts each letter of a sequence (str or bytes),
+    None for another value.
+    """
+    if isinstance(value, str):
+        return {letter: value.count(letter) for letter in sorted(set(value))}
+    if isinstance(value, (bytes, bytearray)):
+        return {chr(letter): value.count(letter) for letter in sorted(set(value))}
+    return None
+
+
+
+def traced(stage, output=size_of):
+    """
+    This decorator measures every call of a function as a stage of the
+    pipeline when a hook is registered. The input of the stage is the
+    first argument of the function.
+
+    Parameters
+    ----------
+    stage : name of the stage in the records
+    output : function giving the size of the output from the result
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not HOOKS:
+                return function(*args, **kwargs)
+            return run_traced(stage, output, function, args, kwargs)
+        return wrapper
+    return decorator
+
+
+
+def run_traced(stage, output, function, args, kwargs):
+    """
+    This function runs a traced function and sends its record to the hooks.
+    """
+    memory = tracemalloc.is_tracing()
+    if memory:
+        current, peak = tracemalloc.get_traced_memory()
+        if _peaks:
+            _peaks[-1] = max(_peaks[-1], peak)
+        tracemalloc.reset_peak()
+        _peaks.append(0)
+    start = time.time()
+    begin = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        seconds = time.perf_counter() - begin
+        peak_bytes = None
+        if memory:
+            #the peak of the stage includes the peaks of its inner stages
+            peak = max(_peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if _peaks:
+                _peaks[-1] = max(_peaks[-1], peak)
+            peak_bytes = peak - current
+
+    data = args[0] if args else None
+    emit({"stage": stage, "pid": os.getpid(), "start": start, "seconds": seconds,
+          "bytes_in": size_of(data), "bytes_out": output(result),
+          "peak_bytes": peak_bytes, "symbols": symbol_counts(data)})
+    return result
+
+
+
+class Trace():
+    """
+    A class of hook keeping the records of the stages, which can be saved
+    as a structured trace (one JSON record per line).
+
+    Attributes
+    ----------
+    records : the list of records
+    """
+    def __init__(self):
+        self.records = []
+
+    def __call__(self, record):
+        self.records.append(record)
+
+    def totals(self):
+        """
+        This method returns the total time, sizes and number of calls of each stage.
+        """
+        totals = {}
+        for record in self.records:
+            total = totals.setdefault(record["stage"], {"calls": 0, "seconds": 0.0,
+                                                        "bytes_in": 0, "bytes_out": 0})
+            total["calls"] += 1
+            total["seconds"] += record["seconds"]
+            total["bytes_in"] += record["bytes_in"] or 0
+            total["bytes_out"] += record["bytes_out"] or 0
+        return totals
+
+    def save(self, path):
+        """
+        This method writes the records in a JSON lines file.
+        """
+        with open(path, "w") as file:
+            for record in self.records:
+                file.write(json.dumps(record) + "\n")
+
+
+
+@contextmanager
+def trace(path=None, memory=False):
+    """
+    This function records the stages run in the block and saves the
+    trace in a JSON lines file at the end, if a path is given.
+
+    Returns
+    -------
+    recorder : the Trace instance receiving the records
+    """
+    recorder = add_hook(Trace())
+    started = memory and not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield recorder
+    finally:
+        if started:
+            tracemalloc.stop()
+        remove_hook(recorder)
+        if path is not None:
+            recorder.save(path)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+jobs script contains the execution of a long operation in a separate
+process : the stages measured by the instrument hooks are sent to the
+parent process through a queue, which can be polled without blocking
+(for example with the after method of a tkinter window), and the job
+can be cancelled at any time.
+"""
+
+from instrument import add_hook
+import multiprocessing
+import os
+import queue
+
+
+class Progress():
+    """
+    A class estimating the progress of a job from the stages it has run :
+    each expected stage has the same share of the progress, a stage run
+    by pieces (validation, blocks) progresses with the bytes it has read.
+
+    Attributes
+    ----------
+    stages : names of the expected stages
+    total_bytes : size of the input of the job
+    done : bytes read by each stage
+    """
+    def __init__(self, stages, total_bytes):
+        self.stages = list(stages)
+        self.total_bytes = max(total_bytes, 1)
+        self.done = {}
+
+    def update(self, stage, size):
+        """
+        This method adds the bytes read by a stage.
+        """
+        self.done[stage] = self.done.get(stage, 0) + (size or 0)
+
+    def fraction(self):
+        """
+        This method returns the progress between 0 and 1.
+        """
+        if not self.stages:
+            return 0.0
+        total = 0.0
+        for stage in self.stages:
+            if stage in self.done:
+                total += min(self.done[stage] / self.total_bytes, 1.0)
+        return total / len(self.stages)
+
+
+
+def run_job(messages, function, args):
+    """
+    This function runs a job in the worker process : every traced stage
+    sends ("stage", name, bytes) and the end of the job sends
+    ("done", result) or ("error", message).
+    """
+    add_hook(lambda record: messages.put(("stage", record["stage"], record["bytes_in"])))
+    try:
+        result = function(*args)
+    except Exception as error:
+        messages.put(("error", str(error)))
+    else:
+        messages.put(("done", result))
+
+
+
+class Job():
+    """
+    A class running a function in a separate process, the function and
+    its result must be picklable (the function is defined at module level).
+
+    Attributes
+    ----------
+    progress : Progress of the job
+    result : result of the function once the job is done
+    error : error message if the function raised an exception
+    """
+    def __init__(self, function, args=(), stages=(), total_bytes=0):
+        #spawn starts a new interpreter, without the state of the graphical interface
+        context = multiprocessing.get_context("spawn")
+        self.messages = context.Queue()
+        self.process = context.Process(target=run_job, args=(self.messages, function, args),
+                                       daemon=True)
+        self.progress = Progress(stages, total_bytes)
+        self.result = None
+        self.error = None
+        self.finished = False
+        self.cancelled = False
+
+    def start(self):
+        self.process.start()
+        return self
+
+    def poll(self):
+        """
+        This method reads the messages sent by the worker without waiting.
+
+        Returns
+        -------
+        finished : True once the job is done, failed or cancelled
+        """
+        while not self.finished:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "stage":
+                self.progress.update(message[1], message[2])
+            elif message[0] == "done":
+                self.result = message[1]
+                self.finished = True
+            else:
+                self.error = message[1]
+                self.finished = True
+        if not self.finished and not self.process.is_alive() and self.messages.empty():
+            self.error = "The job stopped unexpectedly"
+            self.finished = True
+        if self.finished:
+            self.process.join()
+        return self.finished
+
+    def cancel(self):
+        """
+        This method stops the worker process.
+        """
+        if not self.finished:
+            self.process.terminate()
+            self.process.join()
+            self.cancelled = True
+            self.finished = True
+
+
+
+def file_size(file):
+    """
+    This function returns the size of a file, 0 if it does not exist.
+    """
+    try:
+        return os.path.getsize(file)
+    except OSError:
+        return 0
@@ -6,4 +6,4 @@ Main script to launch the interface
 from tkinter_interface import * 
 
 if __name__ == "__main__":
-    tkinter_interface
\ No newline at end of file
+    main()
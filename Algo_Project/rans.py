@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rans script contains the range asymmetric numeral system coder (rANS),
+an alternative to the Huffman compression : the letters are coded with
+their frequencies quantized on SCALE_BITS bits instead of codes of a whole
+number of bits, which is closer to the entropy of skewed sequences.
+
+The letters are shared between STREAMS interleaved states writing in a
+single byte stream, the symbol of each state is found in a table of the
+quantized frequencies (one entry per slot) when decoding.
+"""
+
+from instrument import second_size, traced
+
+
+#the frequencies of the letters are quantized so that their sum is 1 << SCALE_BITS
+SCALE_BITS = 12
+#lower bound of the states, a state is kept in [RANS_L, RANS_L << 8)
+RANS_L = 1 << 23
+#number of interleaved states
+STREAMS = 4
+
+
+def normalize_frequencies(seq):
+    """
+    This function quantizes the number of occurrences of each letter so
+    that their sum is 1 << SCALE_BITS, every letter keeps at least 1.
+
+    Returns
+    -------
+    frequencies : dictionnary letter -> quantized frequency
+    """
+    counts = {}
+    for letter in set(seq):
+        counts[letter] = seq.count(letter)
+    if not counts:
+        return {}
+    total = len(seq)
+    scale = 1 << SCALE_BITS
+    frequencies = {letter: max(1, count * scale // total) for letter, count in counts.items()}
+    #the rounding error is given to (or taken from) the most frequent letters
+    error = scale - sum(frequencies.values())
+    for letter in sorted(frequencies, key=lambda letter: -counts[letter]):
+        if error == 0:
+            break
+        change = max(error, 1 - frequencies[letter])
+        frequencies[letter] += change
+        error -= change
+    return frequencies
+
+
+
+def cumulative(frequencies):
+    """
+    This function returns the frequency and the start of the interval
+    of each byte (0 for the bytes without frequency).
+    """
+    freq = [0] * 256
+    cum = [0] * 256
+    start = 0
+    for letter in sorted(frequencies):
+        symbol = ord(letter)
+        freq[symbol] = frequencies[letter]
+        cum[symbol] = start
+        start += frequencies[letter]
+    return freq, cum
+
+
+
+@traced("rans_encode", second_size)
+def rans_encode(seq, frequencies, streams=STREAMS):
+    """
+    This function codes a sequence with the quantized frequencies of its
+    letters. The letter i is coded by the state i % streams, the letters
+    are coded from the end so the decoder reads them from the start.
+
+    Parameters
+    ----------
+    seq : the sequence to be compressed
+    frequencies : dictionnary letter -> quantized frequency
+    streams : number of interleaved states
+
+    Returns
+    -------
+    payload : the final states (4 bytes each) followed by the bytes
+    written by the states (bytes)
+    """
+    freq, cum = cumulative(frequencies)
+    #a state above the bound of a letter writes bytes before coding it
+    bound = [((RANS_L >> SCALE_BITS) << 8) * f for f in freq]
+    data = seq.encode("latin-1")
+    if any(not freq[symbol] for symbol in set(data)):
+        raise ValueError("The sequence contains a letter without frequency")
+
+    states = [RANS_L] * streams
+    out = bytearray()
+    append = out.append
+    for i in range(len(data) - 1, -1, -1):
+        symbol = data[i]
+        f = freq[symbol]
+        j = i % streams
+        x = states[j]
+        x_max = bound[symbol]
+        while x >= x_max:
+            append(x & 255)
+            x >>= 8
+        states[j] = ((x // f) << SCALE_BITS) + x % f + cum[symbol]
+    #the bytes are reversed, the first state is read first
+    for x in reversed(states):
+        for k in range(4):
+            append(x & 255)
+            x >>= 8
+    out.reverse()
+    return bytes(out)
+
+
+
+@traced("rans_decode")
+def rans_decode(payload, frequencies, length, streams=STREAMS):
+    """
+    This function decodes length letters coded by rans_encode.
+
+    Returns
+    -------
+    seq : the decoded sequence
+    """
+    freq, cum = cumulative(frequencies)
+    #slot -> (symbol, frequency, position of the slot in the interval of the symbol)
+    slots = []
+    for symbol in range(256):
+        for slot in range(freq[symbol]):
+            slots.append((symbol, freq[symbol], slot))
+    mask = (1 << SCALE_BITS) - 1
+
+    if len(payload) < 4 * streams:
+        raise ValueError("Truncated rANS payload")
+    states = [int.from_bytes(payload[4 * j:4 * j + 4], "big") for j in range(streams)]
+    position = 4 * streams
+    out = bytearray(length)
+    for i in range(length):
+        j = i % streams
+        x = states[j]
+        symbol, f, slot = slots[x & mask]
+        out[i] = symbol
+        x = f * (x >> SCALE_BITS) + slot
+        while x < RANS_L:
+            x = (x << 8) | payload[position]
+            position += 1
+        states[j] = x
+    return out.decode("latin-1")
+
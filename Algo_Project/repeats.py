@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+repeats script contains the search of the repeated parts of a sequence
+from its suffix array and its longest common prefix array (LCP) :
+the longest repeated substring, the maximal repeats and the tandem
+repeats (microsatellites), every search is linear in the length of the
+sequence. The records of a FASTA/FASTQ file are separated so that no repeat
+spans two records.
+"""
+
+from burrows_wheeler_transform import bwt_into, cached_bwt, lcp_array, store_bwt, suffix_array
+from fasta import iter_chunks
+from array import array
+from bisect import bisect_right
+from itertools import groupby
+from operator import eq
+import heapq
+import json
+import os
+
+
+#letter separating the records, never part of a repeat
+SEPARATOR = b"|"
+#letters which cannot be the unit of a tandem repeat
+GAPS = b"Nn$" + SEPARATOR
+
+
+def sequence_arrays(sequence):
+    """
+    This function computes the suffix array and the LCP array of a sequence,
+    the suffix array is read from the cache when the sequence was already
+    transformed (if the cache is enabled).
+
+    Parameters
+    ----------
+    sequence : the sequence without $ (str or bytes-like), its records
+    separated by SEPARATOR
+
+    Returns
+    -------
+    data : the sequence with a $ added at the end (bytes)
+    sa : suffix array (array of integers)
+    lcp : LCP array (see lcp_array), the common prefixes stop at the
+    separators as if every separator was a different letter
+    """
+    if isinstance(sequence, str):
+        sequence = sequence.encode("ascii")
+    data = bytes(sequence) + b"$"
+    digest, cached = cached_bwt(data)
+    if cached is not None:
+        sa = cached[1]
+    else:
+        sa = suffix_array(data)
+        sa = array("i" if len(data) < 1 << 31 else "q", sa)
+        store_bwt(digest, bwt_into(data, sa, bytearray(len(data))), sa)
+    lcp = lcp_array(data, sa)
+    if SEPARATOR[0] in data:
+        cut_at_separators(data, sa, lcp)
+    return data, sa, lcp
+
+
+
+def cut_at_separators(data, sa, lcp):
+    """
+    This function shortens the common prefixes of the LCP array (in place)
+    which contain a separator, so that the repeats stop at the end of the
+    records.
+    """
+    n = len(data)
+    #distance from each position to the next separator (or to the $)
+    distance = array(lcp.typecode, bytes(n * lcp.itemsize))
+    stop = n - 1
+    for position in range(n - 1, -1, -1):
+        if data[position] == SEPARATOR[0]:
+            stop = position
+        distance[position] = stop - position
+    for row in range(1, n):
+        lcp[row] = min(lcp[row], distance[sa[row]], distance[sa[row - 1]])
+
+
+
+def longest_repeat(sa, lcp):
+    """
+    This function finds the longest substring occurring at least twice,
+    the largest value of the LCP array.
+
+    Returns
+    -------
+    length : length of the substring, 0 if no letter is repeated
+    positions : sorted positions of all its occurrences
+    """
+    if len(lcp) < 2:
+        return 0, []
+    length = max(lcp)
+    if length == 0:
+        return 0, []
+    row = lcp.index(length)
+    #the occurrences are the rows around row sharing the same prefix
+    first = row - 1
+    last = row
+    while last + 1 < len(lcp) and lcp[last + 1] >= length:
+        last += 1
+    return length, sorted(sa[first:last + 1])
+
+
+
+def maximal_repeats(data, sa, lcp, min_length=20):
+    """
+    This function finds the maximal repeats of a sequence : the substrings
+    occurring at least twice which cannot be extended to the right nor to
+    the left in all their occurrences at once.
+    The intervals of rows sharing a common prefix (LCP intervals) are read
+    with a stack in a single pass, a prefix cannot be extended to the right
+    in all its occurrences, and it cannot be extended to the left if the
+    letters preceding its occurrences (its bwt letters) are not all the same.
+
+    Parameters
+    ----------
+    data : the sequence ending with a $ (bytes-like)
+    sa : suffix array of the sequence
+    lcp : LCP array of the sequence
+    min_length : minimal length of the repeats
+
+    Returns
+    -------
+    generator of (length, sorted positions of the occurrences)
+    """
+    n = len(data)
+    #left letter of an interval : None before its first row, the common
+    #letter preceding its rows, or -1 if the letters are different
+    stack = [[0, 0, None]]
+    for i in range(1, n + 1):
+        current = lcp[i] if i < n else 0
+        position = sa[i - 1]
+        #the suffixes starting the sequence or a record have no letter before them
+        left = data[position - 1] if position and data[position - 1] != SEPARATOR[0] else -1
+        start = i - 1
+        while current < stack[-1][0]:
+            length, start, top_left = stack.pop()
+            left = merge_left(top_left, left)
+            if length >= min_length and left == -1:
+                yield length, sorted(sa[start:i])
+        if current > stack[-1][0]:
+            stack.append([current, start, left])
+        else:
+            stack[-1][2] = merge_left(stack[-1][2], left)
+
+
+
+def merge_left(first, second):
+    """
+    This function merges the left letters of two intervals (see maximal_repeats).
+    """
+    if first is None:
+        return second
+    if second is None or first == second:
+        return first
+    return -1
+
+
+
+def tandem_repeats(data, max_period=6, min_copies=3):
+    """
+    This function finds the tandem repeats (microsatellites) of a sequence :
+    a unit of max_period letters at most repeated at least min_copies
+    times in a row. For each period p the positions where a letter equals
+    the letter p positions further are grouped in runs, a run of m letters
+    is a repeat of (m + p) // p copies of its first p letters.
+    Only the units which are not themselves repeats of a shorter unit
+    are reported, and the units containing N are ignored.
+
+    Parameters
+    ----------
+    data : the sequence (bytes-like)
+    max_period : maximal length of the unit
+    min_copies : minimal number of copies of the unit
+
+    Returns
+    -------
+    generator of (start, period, copies, unit), sorted by period then start
+    """
+    data = bytes(data)
+    for period in range(1, max_period + 1):
+        start = 0
+        for equal, group in groupby(map(eq, data, data[period:])):
+            length = len(list(group))
+            if equal:
+                copies = (length + period) // period
+                unit = data[start:start + period]
+                if copies >= min_copies and is_primitive(unit) and \
+                        not any(letter in unit for letter in GAPS):
+                    yield start, period, copies, unit.decode("ascii")
+            start += length
+
+
+
+def is_primitive(unit):
+    """
+    This function returns True if a unit is not a repeat of a shorter unit.
+    """
+    period = len(unit)
+    for divisor in range(1, period):
+        if period % divisor == 0 and unit == unit[:divisor] * (period // divisor):
+            return False
+    return True
+
+
+
+def repeat_report(sequence, min_length=20, max_period=6, min_copies=3, limit=1000):
+    """
+    This function gathers the repeats of a sequence in a dictionnary
+    which can be saved in JSON.
+
+    Parameters
+    ----------
+    sequence : the sequence without $ (str or bytes-like), its records
+    separated by SEPARATOR (see join_records)
+    min_length : minimal length of the maximal repeats
+    max_period : maximal length of the unit of the tandem repeats
+    min_copies : minimal number of copies of the tandem repeats
+    limit : maximal number of maximal repeats and tandem repeats reported,
+    the longest ones first
+
+    Returns
+    -------
+    report : dictionnary with the length of the sequence, its longest
+    repeat, its maximal repeats and its tandem repeats, the positions are
+    counted in the records joined without separator
+    """
+    data, sa, lcp = sequence_arrays(sequence)
+    separators = [position for position, letter in enumerate(data) if letter == SEPARATOR[0]] \
+        if SEPARATOR[0] in data else []
+
+    def letter_position(position):
+        return position - bisect_right(separators, position)
+
+    length, positions = longest_repeat(sa, lcp)
+    longest = {"length": length, "positions": [letter_position(position) for position in positions],
+               "sequence": data[positions[0]:positions[0] + length].decode("ascii")
+               if positions else ""}
+
+    #only the reported repeats are kept in memory
+    repeats = heapq.nsmallest(limit, maximal_repeats(data, sa, lcp, min_length),
+                              key=lambda repeat: (-repeat[0], repeat[1][0]))
+    tandems = heapq.nsmallest(limit, tandem_repeats(data[:-1], max_period, min_copies),
+                              key=lambda repeat: (-repeat[1] * repeat[2], repeat[0]))
+    return {"length": len(data) - 1 - len(separators),
+            "longest_repeat": longest,
+            "maximal_repeats": [{"length": size, "count": len(occurrences),
+                                 "positions": [letter_position(position)
+                                               for position in occurrences],
+                                 "sequence": data[occurrences[0]:occurrences[0] + size]
+                                 .decode("ascii")}
+                                for size, occurrences in repeats],
+            "tandem_repeats": [{"start": letter_position(start), "period": period,
+                                "copies": copies, "unit": unit}
+                               for start, period, copies, unit in tandems]}
+
+
+
+def join_records(file):
+    """
+    This function reads the sequences of a text, FASTA or FASTQ file
+    joined in a single buffer, with a SEPARATOR between the records.
+
+    Returns
+    -------
+    sequence : bytearray of the checked letters and separators
+    """
+    sequence = bytearray()
+    current = 0
+    for number, name, chunk in iter_chunks(file):
+        if number != current:
+            sequence += SEPARATOR
+            current = number
+        sequence += chunk
+    return sequence
+
+
+
+def save_repeats(file, created_file=None, min_length=20, max_period=6, min_copies=3,
+                 limit=1000):
+    """
+    This function saves the repeats of the sequences of a file in a JSON
+    file ending with _repeats.json (see repeat_report).
+
+    Returns
+    -------
+    created_file : path of the JSON file
+    """
+    if created_file is None:
+        created_file = os.path.splitext(file)[0] + "_repeats.json"
+    report = repeat_report(join_records(file), min_length, max_period, min_copies, limit)
+    with open(created_file, "w") as open_file:
+        json.dump(report, open_file, indent=2)
+    return created_file
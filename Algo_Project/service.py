@@ -0,0 +1,528 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+service script contains a local HTTP service performing the transform,
+inversion, compression, decompression and FM-index queries on demand,
+without starting a new python process for each sequence.
+
+The requests are read by an asyncio server (TCP or Unix socket) and run in
+a pool of processes which stay alive, so the modules are imported once and
+the FM-indexes are kept in memory between the requests. The small requests
+arriving together are sent to the pool in batches, and the requests beyond
+max_pending are refused (503) instead of piling up in memory.
+
+Example : python3 service.py --port 8765 --workers 4
+          curl --data-binary @sequence_test.txt http://127.0.0.1:8765/transform
+"""
+
+from cache import DEFAULT_CACHE_SIZE, configure, content_hash
+from fm_index import FMIndex, index_path
+from streaming import DEFAULT_BLOCK_SIZE
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qs, urlencode, urlsplit
+import api
+import argparse
+import asyncio
+import http.client
+import json
+import multiprocessing
+import os
+import sys
+
+
+#operations of the service : path -> content type of the response
+OPERATIONS = {
+    "/transform": "text/plain",
+    "/inverse": "text/plain",
+    "/compress": "application/octet-stream",
+    "/decompress": "text/plain",
+    "/count": "application/json",
+    "/locate": "application/json",
+}
+#maximal size of a request body (256 MB)
+MAX_BODY = 256 << 20
+#number of FM-indexes kept in memory by each worker process
+INDEX_CACHE_SIZE = 8
+
+#FM-indexes of the worker process : key -> FMIndex
+_indexes = OrderedDict()
+
+
+class HttpError(Exception):
+    """
+    An exception answered with an HTTP error status.
+    """
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+
+def flag(params, name, default=False):
+    """
+    This function reads a boolean parameter of the query string.
+    """
+    values = params.get(name)
+    if not values:
+        return default
+    return values[-1].lower() in ("1", "true", "yes", "on")
+
+
+
+def check_params(path, params):
+    """
+    This function checks the parameters of a request before it is sent to
+    the pool, a worker never receives a request it cannot finish.
+    """
+    if path == "/compress" and params.get("block_size"):
+        try:
+            block_size = int(params["block_size"][-1])
+        except ValueError:
+            raise HttpError(400, "block_size must be an integer")
+        if block_size < 1:
+            raise HttpError(400, "block_size must be >= 1")
+
+
+
+def resolve_file(root, name):
+    """
+    This function returns the path of the FM-index of the bwt file given
+    by the file parameter of a query, relative to the root directory of
+    the service. The queries cannot read a file outside the root, and
+    an index is never built by a query.
+
+    Returns
+    -------
+    path : absolute path of the .fmi file
+    """
+    if root is None:
+        raise HttpError(403, "The file parameter needs a root directory (--root)")
+    root = os.path.realpath(root)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise HttpError(403, "The file is outside the root directory")
+    path = index_path(path)
+    if not os.path.isfile(path):
+        raise HttpError(404, "No FM-index saved for " + name)
+    return path
+
+
+
+def get_index(params, body):
+    """
+    This function returns the FM-index of a query : the index file given
+    by the index parameter (see resolve_file), or the index of the bwt
+    sequence sent in the body. The indexes are kept in memory.
+    """
+    if params.get("index"):
+        path = params["index"][-1]
+        key = ("file", path, os.path.getmtime(path))
+    else:
+        key = ("bwt", content_hash(body))
+    if key in _indexes:
+        _indexes.move_to_end(key)
+        return _indexes[key]
+    if key[0] == "file":
+        index = FMIndex.load(key[1])
+    else:
+        index = FMIndex(bytes(body).translate(None, b"\r\n"))
+    _indexes[key] = index
+    if len(_indexes) > INDEX_CACHE_SIZE:
+        _indexes.popitem(last=False)
+    return index
+
+
+
+def run_operation(path, params, body):
+    """
+    This function performs an operation of the service on the body of a
+    request, in a worker process.
+
+    Returns
+    -------
+    payload : the body of the response (bytes)
+    """
+    if path == "/transform":
+        return api.transform_sequence(body).encode("ascii")
+    if path == "/inverse":
+        return api.inverse_sequence(body).encode("ascii")
+    if path == "/compress":
+        coder = params.get("coder", ["huffman"])[-1]
+        block_size = int(params.get("block_size", [DEFAULT_BLOCK_SIZE])[-1])
+        rle = flag(params, "rle")
+        return api.compress_bytes(body, not flag(params, "no_bwt"), block_size,
+                                  flag(params, "mtf") or rle, rle, flag(params, "keep_case"),
+                                  coder)
+    if path == "/decompress":
+        return api.decompress_bytes(body)
+    patterns = params.get("pattern", [])
+    index = get_index(params, body)
+    if path == "/count":
+        result = {pattern: index.count(pattern) for pattern in patterns}
+    else:
+        result = {pattern: index.locate(pattern) for pattern in patterns}
+    return json.dumps(result).encode("utf-8")
+
+
+
+def run_batch(requests):
+    """
+    This function performs a batch of requests in a worker process, an
+    error of a request does not stop the others.
+
+    Parameters
+    ----------
+    requests : list of (path, params, body)
+
+    Returns
+    -------
+    results : list of (status, payload), in the order of the requests
+    """
+    results = []
+    for path, params, body in requests:
+        try:
+            results.append((200, run_operation(path, params, body)))
+        except Exception as error:
+            #an invalid sequence can fail anywhere in the operations
+            results.append((400, (str(error) or type(error).__name__).encode("utf-8")))
+    return results
+
+
+
+class Batcher():
+    """
+    A class gathering the requests arriving at the same time in batches
+    sent to the pool of processes : a batch is sent when it has max_batch
+    requests or max_bytes bytes, or delay seconds after its first request.
+    A batch is split in one task per worker (at most), so the requests
+    of a batch still run in parallel and the batching only saves the
+    exchanges with the workers.
+
+    Attributes
+    ----------
+    pool : the pool of processes
+    workers : number of processes of the pool
+    pending : requests of the next batch (path, params, body, future)
+    batches : number of batches sent
+    """
+    def __init__(self, pool, max_batch=32, max_bytes=1 << 20, delay=0.002, workers=1):
+        self.pool = pool
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_bytes = max_bytes
+        self.delay = delay
+        self.pending = []
+        self.pending_bytes = 0
+        self.timer = None
+        self.batches = 0
+
+    async def submit(self, path, params, body):
+        """
+        This method adds a request to the next batch and waits for its result.
+
+        Returns
+        -------
+        status, payload : the result of run_batch for the request
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((path, params, body, future))
+        self.pending_bytes += len(body)
+        if len(self.pending) >= self.max_batch or self.pending_bytes >= self.max_bytes:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.delay, self.flush)
+        return await future
+
+    def flush(self):
+        """
+        This method sends the pending requests to the pool, in
+        min(requests, workers) tasks of consecutive requests.
+        """
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        batch, self.pending, self.pending_bytes = self.pending, [], 0
+        self.batches += 1
+        tasks = min(len(batch), self.workers)
+        size, extra = divmod(len(batch), tasks)
+        start = 0
+        for i in range(tasks):
+            end = start + size + (1 if i < extra else 0)
+            self.send(batch[start:end])
+            start = end
+
+    def send(self, chunk):
+        """
+        This method runs a part of a batch in a worker process and gives
+        the results to the futures of its requests.
+        """
+        requests = [(path, params, body) for path, params, body, future in chunk]
+        task = asyncio.get_running_loop().run_in_executor(self.pool, run_batch, requests)
+
+        def distribute(task):
+            if task.cancelled():
+                error = HttpError(503, "The service is stopping")
+            else:
+                error = task.exception()
+                if error is not None:
+                    error = HttpError(500, "The worker process failed : " + str(error))
+            for index, (path, params, body, future) in enumerate(chunk):
+                if future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(task.result()[index])
+        task.add_done_callback(distribute)
+
+
+
+class Service():
+    """
+    A class of the HTTP service : it reads the requests of the connections,
+    refuses them when too many are running and sends them to the batcher.
+
+    Attributes
+    ----------
+    batcher : Batcher sending the requests to the pool
+    max_pending : maximal number of requests running at once
+    active : number of requests running
+    stats : number of requests answered, refused and failed
+    """
+    def __init__(self, workers=None, max_pending=64, max_batch=32, delay=0.002,
+                 max_body=MAX_BODY, root=None):
+        #spawn starts the workers without the state of the event loop
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.workers,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        self.batcher = Batcher(self.pool, max_batch, delay=delay, workers=self.workers)
+        self.max_pending = max_pending
+        self.max_body = max_body
+        self.root = root
+        self.active = 0
+        self.stats = {"requests": 0, "refused": 0, "errors": 0}
+
+    async def dispatch(self, method, path, params, body):
+        """
+        This method answers a request.
+
+        Returns
+        -------
+        status, content type, payload
+        """
+        if path == "/health":
+            return 200, "application/json", b'{"status": "ok"}'
+        if path == "/stats":
+            stats = dict(self.stats, active=self.active, batches=self.batcher.batches)
+            return 200, "application/json", json.dumps(stats).encode("utf-8")
+        if path not in OPERATIONS:
+            raise HttpError(404, "Unknown operation " + path)
+        if method != "POST":
+            raise HttpError(405, "The operations are called with POST")
+        check_params(path, params)
+        #the workers only receive the checked path of the index
+        params.pop("index", None)
+        if path in ("/count", "/locate") and params.get("file"):
+            params["index"] = [resolve_file(self.root, params["file"][-1])]
+        #back-pressure : the client retries later instead of queueing more work
+        if self.active >= self.max_pending:
+            self.stats["refused"] += 1
+            raise HttpError(503, "The service is busy")
+        self.active += 1
+        try:
+            status, payload = await self.batcher.submit(path, params, body)
+        finally:
+            self.active -= 1
+        if status != 200:
+            self.stats["errors"] += 1
+            return status, "text/plain", payload
+        self.stats["requests"] += 1
+        return status, OPERATIONS[path], payload
+
+    async def read_request(self, reader):
+        """
+        This method reads a request of a connection.
+
+        Returns
+        -------
+        request : (method, path, params, headers, body), None at the end
+        of the connection
+        """
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400, "Invalid request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400, "Invalid Content-Length")
+        if length > self.max_body:
+            raise HttpError(413, "The request is too large")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return method.upper(), url.path, parse_qs(url.query), headers, body
+
+    async def handle(self, reader, writer):
+        """
+        This method answers the requests of a connection until it is closed.
+        """
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await self.read_request(reader)
+                    if request is None:
+                        break
+                    method, path, params, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    status, content_type, payload = await self.dispatch(method, path, params,
+                                                                        body)
+                except HttpError as error:
+                    status, content_type, payload = error.status, "text/plain", \
+                                                    str(error).encode("utf-8")
+                write_response(writer, status, content_type, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self):
+        """
+        This method starts the worker processes before the first request,
+        they import the modules once for all.
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(self.pool, run_batch, [])
+                               for i in range(self.workers)))
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+
+def write_response(writer, status, content_type, payload, keep_alive=True):
+    """
+    This function writes an HTTP response.
+    """
+    head = "HTTP/1.1 %d %s\r\nContent-Type: %s\r\nContent-Length: %d\r\n" % (
+        status, http.client.responses.get(status, ""), content_type, len(payload))
+    if status == 503:
+        head += "Retry-After: 1\r\n"
+    head += "Connection: %s\r\n\r\n" % ("keep-alive" if keep_alive else "close")
+    writer.write(head.encode("latin-1") + payload)
+
+
+
+async def serve(host="127.0.0.1", port=8765, unix_path=None, ready=None, **options):
+    """
+    This function runs the service until it is cancelled.
+
+    Parameters
+    ----------
+    host, port : address of the TCP server
+    unix_path : path of a Unix socket, used instead of the TCP server
+    ready : function called with the server once it listens, if given
+    options : arguments of Service (workers, max_pending, max_batch, delay, root)
+    """
+    service = Service(**options)
+    try:
+        await service.start()
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(service.handle, unix_path)
+        else:
+            server = await asyncio.start_server(service.handle, host, port)
+        async with server:
+            if ready is not None:
+                ready(server)
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+
+def call(operation, body=b"", host="127.0.0.1", port=8765, timeout=60, **params):
+    """
+    This function sends a request to a running service, for example
+    call("count", bwt, pattern=["ACG", "TT"]).
+
+    Returns
+    -------
+    status : HTTP status of the response
+    payload : body of the response (bytes)
+    """
+    if isinstance(body, str):
+        body = body.encode("ascii")
+    #the lists of values are sent as repeated parameters
+    query = urlencode(params, doseq=True)
+    connection = http.client.HTTPConnection(host, port, timeout=timeout)
+    try:
+        connection.request("POST", "/" + operation + ("?" + query if query else ""), body)
+        response = connection.getresponse()
+        return response.status, response.read()
+    finally:
+        connection.close()
+
+
+
+def parse_arguments(argv=None):
+    """
+    This function reads the arguments of the command line.
+    """
+    parser = argparse.ArgumentParser(description="Local BWT & Huffman compression service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="path of a Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="number of worker processes, one per CPU by default")
+    parser.add_argument("--max-pending", type=int, default=64,
+                        help="number of requests running at once, the next ones are refused")
+    parser.add_argument("--root", default=None,
+                        help="directory of the bwt files queried with the file parameter")
+    parser.add_argument("--max-batch", type=int, default=32,
+                        help="maximal number of requests sent to a worker at once")
+    parser.add_argument("--cache-dir", default=None,
+                        help="directory keeping the bwt, suffix arrays and Huffman codes")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE >> 20,
+                        help="maximal size of the cache directory in MB")
+    return parser.parse_args(argv)
+
+
+
+def main(argv=None):
+    """
+    This function runs the service until it is interrupted.
+    """
+    args = parse_arguments(argv)
+    if args.cache_dir:
+        configure(args.cache_dir, args.cache_size << 20)
+    address = args.unix or "http://%s:%d" % (args.host, args.port)
+    try:
+        asyncio.run(serve(args.host, args.port, args.unix,
+                          ready=lambda server: print("Listening on " + address, flush=True),
+                          workers=args.workers, max_pending=args.max_pending,
+                          max_batch=args.max_batch, root=args.root))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+stages script contains the move-to-front and run-length stages
+placed between the bwt and the Huffman compression : the runs of
+identical letters of the bwt become runs of zeros after the move-to-front,
+and each run of zeros is replaced by a few RUNA/RUNB symbols
+"""
+
+from container import FLAG_MTF, FLAG_RLE
+from instrument import second_size, traced
+import re
+
+
+#symbols coding the runs of zeros (bijective base 2 : RUNA = 1, RUNB = 2)
+RUNA = "\x00"
+RUNB = "\x01"
+
+#letters moved by the run-length stage : index k becomes k + 1
+SHIFT_UP = {k: k + 1 for k in range(1, 255)}
+SHIFT_DOWN = {k + 1: k for k in range(1, 255)}
+
+
+@traced("mtf", second_size)
+def move_to_front(sequence):
+    """
+    This function performs the move-to-front transform : each letter is
+    replaced by its position in a list of the letters, then moved at the
+    front of the list. The list starts with the letters sorted.
+
+    Returns
+    -------
+    alphabet : the sorted letters of the sequence
+    indices : the positions coded as characters (chr(0) for position 0)
+    """
+    alphabet = "".join(sorted(set(sequence)))
+    letters = alphabet
+    indices = []
+    append = indices.append
+    for letter in sequence:
+        index = letters.index(letter)
+        append(index)
+        if index:
+            letters = letter + letters[:index] + letters[index + 1:]
+    return alphabet, "".join(map(chr, indices))
+
+
+
+@traced("inverse_mtf")
+def inverse_move_to_front(indices, alphabet):
+    """
+    This function rebuilds the sequence from the positions given by
+    the move-to-front transform and the sorted letters.
+    """
+    letters = alphabet
+    sequence = []
+    append = sequence.append
+    for index in map(ord, indices):
+        letter = letters[index]
+        append(letter)
+        if index:
+            letters = letter + letters[:index] + letters[index + 1:]
+    return "".join(sequence)
+
+
+
+def encode_run(length):
+    """
+    This function codes the length of a run of zeros with RUNA and RUNB,
+    least significant digit first.
+    """
+    digits = []
+    while length > 0:
+        if length % 2:
+            digits.append(RUNA)
+            length = (length - 1) // 2
+        else:
+            digits.append(RUNB)
+            length = (length - 2) // 2
+    return "".join(digits)
+
+
+
+def decode_run(digits):
+    """
+    This function returns the length of a run coded with RUNA and RUNB.
+    """
+    length = 0
+    for i, digit in enumerate(digits):
+        length += (1 if digit == RUNA else 2) << i
+    return length
+
+
+
+@traced("rle")
+def run_length_encode(indices):
+    """
+    This function replaces the runs of zeros of the move-to-front positions
+    by RUNA/RUNB symbols, the other positions k become k + 1.
+    """
+    shifted = indices.translate(SHIFT_UP)
+    return re.sub("\x00+", lambda run: encode_run(len(run.group())), shifted)
+
+
+
+@traced("inverse_rle")
+def run_length_decode(symbols):
+    """
+    This function rebuilds the move-to-front positions from the symbols
+    given by run_length_encode.
+    """
+    indices = re.sub("[\x00\x01]+", lambda run: "\x00" * decode_run(run.group()), symbols)
+    return indices.translate(SHIFT_DOWN)
+
+
+
+def undo_stages(symbols, flags, alphabet=None):
+    """
+    This function undoes the run-length and move-to-front stages
+    given in the flags of a compressed file.
+
+    Parameters
+    ----------
+    symbols : the decoded symbols of a block
+    flags : flags of the header of the compressed file
+    alphabet : the sorted letters of the move-to-front stage
+
+    Returns
+    -------
+    sequence : the sequence given to the stages (the bwt sequence for
+    a bwt compressed file)
+    """
+    if flags & FLAG_RLE:
+        symbols = run_length_decode(symbols)
+    if flags & FLAG_MTF:
+        symbols = inverse_move_to_front(symbols, alphabet)
+    return symbols
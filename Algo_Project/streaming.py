@@ -0,0 +1,806 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+streaming script contains the block compression of the sequences :
+the file is read, transformed and compressed block by block,
+so the memory used depends on the block size and not on the file size
+"""
+
+from burrows_wheeler_transform import bwt_from_sequence, lf_inverse
+from container import (FLAG_BWT, FLAG_CHECKSUMS, FLAG_MTF, FLAG_RANS, FLAG_RECORDS, FLAG_RLE,
+                       FLAG_SHARED_TABLE, VERSION, open_container, read_block, read_index,
+                       remove_index, write_block, write_end, write_header, write_index)
+from fasta import detect_format, iter_chunks
+from huffman import (cached_huffman_code, code_lengths, compatible_code, decode_block,
+                     encode_sequence)
+from instrument import collect, emit, tracing
+from rans import STREAMS, normalize_frequencies, rans_encode
+from stages import move_to_front, run_length_encode, undo_stages
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+import os
+import time
+import zlib
+
+
+#number of letters of a block (1 MB)
+DEFAULT_BLOCK_SIZE = 1 << 20
+#entropy coders of the blocks
+CODERS = ("huffman", "rans")
+
+
+def check_block_size(block_size):
+    """
+    This function raises a ValueError if a block size is not a positive
+    number of letters.
+    """
+    if block_size < 1:
+        raise ValueError("block_size must be >= 1")
+
+
+
+def split_blocks(chunks, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    This function gathers the checked pieces of the sequences of a file
+    and yields them by blocks of block_size letters. A block never
+    contains letters of two records.
+
+    Parameters
+    ----------
+    chunks : iterable of (record number, record name, piece of sequence)
+    as given by fasta.iter_chunks
+    block_size : number of letters of a block
+
+    Returns
+    -------
+    generator of (name, block), name is the record name for the first
+    block of a record and None for the next blocks (and for a text file)
+    """
+    check_block_size(block_size)
+    buffer = bytearray()
+    current = None
+    name = None
+    for number, record_name, chunk in chunks:
+        if number != current:
+            if buffer:
+                yield name, buffer.decode("ascii")
+                buffer = bytearray()
+            current = number
+            name = record_name
+        buffer += chunk
+        while len(buffer) >= block_size:
+            yield name, buffer[:block_size].decode("ascii")
+            del buffer[:block_size]
+            name = None
+    if buffer:
+        yield name, buffer.decode("ascii")
+
+
+
+def read_blocks(file, block_size=DEFAULT_BLOCK_SIZE, keep_case=False):
+    """
+    This function reads a text, FASTA or FASTQ file by pieces and yields
+    its sequences by blocks of block_size letters.
+    """
+    return split_blocks(iter_chunks(file, keep_case), block_size)
+
+
+
+def stage_flags(bwt=True, mtf=False, rle=False, coder="huffman"):
+    """
+    This function returns the flags of the header for the chosen stages
+    and entropy coder ("huffman" or "rans"), the run-length stage codes
+    the runs of zeros of the move-to-front stage.
+    """
+    if rle and not mtf:
+        raise ValueError("The run-length stage needs the move-to-front stage")
+    if coder not in CODERS:
+        raise ValueError("Unknown coder : " + str(coder))
+    return (FLAG_BWT if bwt else 0) | (FLAG_MTF if mtf else 0) | (FLAG_RLE if rle else 0) | \
+           (FLAG_RANS if coder == "rans" else 0)
+
+
+
+def add_timing(timings, stage, start, size):
+    """
+    This function saves the time spent in a stage since start and
+    the number of letters given to the stage.
+
+    Returns
+    -------
+    now : the time at the end of the stage
+    """
+    now = time.perf_counter()
+    timings[stage] = [now - start, size]
+    return now
+
+
+
+def transform_block(block, flags=FLAG_BWT, timings=None):
+    """
+    This function performs the bwt (with a $ added at the end of the block),
+    the move-to-front and run-length stages if they are in the flags.
+
+    Returns
+    -------
+    alphabet : the letters of the move-to-front stage, None without it
+    block : the symbols given to the entropy coder
+    """
+    if timings is None:
+        timings = {}
+    alphabet = None
+    start = time.perf_counter()
+    if flags & FLAG_BWT:
+        block = bwt_from_sequence(block + "$", keep_sa=False)[0]
+        start = add_timing(timings, "bwt", start, len(block))
+    if flags & FLAG_MTF:
+        alphabet, block = move_to_front(block)
+        start = add_timing(timings, "mtf", start, len(block))
+    if flags & FLAG_RLE:
+        size = len(block)
+        block = run_length_encode(block)
+        add_timing(timings, "rle", start, size)
+    return alphabet, block
+
+
+
+def compress_block(block, flags=FLAG_BWT, reference=None, shared=None):
+    """
+    This function performs the stages of the flags (see transform_block)
+    and the Huffman compression of a block with its own codes (or the
+    rANS coding with its own frequencies with FLAG_RANS).
+    The code lengths of a reference (the last block of a compressed file)
+    or of a shared code table are used instead when they are compatible
+    with the block (see compatible_code).
+
+    Returns
+    -------
+    result : dictionnary with the code lengths, padding, length (number
+    of symbols compressed), payload (packed bits), alphabet (letters of
+    the move-to-front stage), span (number of letters of the block),
+    data_crc (CRC32 of the block), shared (True if the shared code table
+    is used) and timings (stage -> [seconds, letters]), the frequencies and
+    streams instead of the code lengths for the rANS coder
+    """
+    timings = {}
+    span = len(block)
+    data_crc = zlib.crc32(block.encode("latin-1"))
+    alphabet, block = transform_block(block, flags, timings)
+    start = time.perf_counter()
+    if flags & FLAG_RANS:
+        frequencies = normalize_frequencies(block)
+        payload = rans_encode(block, frequencies)
+        add_timing(timings, "rans", start, len(block))
+        return {"code_lengths": None, "frequencies": frequencies, "streams": STREAMS,
+                "padding": 0, "length": len(block), "payload": payload,
+                "alphabet": alphabet, "span": span, "data_crc": data_crc, "timings": timings}
+    huffman_code = None
+    use_shared = False
+    if reference is not None:
+        huffman_code = compatible_code(block, reference)
+        use_shared = huffman_code is not None and reference == shared
+    if huffman_code is None and shared is not None:
+        huffman_code = compatible_code(block, shared)
+        use_shared = huffman_code is not None
+    if huffman_code is None:
+        huffman_code = cached_huffman_code(block)
+    added, packed = encode_sequence(block, huffman_code)
+    add_timing(timings, "huffman", start, len(block))
+    return {"code_lengths": code_lengths(huffman_code), "padding": added,
+            "length": len(block), "payload": packed, "alphabet": alphabet,
+            "span": span, "data_crc": data_crc, "shared": use_shared, "timings": timings}
+
+
+
+def compress_named_block(item, flags=FLAG_BWT, options=None, reference=None, shared=None):
+    """
+    This function compresses a block given with the name of its record.
+    With tracing options (see instrument.tracing) the records of the
+    traced stages are returned in result["trace"], for a worker process.
+    """
+    name, block = item
+    if options is None:
+        result = compress_block(block, flags, reference, shared)
+    else:
+        with collect(**options) as records:
+            result = compress_block(block, flags, reference, shared)
+        result["trace"] = records
+    result["name"] = name
+    return result
+
+
+
+def decompress_block(block, flags=FLAG_BWT):
+    """
+    This function decodes a block read in a compressed file and undoes
+    the stages of the flags : run-length, move-to-front and bwt.
+    With FLAG_CHECKSUMS the payload is checked before the decoding and the
+    sequence after the reconstruction.
+
+    Returns
+    -------
+    sequence : the original sequence of the block
+    """
+    if flags & FLAG_CHECKSUMS and zlib.crc32(block["payload"]) != block["payload_crc"]:
+        raise ValueError("Corrupted compressed block (payload checksum)")
+    sequence = undo_stages(decode_block(block), flags, block.get("alphabet"))
+    if flags & FLAG_BWT:
+        sequence = lf_inverse(sequence)
+    if flags & FLAG_CHECKSUMS and zlib.crc32(sequence.encode("latin-1")) != block["data_crc"]:
+        raise ValueError("Corrupted compressed block (sequence checksum)")
+    return sequence
+
+
+
+def decompress_named_block(block, flags=FLAG_BWT, options=None):
+    """
+    This function decompresses a block and returns it with the name
+    of the record it starts and the records of the traced stages
+    (with tracing options, for a worker process).
+    """
+    if options is None:
+        return block.get("name"), decompress_block(block, flags), []
+    with collect(**options) as records:
+        sequence = decompress_block(block, flags)
+    return block.get("name"), sequence, records
+
+
+
+def worker_options(workers):
+    """
+    This function returns the tracing options given to the worker
+    processes : the stages run in the current process are traced directly.
+    """
+    return tracing() if workers > 1 else None
+
+
+
+def ordered_map(function, items, workers=1, max_pending=None):
+    """
+    This function applies a function to every items in a pool of processes
+    and yields the results in the order of the items.
+    At most max_pending items are sent to the pool at once, so only a few
+    blocks are kept in memory whatever the size of the file.
+
+    Parameters
+    ----------
+    function : function applied to the items, defined at module level
+    items : iterable of the items
+    workers : number of processes, 1 to work in the current process
+    max_pending : maximal number of items in the pool, 2 * workers by default
+
+    Returns
+    -------
+    generator of the results
+    """
+    if workers <= 1:
+        yield from map(function, items)
+        return
+
+    if max_pending is None:
+        max_pending = 2 * workers
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+
+def write_compressed(file_comp, blocks, block_size=DEFAULT_BLOCK_SIZE, flags=FLAG_BWT,
+                     workers=1, max_pending=None, stats=None, table=None):
+    """
+    This function compresses blocks and writes them in a file opened
+    in binary mode, after the header, followed by the index of the blocks.
+
+    Parameters
+    ----------
+    file_comp : file opened in binary mode
+    blocks : iterable of the blocks with their record name (name, str)
+    block_size : number of letters of a block, saved in the header
+    flags : stages applied before the Huffman compression (see stage_flags)
+    workers : number of processes compressing the blocks
+    max_pending : maximal number of blocks being compressed at once
+    stats : dictionnary filled with the total time and number of letters
+    of each stage (stage -> [seconds, letters]), if given
+    table : (identifier, code lengths) of a shared code table saved with
+    container.save_table, used by the blocks it codes well (Huffman coder)
+    """
+    check_block_size(block_size)
+    #every block is written with its checksums
+    flags |= FLAG_CHECKSUMS
+    identifier, shared = table if table is not None and not flags & FLAG_RANS else (None, None)
+    if identifier is not None:
+        flags |= FLAG_SHARED_TABLE
+    write_header(file_comp, flags, block_size, identifier)
+    entries = write_blocks(file_comp, blocks, flags, [], workers, max_pending, stats,
+                           shared=shared)
+    write_end(file_comp)
+    write_index(file_comp, entries)
+
+
+
+def write_blocks(file_comp, blocks, flags, entries, workers=1, max_pending=None, stats=None,
+                 reference=None, shared=None):
+    """
+    This function compresses blocks and writes them at the current
+    position of a file opened in binary mode.
+
+    Parameters
+    ----------
+    entries : block index of the blocks already written in the file
+    (see container.write_index), the new blocks are added to it
+    reference : code lengths reused for the blocks when they are
+    compatible (Huffman coder only), if given
+    shared : code lengths of the shared code table of the file, if any
+
+    Returns
+    -------
+    entries : the block index
+    """
+    function = partial(compress_named_block, flags=flags, options=worker_options(workers),
+                       reference=reference, shared=shared)
+    start = entries[-1][1] + entries[-1][2] if entries else 0
+    record = entries[-1][3] if entries else -1
+    for result in ordered_map(function, blocks, workers, max_pending):
+        for trace_record in result.get("trace", ()):
+            emit(trace_record)
+        #a block with a name starts a new record
+        if result["name"] is not None or record < 0:
+            record += 1
+        entries.append((file_comp.tell(), start, result["span"], record))
+        start += result["span"]
+        write_block(file_comp, result, flags)
+        if stats is not None:
+            for stage, (seconds, size) in result["timings"].items():
+                total = stats.setdefault(stage, [0.0, 0])
+                total[0] += seconds
+                total[1] += size
+    return entries
+
+
+
+def read_decompressed(open_file, workers=1, max_pending=None):
+    """
+    This function reads the header of a compressed file opened in binary
+    mode and decompresses its blocks one by one.
+
+    Returns
+    -------
+    header : dictionnary with the version, flags and block size
+    sequences : generator of the decompressed blocks with the name of the
+    record they start (name, str)
+    """
+    header, blocks = open_container(open_file)
+    function = partial(decompress_named_block, flags=header["flags"],
+                       options=worker_options(workers))
+    return header, emit_records(ordered_map(function, blocks, workers, max_pending))
+
+
+
+def emit_records(results):
+    """
+    This function sends the records of the traced stages of the worker
+    processes to the hooks and yields the decompressed blocks (name, str).
+    """
+    for name, sequence, records in results:
+        for record in records:
+            emit(record)
+        yield name, sequence
+
+
+
+def write_sequences(file, sequences, flags=0):
+    """
+    This function writes decompressed blocks in a file opened in binary
+    mode. The records of a FASTA or FASTQ file are written in FASTA format,
+    a header line followed by the sequence on a single line.
+
+    Parameters
+    ----------
+    file : file opened in binary mode
+    sequences : iterable of (name, block) as given by read_decompressed
+    flags : flags of the header of the compressed file
+    """
+    first = True
+    for name, sequence in sequences:
+        if flags & FLAG_RECORDS and name is not None:
+            start = b">" if first else b"\n>"
+            file.write(start + name.encode("utf-8") + b"\n")
+            first = False
+        file.write(sequence.encode("ascii"))
+    if flags & FLAG_RECORDS and not first:
+        file.write(b"\n")
+
+
+
+@contextmanager
+def replace_output(file):
+    """
+    This function opens a temporary file next to a created file, which
+    replaces the created file once it is completely written : the created
+    file is never left partially written (nor an existing file overwritten)
+    when an error occurs.
+
+    Returns
+    -------
+    open_file : temporary file opened in binary writing mode
+    """
+    temporary = "%s.%d.tmp" % (file, os.getpid())
+    try:
+        with open(temporary, "wb") as open_file:
+            yield open_file
+        os.replace(temporary, file)
+    except BaseException:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+
+
+def compress_file(file, created_file=None, block_size=DEFAULT_BLOCK_SIZE, bwt=True,
+                  workers=1, max_pending=None, mtf=False, rle=False, stats=None,
+                  keep_case=False, coder="huffman", table=None):
+    """
+    This function compresses a file block by block, each block is written
+    in the compressed file as soon as it is compressed.
+    With several workers the blocks are compressed in parallel
+    and written in their order.
+
+    Parameters
+    ----------
+    file : path of the text, FASTA or FASTQ file containing the sequences
+    created_file : path of the compressed file, by default the file path
+    ending with _bwt_compressed.txt (or _compressed.txt without bwt)
+    block_size : number of letters of a block
+    bwt : if True the bwt of each block is compressed
+    workers : number of processes compressing the blocks
+    max_pending : maximal number of blocks being compressed at once
+    mtf : if True the move-to-front stage is applied before the compression
+    rle : if True the runs of zeros of the move-to-front stage are coded
+    stats : dictionnary filled with the time and letters of each stage
+    keep_case : if True the lower case letters (soft-masked bases) are kept,
+    else the sequence is converted in upper case
+    coder : entropy coder of the blocks, "huffman" or "rans"
+    table : (identifier, code lengths) of a shared code table, if given
+
+    Returns
+    -------
+    created_file : path of the compressed file
+    """
+    check_block_size(block_size)
+    flags = stage_flags(bwt, mtf, rle, coder)
+    if created_file is None:
+        suffix = "_bwt_compressed.txt" if bwt else "_compressed.txt"
+        created_file = os.path.splitext(file)[0] + suffix
+
+    with replace_output(created_file) as file_comp:
+        #the names of the records of a FASTA or FASTQ file are saved
+        if detect_format(file) != "text":
+            flags |= FLAG_RECORDS
+        write_compressed(file_comp, read_blocks(file, block_size, keep_case), block_size,
+                         flags, workers, max_pending, stats, table)
+    return created_file
+
+
+
+def append_file(file_comp, file, workers=1, max_pending=None, reuse_codes=False, stats=None,
+                keep_case=False):
+    """
+    This function adds the sequences of a file at the end of a compressed
+    file : only the new sequences are compressed, in new blocks written
+    after the last block, and the block index is written again after them.
+    The existing blocks are neither read nor rewritten.
+
+    Parameters
+    ----------
+    file_comp : path of the compressed file, with a block index
+    file : path of the text, FASTA or FASTQ file containing the new sequences,
+    of the same format as the compressed sequences (text or records)
+    workers : number of processes compressing the blocks
+    max_pending : maximal number of blocks being compressed at once
+    reuse_codes : if True the Huffman codes of the last block are reused
+    for the new blocks when they are compatible
+    stats : dictionnary filled with the time and letters of each stage
+    keep_case : if True the lower case letters (soft-masked bases) are kept
+
+    Returns
+    -------
+    file_comp : path of the compressed file
+    """
+    with open(file_comp, "r+b") as archive:
+        header, blocks = open_container(archive)
+        if header["version"] != VERSION:
+            raise ValueError("The files in the former format cannot be appended")
+        flags = header["flags"]
+        if (detect_format(file) != "text") != bool(flags & FLAG_RECORDS):
+            raise ValueError("The file and the compressed file must both contain records "
+                             "(FASTA/FASTQ) or both a plain sequence")
+        entries = block_index(archive, header, blocks)
+        reference = None
+        if reuse_codes and entries and not flags & FLAG_RANS:
+            archive.seek(entries[-1][0])
+            reference = read_block(archive, flags, header.get("shared"))["code_lengths"]
+        new_blocks = read_blocks(file, header["block_size"] or DEFAULT_BLOCK_SIZE, keep_case)
+        remove_index(archive)
+        end = archive.tell()
+        try:
+            new_entries = write_blocks(archive, new_blocks, flags, list(entries), workers,
+                                       max_pending, stats, reference, header.get("shared"))
+        except BaseException:
+            #an invalid sequence leaves the compressed file as it was
+            archive.seek(end)
+            archive.truncate()
+            write_end(archive)
+            write_index(archive, entries)
+            raise
+        write_end(archive)
+        write_index(archive, new_entries)
+    return file_comp
+
+
+
+def verify_block(block, flags, full=False):
+    """
+    This function checks a block of a compressed file : the checksum of its
+    payload and, with full, the checksum of its decompressed sequence.
+
+    Returns
+    -------
+    error : the description of the problem, None if the block is valid
+    length : number of letters of the decompressed block, None without full
+    """
+    if not flags & FLAG_CHECKSUMS and not full:
+        return None, None
+    if flags & FLAG_CHECKSUMS and zlib.crc32(block["payload"]) != block["payload_crc"]:
+        return "payload checksum", None
+    if not full:
+        return None, None
+    try:
+        sequence = decompress_block(block, flags)
+    except Exception as error:
+        #a corrupted block can fail anywhere in the decoding
+        return str(error) or type(error).__name__, None
+    return None, len(sequence)
+
+
+
+def verify_file(file_comp, workers=1, full=False, max_pending=None):
+    """
+    This function checks the blocks of a compressed file without writing
+    the decompressed sequences. The fast check compares the checksums of
+    the payloads, the full check also decompresses the blocks (in a pool of
+    workers processes) and compares the checksums of the sequences and the
+    lengths given by the block index.
+
+    Returns
+    -------
+    report : dictionnary with the file, the number of blocks, checksums
+    (False for the files created before the checksums, which can only be
+    checked by decompressing them) and errors (list of text lines, empty
+    if the file is valid)
+    """
+    report = {"file": file_comp, "blocks": 0, "checksums": False, "errors": []}
+    try:
+        with open(file_comp, "rb") as open_file:
+            header, blocks = open_container(open_file)
+            flags = header["flags"]
+            report["checksums"] = bool(flags & FLAG_CHECKSUMS)
+            entries = read_index(open_file) if header["version"] == VERSION else None
+            function = partial(verify_block, flags=flags, full=full)
+            for number, (error, length) in enumerate(ordered_map(function, blocks, workers,
+                                                                 max_pending)):
+                report["blocks"] += 1
+                if error is not None:
+                    report["errors"].append("block %d : %s" % (number, error))
+                elif length is not None and entries is not None and number < len(entries) \
+                        and entries[number][2] != length:
+                    report["errors"].append("block %d : length different from the index" % number)
+    except (OSError, ValueError) as error:
+        report["errors"].append(str(error))
+        return report
+    if entries is not None and len(entries) != report["blocks"]:
+        report["errors"].append("the index has %d blocks instead of %d"
+                                % (len(entries), report["blocks"]))
+    return report
+
+
+
+def verify_files(files, workers=1, full=False):
+    """
+    This function checks many compressed files, the files are shared
+    between workers processes.
+
+    Returns
+    -------
+    generator of the reports of the files (see verify_file), in their order
+    """
+    return ordered_map(partial(verify_file, full=full), files, workers)
+
+
+
+def decompressed_path(file_comp, flags):
+    """
+    This function returns the default path of the decompressed file,
+    ending with _decompressed_original.txt for a bwt compressed file
+    or with _decompressed.txt
+    """
+    if flags & FLAG_BWT:
+        suffix = "_decompressed_original.txt"
+    else:
+        suffix = "_decompressed.txt"
+    return os.path.splitext(file_comp)[0] + suffix
+
+
+
+def decompress_file(file_comp, created_file=None, workers=1, max_pending=None):
+    """
+    This function decompresses a compressed file block by block,
+    each block is written in the decompressed file as soon as it is
+    decompressed (and reconstructed for a bwt compressed file).
+    With several workers the blocks are decompressed in parallel
+    and written in their order.
+
+    Parameters
+    ----------
+    file_comp : path of the compressed file
+    created_file : path of the decompressed file, by default the file path
+    ending with _decompressed_original.txt (or _decompressed.txt without bwt)
+    workers : number of processes decompressing the blocks
+    max_pending : maximal number of blocks being decompressed at once
+
+    Returns
+    -------
+    created_file : path of the decompressed file
+    """
+    with open(file_comp, "rb") as open_file:
+        header, sequences = read_decompressed(open_file, workers, max_pending)
+        if created_file is None:
+            created_file = decompressed_path(file_comp, header["flags"])
+
+        #a corrupted block leaves no partial decompressed file
+        with replace_output(created_file) as file:
+            write_sequences(file, sequences, header["flags"])
+    return created_file
+
+
+
+def record_range(open_file, header, entries, record):
+    """
+    This function returns the position of the first letter and the number
+    of letters of a record, given by its number or by its name.
+    """
+    if isinstance(record, str):
+        #the name of a record is saved in its first block
+        numbers = []
+        for offset, start, span, number in entries:
+            if not numbers or numbers[-1] != number:
+                numbers.append(number)
+                open_file.seek(offset)
+                block = read_block(open_file, header["flags"], header["shared"])
+                if block["name"] == record:
+                    break
+        else:
+            raise ValueError("No record named " + record)
+        record = numbers[-1]
+    spans = [(start, span) for offset, start, span, number in entries if number == record]
+    if not spans:
+        raise ValueError("No record number " + str(record))
+    return spans[0][0], sum(span for start, span in spans)
+
+
+
+def extract(file_comp, start, end, record=None):
+    """
+    This function decompresses the letters start to end (excluded) of the
+    sequences of a compressed file. With the block index of the file only
+    the blocks overlapping the range are read and decompressed, the files
+    without index are decompressed from the start up to the range.
+
+    Parameters
+    ----------
+    file_comp : path of the compressed file
+    start : position of the first letter, from 0
+    end : position following the last letter
+    record : number (from 0) or name of a record of a FASTA/FASTQ file,
+    the positions are then counted from the start of the record, else
+    they are counted in the concatenation of all the sequences
+
+    Returns
+    -------
+    region : the letters of the range (str), shorter if the sequences end
+    before end
+    """
+    if start < 0 or end < start:
+        raise ValueError("Invalid range : " + str(start) + "-" + str(end))
+    with open(file_comp, "rb") as open_file:
+        header, blocks = open_container(open_file)
+        entries = read_index(open_file) if header["version"] == VERSION else None
+        if entries is None:
+            if record is None:
+                return extract_sequential(header, blocks, start, end)
+            if header["version"] != VERSION:
+                raise ValueError("This file has no records, it is in the former format")
+            entries = block_index(open_file, header, blocks)
+
+        if record is not None:
+            first, length = record_range(open_file, header, entries, record)
+            start, end = first + start, first + min(end, length)
+        pieces = []
+        for offset, block_start, span, number in entries:
+            if block_start < end and block_start + span > start:
+                open_file.seek(offset)
+                block = read_block(open_file, header["flags"], header["shared"])
+                sequence = decompress_block(block, header["flags"])
+                pieces.append(sequence[max(start - block_start, 0):end - block_start])
+    return "".join(pieces)
+
+
+
+def block_index(open_file, header, blocks):
+    """
+    This function returns the block index of a compressed file in the
+    binary format opened with container.open_container. A file without
+    index (a file of a single block) is read once and its block is
+    decompressed to find its number of letters.
+
+    Parameters
+    ----------
+    open_file : the compressed file, after its header
+    header : header of the file
+    blocks : iterator over the blocks of the file, not started
+
+    Returns
+    -------
+    entries : list of (offset, start, span, record) of the blocks
+    """
+    entries = read_index(open_file)
+    if entries is not None:
+        return entries
+    entries = []
+    start = 0
+    record = -1
+    offset = open_file.tell()
+    for block in blocks:
+        if block["name"] is not None or record < 0:
+            record += 1
+        span = len(decompress_block(block, header["flags"]))
+        entries.append((offset, start, span, record))
+        start += span
+        offset = open_file.tell()
+    return entries
+
+
+
+def extract_sequential(header, blocks, start, end):
+    """
+    This function decompresses the blocks of a file without index one by
+    one, until the end of the range of letters.
+    """
+    pieces = []
+    position = 0
+    for block in blocks:
+        if position >= end:
+            break
+        sequence = decompress_block(block, header["flags"])
+        if position + len(sequence) > start:
+            pieces.append(sequence[max(start - position, 0):end - position])
+        position += len(sequence)
+    return "".join(pieces)
+
+
+
+def format_stats(stats):
+    """
+    This function returns the throughput of each stage as text lines.
+    """
+    lines = []
+    for stage, (seconds, size) in stats.items():
+        speed = size / seconds / 1e6 if seconds else float("inf")
+        lines.append("%-8s %10d letters %8.3f s %8.2f MB/s" % (stage, size, seconds, speed))
+    return "\n".join(lines)
@@ -4,211 +4,354 @@
 This script contains functions related to the interface
 """
 from tkinter import Tk,Label, Button
+from tkinter.ttk import Progressbar
 from burrows_wheeler_transform import * 
 from huffman import *
+from cache import DEFAULT_CACHE_DIR, configure, get_cache
+from jobs import Job, file_size
+from viewer import SequenceViewer
 
 
         
-def cut_display(seq_view): 
+#interval between two readings of the messages of the running job (ms)
+POLL_DELAY = 100
+
+#stages measured during each operation, used to estimate its progress
+TRANSFORM_STAGES = ["validation", "suffix_array", "bwt"]
+INVERSION_STAGES = ["lf_mapping", "lf_inverse"]
+COMPRESSION_STAGES = ["huffman_tree", "huffman_encode"]
+BWT_COMPRESSION_STAGES = TRANSFORM_STAGES + COMPRESSION_STAGES
+DECOMPRESSION_STAGES = ["huffman_decode"]
+DECOMPRESSION_INVERSION_STAGES = DECOMPRESSION_STAGES + INVERSION_STAGES
+
+#job running in the worker process, None when no job is running
+job = None
+
+
+
+def start_job(function, stages, show):
     """
-    This function allows a better display of elements in the labels 
-    it cut element each 30 characteres and add a \n to make a return to the line 
+    This function asks a file in a dialog window and runs the operation
+    on this file in a worker process, so the window keeps responding.
+    The messages of the worker are read every POLL_DELAY milliseconds.
+
+    Parameters
+    ----------
+    function : function performing the operation on the file path,
+    defined at module level
+    stages : stages measured during the operation, for the progress bar
+    show : function displaying the result of the operation
     """
-    seq_list = []
-    for i in range(0,len(seq_view), 30): 
-        sequence = seq_view[i:i+30]
-        seq_list.append(sequence)
-        
-    display_seq = "\n".join(seq_list)
-        
-    return display_seq
-    
+    global job
+    if job is not None:
+        return
+    file = filedialog.askopenfilename(title="Select a txt file",
+                                      filetypes=[("Text file", ".txt")])
+    if not file:
+        return
+
+    job = Job(function, (file,), stages, file_size(file)).start()
+    for button in action_buttons:
+        button.configure(state="disabled")
+    button_cancel.configure(state="normal")
+    label_status.configure(text="Running : " + os.path.basename(file))
+    window.after(POLL_DELAY, poll_job, show)
+
+
+
+def poll_job(show):
+    """
+    This function reads the messages of the running job, updates the
+    progress bar and displays the result once the job is done.
+    """
+    global job
+    finished = job.poll()
+    progress_bar.configure(value=100 * job.progress.fraction())
+    if not finished:
+        window.after(POLL_DELAY, poll_job, show)
+        return
+
+    done, job = job, None
+    for button in action_buttons:
+        button.configure(state="normal")
+    button_cancel.configure(state="disabled")
+    progress_bar.configure(value=0)
+    if done.cancelled:
+        label_status.configure(text="Cancelled")
+    elif done.error is not None:
+        label_status.configure(text="Error")
+        messagebox.showwarning("Error", done.error)
+    else:
+        label_status.configure(text="Done")
+        show(done.result)
+
+
+
+def cancel_job():
+    """
+    This function stops the running job, the window stays open.
+    """
+    if job is not None:
+        job.cancel()
+
+
+
+def close_window():
+    """
+    This function stops the running job and closes the window.
+    """
+    cancel_job()
+    window.quit()
+
+
+
+def show_transform(result):
+    """
+    This function shows the orginal sequence with the added $ and
+    the transformed sequence given by save_transform_path.
+    """
+    seq, bwt, created_file = result
+    viewer_bwt1.show([("Original sequence", seq), ("Bwt sequence", bwt)])
+    messagebox.showinfo("Information", "Your bwt result has been saved in " + created_file + ".")
+
 
 
 def bwt_interface() :
     """
-    This function retrieve the orginal sequence and bwt sequence from the 
-    save_transform function, and change the text in a label to show
-    the orginal sequence with the added $ and the transformed sequence.
+    This function performs the bwt of a file in a worker process
+    and shows the orginal sequence and the bwt sequence.
     """
-    seq, bwt = save_transform()
-    display_seq = cut_display(seq)
-    display_bwt = cut_display(bwt)
-    
-    label_bwt1.configure(text="Original sequence \n" + display_seq +"\n" +"\n"+ \
-                               "Bwt sequence \n"+display_bwt)
+    start_job(save_transform_path, TRANSFORM_STAGES, show_transform)
 
 
 
-def bwt_inversion():
+def show_inversion(result):
     """
-    This function retrieve the bwt sequence and sequence reconstructed 
-    from the bwt_inverse function , and change the text in a label to show
-    the bwt sequence and the result of detransformation 
-    corresponding to the original sequence. 
+    This function shows the bwt sequence and the result of the
+    detransformation given by bwt_inverse_path.
     """
-    bwt,inverse_bwt = bwt_inverse()
-    display_bwt = cut_display(bwt)
-    display_seq = cut_display(inverse_bwt)
+    bwt, inverse_bwt, created_file = result
+    viewer_bwtinv1.show([("Bwt sequence", bwt), ("Original sequence", inverse_bwt)])
+    messagebox.showinfo("Information", "Your bwt inversion has been saved in "
+                        + created_file + " file.")
+
 
-    label_bwtinv1.configure(text= "Bwt sequence \n" + display_bwt +"\n" + "\n" 
-                               "Original sequence "+"\n"+ display_seq)
+
+def bwt_inversion():
+    """
+    This function performs the bwt reconstruction of a file in a worker
+    process and shows the bwt sequence and the original sequence.
+    """
+    start_job(bwt_inverse_path, INVERSION_STAGES, show_inversion)
     
     
 
 
+def show_compression(result):
+    """
+    This function shows the sequence not compressed, the binary sequence and
+    the utf-8 sequence (compressed sequence) given by save_compression_path.
+    """
+    comp_seq, binary_seq, seq, created_file = result
+    viewer_compression1.show([("DNA sequence", seq), ("Binary sequence", binary_seq),
+                              ("UTF-8 sequence", comp_seq)])
+    messagebox.showinfo("Information", "Your compression has been saved in "
+                        + created_file + " file.")
+
+
+
 def huffman_compression(): 
     """
-    This function retrieves the sequence not compressed, the binary sequence and
-    the utf-8 sequence (compressed sequence), and display them in a label
+    This function compresses a file in a worker process and shows the
+    sequence, the binary sequence and the utf-8 sequence.
     """
-    comp_seq, binary_seq, seq = save_compression()
-    display_binseq = cut_display(binary_seq)
-    display_comp = cut_display(comp_seq)
-    display_seq = cut_display(seq)
-    
-    label_compression1.configure( text =" DNA sequence \n" + display_seq +"\n" + "\n" 
-                                       "Binary sequence "+"\n"+ display_binseq +"\n" + "\n"+ 
-                                           "UTF-8 sequence "+"\n"+ display_comp )
+    start_job(save_compression_path, COMPRESSION_STAGES, show_compression)
             
         
         
-def bwt_and_compression():
+def show_bwt_compression(result):
     """
-    This function retrieves the bwt sequence not compressed, the binary sequence and
-    the utf-8 sequence (compressed sequence), and display them in a label. 
+    This function shows the bwt sequence not compressed, the binary sequence and
+    the utf-8 sequence (compressed sequence) given by bwt_binary_conversion_path.
     """
-    seq, binary_seq, comp_seq = bwt_binary_conversion()
-    display_seq = cut_display(seq)
-    display_binseq = cut_display(binary_seq)
-    display_comp = cut_display(comp_seq)
+    seq, binary_seq, comp_seq, created_file = result
+    viewer_compression2.show([("BWT sequence", seq), ("Binary sequence", binary_seq),
+                              ("UTF-8 sequence", comp_seq)])
+    messagebox.showinfo("Information", "Your compression has been saved in "
+                        + created_file + " file.")
 
-    label_compression2.configure( text =" BWT sequence \n" + display_seq +"\n" + "\n" 
-                                   "Binary sequence "+"\n"+ display_binseq +"\n" + "\n"+ 
-                                       "UTF-8 sequence "+"\n"+ display_comp )
-    
-        
-def huffman_decompression(): 
+
+
+def bwt_and_compression():
     """
-    This function retrieves the compressed sequence, the binary sequence and
-    the decompressed sequence, and display them in a label. 
+    This function performs the bwt and the compression of a file in a
+    worker process and shows the bwt, binary and utf-8 sequences.
     """
-    comp_seq, dna_seq, bin_seq = save_decompression()
-    print(comp_seq, dna_seq, bin_seq)
-    display_comp = cut_display(comp_seq)
-    display_binseq = cut_display(bin_seq)
-    display_seq = cut_display(dna_seq)
+    start_job(bwt_binary_conversion_path, BWT_COMPRESSION_STAGES, show_bwt_compression)
     
-    label_decompression1.configure( text =" UTF-8 sequence \n" + display_comp +"\n" + 
-    								"\n"+"Binary sequence "+"\n"+ display_binseq +"\n" + "\n" + 
-                                        "Decompressed sequence "+"\n"+ display_seq )
-
-        
         
-        
-def decompression_bwtinversion(): 
+def show_decompression(result):
     """
-    This function retrieves the compressed sequence, the decompressed bwt sequence and
-    the reconstructed original sequence, and display them in a label. 
+    This function shows the compressed sequence, the binary sequence and
+    the decompressed sequence given by save_decompression_path.
     """
-    dna_seq, comp_seq, inverse_bwt = decompression_inversion()
-    comp_seq = cut_display(comp_seq)
-    dna_seq = cut_display(dna_seq)
-    inverse_bwt = cut_display(inverse_bwt)
+    comp_seq, dna_seq, bin_seq, created_file = result
+    viewer_decompression1.show([("UTF-8 sequence", comp_seq), ("Binary sequence", bin_seq),
+                                ("Decompressed sequence", dna_seq)])
+    messagebox.showinfo("Information", "Your decompression has been saved in "
+                        + created_file + ".")
 
-    label_decompression2.configure(text =" UTF-8 sequence \n" + comp_seq +"\n" + "\n" 
-                                "Decompressed BWT sequence  "+"\n"+ dna_seq +"\n" + "\n"+ 
-                                    "Original sequence "+"\n"+ inverse_bwt)
 
 
-        
-#Creation of the main interface 
-window = Tk()
-window.title("BWT & Huffman compression")
-
-##############################################################################
-##############################################################################
-
-#Creation of informative labels above the buttons 
-label_info1= Label(window, text = "BWT \n one-step \n without compression")
-#label_info2= Label(window, text = "BWT \n step-by-step \n without compression")
-label_info3=Label(window,text="BWT reconstruction \n one-step \n without compression")
-#label_info4=Label(window,text="BWT reconstruction \n step-by-step \n without compression")
-
-label_info5= Label(window, text = "Single \n Huffman compression")
-label_info6= Label(window, text = "BWT \n & \n Huffman compression ")
-label_info7 = Label(window, text = "Single decompression")
-label_info8 = Label(window, text = "Decompression \n & \n BWT reconstruction ")
-
-
-#gridding informatives
-label_info1.grid(row=1, column=2,padx=5, pady=5)
-#label_info2.grid(row=1, column=2,padx=5, pady=5)
-label_info3.grid(row=1, column=3,padx=5, pady=5)
-#label_info4.grid(row=1, column=4,padx=5, pady=5)
-
-label_info5.grid(row=4, column=1,padx=5, pady=5)
-label_info6.grid(row=4, column=2,padx=5, pady=5)
-label_info7.grid(row=4, column=3,padx=5, pady=5)
-label_info8.grid(row=4, column=4,padx=5, pady=5)
-
-##############################################################################
-##############################################################################
-
-#button creation 
-button1= Button(window, text = "BWT", height=3, width=17, command = bwt_interface)
-#button2= Button(window,height=3, width=17, text="   >   ", command=transform_step)
-button3=Button(window, text="BWT reconstruction",height=3, width=17, command = bwt_inversion)
-#button4=Button(window, text="Reconstruction matrix",height=3, width=17)
-
-button5= Button(window, text="Compress",height=3, width=17, command = huffman_compression)
-button6= Button(window, text="BWT \n + \n compress",height=3, width=17, command= bwt_and_compression)
-button7 = Button(window, text="Decompress", height=3, width=17, command = huffman_decompression)
-button8 = Button(window, text="Decompress \n + \n BWT reconstruction"
-                                  ,height=3, width=17, command=decompression_bwtinversion)
-
-#button grid 
-button1.grid(row=2, column=2,padx=5, pady=5)
-#button2.grid(row=2, column=2, padx=5, pady=5)
-button3.grid(row=2, column=3, padx=5, pady=5)
-#button4.grid(row=2, column=4, padx=5, pady=5)
-
-button5.grid(row=5, column=1,padx=5, pady=5)
-button6.grid(row=5, column=2,padx=5, pady=5)
-button7.grid(row=5, column=3, padx=5, pady=5)
-button8.grid(row=5, column=4, padx=5, pady=5)
-
-##############################################################################
-##############################################################################
-    
-#creation of labels containing the results below the buttons 
-label_bwt1= Label(window,bg="white",text = "",justify="left", height=15, width=32)
-#label_bwt2 = Label(window,bg="white",text = "",justify="left", height=15, width=32)
-label_bwtinv1=Label(window,bg="white",text="",justify="left",height=15, width=32)
-#label_bwtinv2=Label(window,bg="white",text="",justify="left",height=15, width=32)
-
-label_compression1= Label(window,bg="white", justify="left",text ="",height=15, width=32)
-label_compression2 = Label(window,bg="white", justify="left", text = "",height=15, width=32)
-label_decompression1 = Label(window,bg="white", justify="left",text = "",height=15, width=32)
-label_decompression2= Label(window,bg="white",justify="left",text = "",height=15, width=32)
-
+def huffman_decompression(): 
+    """
+    This function decompresses a file in a worker process and shows the
+    compressed, binary and decompressed sequences.
+    """
+    start_job(save_decompression_path, DECOMPRESSION_STAGES, show_decompression)
 
-#result label grid 
-label_bwt1.grid(row=3, column=2,padx=5, pady=5)
-#label_bwt2.grid(row=3, column=2,padx=5, pady=5)
-label_bwtinv1.grid(row=3, column=3,padx=5, pady=5)
-#label_bwtinv2.grid(row=3, column=4,padx=5, pady=5)
+        
+        
+def show_decompression_inversion(result):
+    """
+    This function shows the compressed sequence, the decompressed bwt sequence and
+    the reconstructed original sequence given by decompression_inversion_path.
+    """
+    dna_seq, comp_seq, inverse_bwt, created_file = result
+    viewer_decompression2.show([("UTF-8 sequence", comp_seq),
+                                ("Decompressed BWT sequence", dna_seq),
+                                ("Original sequence", inverse_bwt)])
+    messagebox.showinfo("Information", "Your decompressed and bwt reconstruction has been saved in "
+                        + created_file + " file.")
 
-label_compression1.grid(row=6, column=1, padx=5, pady=5)
-label_compression2.grid(row=6, column=2, padx=5, pady=5)
-label_decompression1.grid(row=6, column=3,padx=5, pady=5)
-label_decompression2.grid(row=6, column=4,padx=5, pady=5)
 
-##############################################################################
-##############################################################################
 
-#lauch the interface
-window.mainloop()
-window.destroy()
+def decompression_bwtinversion(): 
+    """
+    This function performs the decompression and the bwt reconstruction
+    of a file in a worker process and shows the compressed sequence,
+    the decompressed bwt sequence and the original sequence.
+    """
+    start_job(decompression_inversion_path, DECOMPRESSION_INVERSION_STAGES,
+              show_decompression_inversion)
 
 
+        
+def main():
+    """
+    This function creates the main interface and launches it.
+    """
+    global viewer_bwt1, viewer_bwtinv1, viewer_compression1, viewer_compression2
+    global viewer_decompression1, viewer_decompression2
+    global window, action_buttons, button_cancel, progress_bar, label_status
+
+    #the results are kept in the cache so the operations repeated
+    #on the same sequence reuse them
+    if get_cache() is None:
+        configure(DEFAULT_CACHE_DIR)
+
+    #Creation of the main interface 
+    window = Tk()
+    window.title("BWT & Huffman compression")
+    window.protocol("WM_DELETE_WINDOW", close_window)
+
+    ##############################################################################
+    ##############################################################################
+
+    #Creation of informative labels above the buttons 
+    label_info1= Label(window, text = "BWT \n one-step \n without compression")
+    #label_info2= Label(window, text = "BWT \n step-by-step \n without compression")
+    label_info3=Label(window,text="BWT reconstruction \n one-step \n without compression")
+    #label_info4=Label(window,text="BWT reconstruction \n step-by-step \n without compression")
+
+    label_info5= Label(window, text = "Single \n Huffman compression")
+    label_info6= Label(window, text = "BWT \n & \n Huffman compression ")
+    label_info7 = Label(window, text = "Single decompression")
+    label_info8 = Label(window, text = "Decompression \n & \n BWT reconstruction ")
+
+
+    #gridding informatives
+    label_info1.grid(row=1, column=2,padx=5, pady=5)
+    #label_info2.grid(row=1, column=2,padx=5, pady=5)
+    label_info3.grid(row=1, column=3,padx=5, pady=5)
+    #label_info4.grid(row=1, column=4,padx=5, pady=5)
+
+    label_info5.grid(row=4, column=1,padx=5, pady=5)
+    label_info6.grid(row=4, column=2,padx=5, pady=5)
+    label_info7.grid(row=4, column=3,padx=5, pady=5)
+    label_info8.grid(row=4, column=4,padx=5, pady=5)
+
+    ##############################################################################
+    ##############################################################################
+
+    #button creation 
+    button1= Button(window, text = "BWT", height=3, width=17, command = bwt_interface)
+    #button2= Button(window,height=3, width=17, text="   >   ", command=transform_step)
+    button3=Button(window, text="BWT reconstruction",height=3, width=17, command = bwt_inversion)
+    #button4=Button(window, text="Reconstruction matrix",height=3, width=17)
+
+    button5= Button(window, text="Compress",height=3, width=17, command = huffman_compression)
+    button6= Button(window, text="BWT \n + \n compress",height=3, width=17, command= bwt_and_compression)
+    button7 = Button(window, text="Decompress", height=3, width=17, command = huffman_decompression)
+    button8 = Button(window, text="Decompress \n + \n BWT reconstruction"
+                                      ,height=3, width=17, command=decompression_bwtinversion)
+
+    #button grid 
+    button1.grid(row=2, column=2,padx=5, pady=5)
+    #button2.grid(row=2, column=2, padx=5, pady=5)
+    button3.grid(row=2, column=3, padx=5, pady=5)
+    #button4.grid(row=2, column=4, padx=5, pady=5)
+
+    button5.grid(row=5, column=1,padx=5, pady=5)
+    button6.grid(row=5, column=2,padx=5, pady=5)
+    button7.grid(row=5, column=3, padx=5, pady=5)
+    button8.grid(row=5, column=4, padx=5, pady=5)
+
+    #the buttons are disabled while a job is running
+    action_buttons = [button1, button3, button5, button6, button7, button8]
+
+    ##############################################################################
+    ##############################################################################
+
+    #creation of the viewers containing the results below the buttons,
+    #they only display the visible lines of the sequences
+    viewer_bwt1 = SequenceViewer(window)
+    #viewer_bwt2 = SequenceViewer(window)
+    viewer_bwtinv1 = SequenceViewer(window)
+    #viewer_bwtinv2 = SequenceViewer(window)
+
+    viewer_compression1 = SequenceViewer(window)
+    viewer_compression2 = SequenceViewer(window)
+    viewer_decompression1 = SequenceViewer(window)
+    viewer_decompression2 = SequenceViewer(window)
+
+
+    #result viewer grid 
+    viewer_bwt1.grid(row=3, column=2,padx=5, pady=5)
+    #viewer_bwt2.grid(row=3, column=2,padx=5, pady=5)
+    viewer_bwtinv1.grid(row=3, column=3,padx=5, pady=5)
+    #viewer_bwtinv2.grid(row=3, column=4,padx=5, pady=5)
+
+    viewer_compression1.grid(row=6, column=1, padx=5, pady=5)
+    viewer_compression2.grid(row=6, column=2, padx=5, pady=5)
+    viewer_decompression1.grid(row=6, column=3,padx=5, pady=5)
+    viewer_decompression2.grid(row=6, column=4,padx=5, pady=5)
+
+    ##############################################################################
+    ##############################################################################
+
+    #progress of the running job and button to cancel it
+    progress_bar = Progressbar(window, orient="horizontal", mode="determinate", maximum=100)
+    button_cancel = Button(window, text="Cancel", width=17, state="disabled", command=cancel_job)
+    label_status = Label(window, text="")
+
+    progress_bar.grid(row=7, column=1, columnspan=3, sticky="ew", padx=5, pady=5)
+    button_cancel.grid(row=7, column=4, padx=5, pady=5)
+    label_status.grid(row=8, column=1, columnspan=4, sticky="w", padx=5, pady=5)
+
+    ##############################################################################
+    ##############################################################################
+
+    #lauch the interface
+    window.mainloop()
+    window.destroy()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+viewer script contains the widget displaying the results in the
+interface : only the visible lines are written in the widget, and they
+are read from the sequences when the widget is scrolled, so the display
+does not depend on the length of the sequences.
+"""
+from tkinter import Frame, Scrollbar, Text
+from bisect import bisect_right
+
+
+class SequenceViewer(Frame):
+    """
+    A class of widget showing titled sequences cut in lines of
+    line_length letters, with a vertical scrollbar.
+
+    Attributes
+    ----------
+    sections : list of (title, sequence), a sequence can be any object
+    with a length and slices (str, PackedBits)
+    offsets : number of the first line of each section
+    total : number of lines of all the sections
+    top : number of the first visible line
+    """
+    def __init__(self, master, height=15, width=32, line_length=30):
+        Frame.__init__(self, master)
+        self.height = height
+        self.line_length = line_length
+        self.sections = []
+        self.offsets = []
+        self.total = 0
+        self.top = 0
+
+        self.text = Text(self, bg="white", height=height, width=width,
+                         wrap="none", state="disabled")
+        self.scrollbar = Scrollbar(self, orient="vertical", command=self.scroll)
+        self.text.grid(row=0, column=0)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        #mouse wheel on Windows/macOS and on Linux
+        self.text.bind("<MouseWheel>", self.wheel)
+        self.text.bind("<Button-4>", self.wheel)
+        self.text.bind("<Button-5>", self.wheel)
+
+    def show(self, sections):
+        """
+        This method replaces the displayed sequences.
+
+        Parameters
+        ----------
+        sections : list of (title, sequence)
+        """
+        self.sections = list(sections)
+        self.offsets = []
+        self.total = 0
+        for title, sequence in self.sections:
+            self.offsets.append(self.total)
+            #title, lines of the sequence and an empty line
+            self.total += 2 + -(-len(sequence) // self.line_length)
+        self.top = 0
+        self.render()
+
+    def line(self, number):
+        """
+        This method returns the text of a line, only this slice of the
+        sequence is read.
+        """
+        index = bisect_right(self.offsets, number) - 1
+        title, sequence = self.sections[index]
+        row = number - self.offsets[index]
+        if row == 0:
+            return title
+        start = (row - 1) * self.line_length
+        return str(sequence[start:start + self.line_length])
+
+    def render(self):
+        """
+        This method writes the visible lines in the widget.
+        """
+        stop = min(self.top + self.height, self.total)
+        lines = [self.line(number) for number in range(self.top, stop)]
+        self.text.configure(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", "\n".join(lines))
+        self.text.configure(state="disabled")
+        if self.total:
+            self.scrollbar.set(self.top / self.total, stop / self.total)
+        else:
+            self.scrollbar.set(0, 1)
+
+    def scroll(self, action, amount, unit=None):
+        """
+        This method moves the visible lines, called by the scrollbar
+        with ("moveto", fraction) or ("scroll", number, "units"/"pages").
+        """
+        if action == "moveto":
+            top = int(float(amount) * self.total)
+        else:
+            step = self.height if unit == "pages" else 1
+            top = self.top + int(amount) * step
+        self.top = max(0, min(top, self.total - self.height))
+        self.render()
+
+    def wheel(self, event):
+        """
+        This method scrolls three lines for each step of the mouse wheel.
+        """
+        if event.num == 4 or event.delta > 0:
+            self.scroll("scroll", -3)
+        else:
+            self.scroll("scroll", 3)
+        return "break"
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Shared fixtures of the tests : the scripts of Algo_Project are imported
+by their name, like the scripts import each other.
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                 "Algo_Project"))
+
+
+def random_sequence(length, letters="ACGT", seed=0):
+    """
+    This function returns a reproducible random sequence.
+    """
+    generator = random.Random(seed)
+    return "".join(generator.choice(letters) for i in range(length))
+
+
+
+@pytest.fixture
+def text_file(tmp_path):
+    """
+    A plain sequence of 5000 letters with a gap of N.
+    """
+    sequence = random_sequence(2500, seed=1) + "N" * 200 + random_sequence(2300, seed=2)
+    path = tmp_path / "sequence.txt"
+    path.write_text(sequence)
+    return str(path), sequence
+
+
+
+@pytest.fixture
+def fasta_file(tmp_path):
+    """
+    A FASTA file of three records, the second one longer than a block of 1000.
+    """
+    records = [("first", random_sequence(700, seed=3)),
+               ("second", random_sequence(2600, "ACGTN", seed=4)),
+               ("third", random_sequence(90, seed=5))]
+    path = tmp_path / "records.fa"
+    path.write_text("".join(">%s\n%s\n" % record for record in records))
+    return str(path), records
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Transform and inversion of files through the memory-mapped paths.
+"""
+
+import pytest
+
+import api
+from fm_index import FMIndex, index_path
+
+from conftest import random_sequence
+
+
+@pytest.mark.parametrize("engine", ["sais", "rotation"])
+def test_transform_inverse_file(tmp_path, engine):
+    sequence = random_sequence(800, "ACGTN", seed=16)
+    path = tmp_path / "sequence.txt"
+    path.write_text(sequence[:400] + "\n" + sequence[400:].lower() + "\n")
+    bwt_file = api.transform_file(str(path), engine=engine)
+    assert bwt_file == str(tmp_path / "sequence_bwt.txt")
+    with open(bwt_file) as file:
+        assert file.read() == api.transform_sequence(sequence)
+    assert FMIndex.load(index_path(bwt_file)).count("ACG") == sequence.count("ACG")
+    created = api.inverse_file(bwt_file)
+    assert created == str(tmp_path / "sequence_bwt_inversion.txt")
+    with open(created) as file:
+        assert file.read() == sequence
+
+
+def test_inverse_line_breaks(tmp_path):
+    sequence = random_sequence(100, seed=17)
+    bwt = api.transform_sequence(sequence)
+    path = tmp_path / "lines_bwt.txt"
+    path.write_text(bwt[:50] + "\r\n" + bwt[50:] + "\n")
+    with open(api.inverse_file(str(path), str(tmp_path / "out.txt"))) as file:
+        assert file.read() == sequence
+
+
+def test_empty_files(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.write_text("")
+    bwt_file = api.transform_file(str(path), index=False)
+    with open(bwt_file) as file:
+        assert file.read() == "$"
+    with open(api.inverse_file(bwt_file)) as file:
+        assert file.read() == ""
+    with pytest.raises(ValueError):
+        api.inverse_file(str(path))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Append mode : new blocks written at the end of a compressed file.
+"""
+
+import pytest
+
+from container import open_container, read_index
+from streaming import append_file, compress_file, decompress_file
+
+
+@pytest.mark.parametrize("reuse_codes", [False, True])
+@pytest.mark.parametrize("block_size", [1000, 1 << 20])
+def test_append(tmp_path, text_file, block_size, reuse_codes):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), block_size)
+    append_file(created, path, reuse_codes=reuse_codes)
+    append_file(created, path, workers=2)
+    result = decompress_file(created, str(tmp_path / "out.txt"))
+    with open(result) as file:
+        assert file.read() == sequence * 3
+    with open(created, "rb") as file:
+        open_container(file)
+        entries = read_index(file)
+    assert entries[-1][1] + entries[-1][2] == 3 * len(sequence)
+
+
+def test_append_records(tmp_path, fasta_file, text_file):
+    path, records = fasta_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    append_file(created, path)
+    result = decompress_file(created, str(tmp_path / "out.fa"))
+    with open(result) as file:
+        assert file.read() == 2 * "".join(">%s\n%s\n" % record for record in records)
+    with pytest.raises(ValueError):
+        append_file(created, text_file[0])
+
+
+def test_append_invalid_file_keeps_archive(tmp_path, text_file):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    with open(created, "rb") as file:
+        before = file.read()
+    invalid = tmp_path / "invalid.txt"
+    invalid.write_text("ACGT" * 500 + "X")
+    with pytest.raises(ValueError):
+        append_file(created, str(invalid))
+    with open(created, "rb") as file:
+        assert file.read() == before
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compression of directories : every file gets a report, the failed ones
+with their error. The sizes of the compressed files are saved as varints.
+"""
+
+import pytest
+
+import batch
+from container import open_container, pack_varint, read_index, unpack_varint
+from streaming import compress_file, decompress_file
+
+
+def test_compress_directory(tmp_path, text_file, fasta_file):
+    invalid = tmp_path / "invalid.txt"
+    invalid.write_text("ACGTXACGT")
+    output = tmp_path / "archives"
+    report = batch.compress_directory(str(tmp_path), str(output), sample_size=2000)
+    assert (output / (report["table"] + ".dnat")).exists()
+    assert report["files"] == 3 and report["errors"] == 1
+    reports = {file_report["file"]: file_report for file_report in report["reports"]}
+    assert reports[str(invalid)]["error"] is not None
+    assert not (output / "invalid_bwt_compressed.txt").exists()
+    path, sequence = text_file
+    assert reports[path]["error"] is None
+    result = decompress_file(reports[path]["created_file"], str(tmp_path / "out.txt"))
+    with open(result) as file:
+        assert file.read() == sequence
+
+
+def test_compress_one_unexpected_error(tmp_path, text_file, monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("unexpected")
+
+    monkeypatch.setattr(batch, "compress_file", fail)
+    report = batch.compress_one(text_file[0], str(tmp_path))
+    assert report["error"] == "unexpected"
+
+
+def test_single_block_has_no_index(tmp_path, text_file):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1 << 20)
+    with open(created, "rb") as file:
+        header, blocks = open_container(file)
+        assert len(list(blocks)) == 1
+        assert read_index(file) is None
+
+
+@pytest.mark.parametrize("value", [0, 1, 127, 128, 300, 1 << 20, (1 << 63) + 5])
+def test_varint(value):
+    data = b"x" + pack_varint(value)
+    assert unpack_varint(data, 1) == (value, len(data))
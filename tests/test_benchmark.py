@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the stages on a small synthetic sequence.
+"""
+
+import pytest
+
+import benchmark
+
+
+def test_run_benchmark():
+    results = benchmark.run_benchmark([300], ["uniform"], ["compress", "decompress"], repeat=1,
+                                      memory=False)
+    assert [result["stage"] for result in results] == ["compress", "decompress"]
+    with pytest.raises(ValueError):
+        benchmark.run_benchmark([300], ["uniform"], ["compress"], repeat=0)
+
+
+@pytest.mark.parametrize("arguments", [["--repeat", "0"], ["--sizes", "1000", "-5"],
+                                       ["--sizes", "0"]])
+def test_invalid_arguments(arguments):
+    with pytest.raises(SystemExit) as error:
+        benchmark.parse_arguments(arguments)
+    assert error.value.code == 2
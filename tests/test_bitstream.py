@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NumPy backend of the bit packing, compared with the pure python functions.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("numpy")
+
+import huffman
+from bitstream import encode_symbols, pack_string, unpack_string
+from huffman import huffman_tree_code
+
+from conftest import random_sequence
+
+
+@pytest.mark.parametrize("bits", ["", "1", "10110", "10110011", "1" * 8001, "0110" * 999])
+def test_pack_string(monkeypatch, bits):
+    monkeypatch.setattr(huffman, "BIT_BACKEND", "python")
+    added, packed = huffman.pack_bits(bits)
+    assert pack_string(bits) == (added, packed)
+    assert unpack_string(packed, added) == bits
+
+
+@pytest.mark.parametrize("length", [1, 7, 8, 1000, 5001])
+def test_encode_symbols(monkeypatch, length):
+    monkeypatch.setattr(huffman, "BIT_BACKEND", "python")
+    sequence = random_sequence(length, "ACGTN", seed=length)
+    huffman_code = huffman_tree_code(sequence + "ACGTN")
+    assert encode_symbols(sequence, huffman_code) == huffman.encode_sequence(sequence,
+                                                                             huffman_code)
+    with pytest.raises(ValueError):
+        encode_symbols(sequence + "$", huffman_code)
+
+
+def test_numpy_imported_on_first_use():
+    code = ("import sys, bitstream\n"
+            "assert 'numpy' not in sys.modules and 'dialogs' not in sys.modules\n"
+            "bitstream.pack_string('101')\n"
+            "assert 'numpy' in sys.modules\n")
+    subprocess.run([sys.executable, "-c", code], check=True,
+                   cwd=os.path.dirname(os.path.abspath(huffman.__file__)))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Burrows-Wheeler transform : the SA-IS suffix array compared with the
+sorted suffixes and with the rotation matrix, and its inversion with
+the LF-mapping.
+"""
+
+import pytest
+
+import api
+from burrows_wheeler_transform import bwt_from_sequence, lf_inverse, rotation_bwt, suffix_array
+
+from conftest import random_sequence
+
+SEQUENCES = ["A", "AAAAAAAA", "ACGTACGTACGT", "GATTACA", "NNNNACGTNNNN",
+             random_sequence(300, "ACGTN", seed=8), random_sequence(500, "AC", seed=9),
+             "ACG" * 50 + "T" + "ACG" * 50]
+
+
+@pytest.mark.parametrize("sequence", SEQUENCES)
+def test_suffix_array(sequence):
+    data = (sequence + "$").encode("ascii")
+    assert list(suffix_array(data)) == sorted(range(len(data)), key=lambda i: data[i:])
+
+
+@pytest.mark.parametrize("sequence", SEQUENCES)
+def test_sais_matches_rotation(sequence):
+    assert bwt_from_sequence(sequence + "$", "sais")[0] == \
+        bwt_from_sequence(sequence + "$", "rotation")[0] == rotation_bwt(sequence + "$")[0]
+
+
+def test_transform_sequence():
+    assert api.transform_sequence("GATTACA") == "ACTGA$TA"
+    assert api.transform_sequence(b"gat\ntaca") == "ACTGA$TA"
+    with pytest.raises(ValueError):
+        api.transform_sequence("GATXACA")
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        bwt_from_sequence("ACGT$", "unknown")
+
+
+@pytest.mark.parametrize("sequence", SEQUENCES)
+def test_lf_inverse(sequence):
+    bwt = api.transform_sequence(sequence)
+    assert lf_inverse(bwt) == sequence
+    assert lf_inverse(bwt.encode("ascii")) == sequence
+    out = bytearray(len(sequence))
+    assert lf_inverse(bwt, out) is out
+    assert out.decode("ascii") == sequence
+
+
+@pytest.mark.parametrize("bwt", ["", "ACGT", "AC$G$T"])
+def test_lf_inverse_invalid(bwt):
+    with pytest.raises(ValueError):
+        lf_inverse(bwt)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+On-disk cache of the results, bounded with a least recently used eviction.
+"""
+
+import os
+
+import pytest
+
+import api
+import burrows_wheeler_transform
+from cache import CACHE_DIR_VARIABLE, Cache, configure, get_cache
+
+from conftest import random_sequence
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    """
+    A cache enabled in a temporary directory, disabled after the test.
+    """
+    directory = tmp_path / "cache"
+    configure(str(directory), 1 << 20)
+    yield directory
+    configure(None)
+
+
+def test_get_put(tmp_path):
+    cache = Cache(str(tmp_path / "cache"), 100)
+    key = Cache.key(b"digest", "bwt", engine="sais")
+    assert key != Cache.key(b"digest", "sa") and key == Cache.key(b"digest", "bwt", engine="sais")
+    assert cache.get(key) is None
+    cache.put(key, b"ACGT$")
+    assert cache.get(key) == b"ACGT$"
+    cache.put(Cache.key(b"large", "bwt"), b"A" * 101)
+    assert cache.get(Cache.key(b"large", "bwt")) is None
+
+
+def test_eviction(tmp_path):
+    cache = Cache(str(tmp_path / "cache"), 100)
+    keys = [Cache.key(bytes((i,)), "bwt") for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.put(key, bytes(40))
+        #the modification times give the order of the eviction
+        os.utime(cache.path(key), (1000 + i, 1000 + i))
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) is not None
+    os.utime(cache.path(keys[2]), (1000, 1000))
+    cache.put(Cache.key(b"new", "bwt"), bytes(40))
+    assert cache.get(keys[2]) is None and cache.get(keys[1]) is not None
+    assert cache.size() <= 100
+
+
+def test_cached_transform(cache_dir, monkeypatch):
+    sequence = random_sequence(1000, seed=18)
+    bwt = api.transform_sequence(sequence)
+    assert get_cache() is not None and len(os.listdir(cache_dir)) >= 2
+    #the second transform is read from the cache
+    monkeypatch.setattr(burrows_wheeler_transform, "suffix_array", None)
+    assert api.transform_sequence(sequence) == bwt
+
+
+def test_configure_none(cache_dir):
+    assert os.environ[CACHE_DIR_VARIABLE] == str(cache_dir)
+    configure(None)
+    assert CACHE_DIR_VARIABLE not in os.environ and get_cache() is None
+    api.transform_sequence(random_sequence(100, seed=19))
+    assert not cache_dir.exists() or not os.listdir(cache_dir)
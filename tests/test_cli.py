@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Command line and library API, without the graphical interface.
+"""
+
+import os
+
+import pytest
+
+import api
+import cli
+
+from conftest import random_sequence
+
+
+def read(path):
+    with open(path) as file:
+        return file.read()
+
+
+def test_transform_inverse(tmp_path, text_file):
+    path, sequence = text_file
+    output = tmp_path / "out"
+    assert cli.main(["transform", "-o", str(output), path]) == 0
+    bwt_file = output / "sequence_bwt.txt"
+    assert read(bwt_file) == api.transform_sequence(sequence)
+    assert (output / "sequence_bwt.fmi").exists()
+    assert cli.main(["inverse", "-o", str(output), str(bwt_file)]) == 0
+    assert read(output / "sequence_bwt_inversion.txt") == sequence
+
+
+@pytest.mark.parametrize("options", [[], ["--no-bwt"], ["--workers", "2", "--block-size", "700"]])
+def test_compress_decompress(tmp_path, text_file, fasta_file, options):
+    output = tmp_path / "out"
+    assert cli.main(["compress", "-o", str(output)] + options
+                    + [text_file[0], fasta_file[0]]) == 0
+    suffix = "_compressed.txt" if "--no-bwt" in options else "_bwt_compressed.txt"
+    created = [str(output / ("sequence" + suffix)), str(output / ("records" + suffix))]
+    assert cli.main(["verify"] + created) == 0
+    assert cli.main(["decompress", "-o", str(tmp_path / "back")] + created) == 0
+    results = sorted(os.listdir(tmp_path / "back"))
+    assert len(results) == 2
+    texts = [read(tmp_path / "back" / name) for name in results]
+    assert text_file[1] in texts
+    assert "".join(">%s\n%s\n" % record for record in fasta_file[1]) in texts
+
+
+def test_extract(tmp_path, text_file):
+    path, sequence = text_file
+    created = api.compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    assert cli.main(["extract", "--start", "900", "--end", "2100", "-o", str(tmp_path),
+                     created]) == 0
+    assert read(tmp_path / "comp_900_2100.txt") == sequence[900:2100]
+
+
+def test_invalid_file(tmp_path, text_file, capsys):
+    invalid = tmp_path / "invalid.txt"
+    invalid.write_text("ACGTXACGT")
+    assert cli.main(["compress", str(invalid), text_file[0]]) == 1
+    output = capsys.readouterr()
+    assert "Error " + str(invalid) in output.err
+    assert text_file[0] + " -> " in output.out
+
+
+@pytest.mark.parametrize("command, option", [("compress", "--block-size"),
+                                             ("compress", "--workers"),
+                                             ("repeats", "--min-length"),
+                                             ("repeats", "--max-period"),
+                                             ("repeats", "--min-copies"),
+                                             ("repeats", "--limit")])
+@pytest.mark.parametrize("value", ["0", "-3", "two"])
+def test_positive_options(text_file, command, option, value):
+    with pytest.raises(SystemExit) as error:
+        cli.main([command, option, value, text_file[0]])
+    assert error.value.code == 2
+
+
+def test_api_bytes():
+    sequence = random_sequence(2000, "ACGTN", seed=14)
+    data = api.compress_bytes(sequence, block_size=600)
+    assert api.decompress_bytes(data) == sequence.encode("ascii")
+    assert api.inverse_sequence(api.transform_sequence(sequence)) == sequence
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Binary container of the compressed files, and the files written in the
+former format (json dictionnary line followed by utf-8 characters).
+"""
+
+import json
+
+import pytest
+
+from container import MAGIC, VERSION, read_container
+from huffman import huffman_tree_code, save_decompression_path
+from streaming import append_file, compress_file
+
+from conftest import random_sequence
+
+
+def write_legacy(path, sequence):
+    """
+    This function writes a compressed file like the first version of the
+    interface : the codes and the number of zeros added in a json line,
+    then every 8 bits as a character.
+    """
+    huffman_code = huffman_tree_code(sequence)
+    binary_seq = "".join(huffman_code[letter] for letter in sequence)
+    added = -len(binary_seq) % 8
+    binary_seq += "0" * added
+    huffman_code["add"] = added
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(huffman_code, file)
+        file.write("\n" + "".join(chr(int(binary_seq[i:i + 8], 2))
+                                  for i in range(0, len(binary_seq), 8)))
+
+
+def test_legacy_file(tmp_path):
+    sequence = random_sequence(1000, "ACGTN", seed=11)
+    path = tmp_path / "legacy_compressed.txt"
+    write_legacy(str(path), sequence)
+    container = read_container(str(path))
+    assert container["version"] == 0 and len(container["blocks"]) == 1
+    comp_seq, dna_seq, bin_seq, created_file = save_decompression_path(str(path))
+    assert dna_seq == sequence
+    with open(created_file) as file:
+        assert file.read() == sequence
+
+
+def test_read_container(tmp_path, text_file):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000, bwt=False)
+    container = read_container(created)
+    assert container["block_size"] == 1000
+    assert [block["length"] for block in container["blocks"]] == [1000] * 5
+
+
+
+def test_unsupported_version(tmp_path, text_file):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    with open(created, "r+b") as file:
+        file.seek(len(MAGIC))
+        file.write(bytes((VERSION + 1,)))
+    with pytest.raises(ValueError, match="version"):
+        read_container(created)
+
+
+def test_legacy_not_appended(tmp_path, text_file):
+    path = tmp_path / "legacy_compressed.txt"
+    write_legacy(str(path), "ACGT" * 10)
+    with pytest.raises(ValueError):
+        append_file(str(path), text_file[0])
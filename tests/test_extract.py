@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Extraction of ranges of letters, compared with the slices of the sequences.
+"""
+
+import pytest
+
+from streaming import compress_file, extract
+
+RANGES = [(0, 0), (0, 1), (0, 1000), (999, 1001), (1234, 4321), (2400, 2800), (4990, 6000),
+          (7000, 8000)]
+
+
+@pytest.mark.parametrize("block_size", [1000, 1 << 20])
+@pytest.mark.parametrize("start, end", RANGES)
+def test_extract_text(tmp_path, text_file, block_size, start, end):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), block_size, mtf=True, rle=True)
+    assert extract(created, start, end) == sequence[start:end]
+
+
+@pytest.mark.parametrize("start, end", RANGES)
+def test_extract_record(tmp_path, fasta_file, start, end):
+    path, records = fasta_file
+    created = compress_file(path, str(tmp_path / "comp.fa.dnaz"), 1000)
+    for number, (name, sequence) in enumerate(records):
+        assert extract(created, start, end, record=name) == sequence[start:end]
+        assert extract(created, start, end, record=number) == sequence[start:end]
+
+
+def test_extract_invalid(tmp_path, fasta_file):
+    path, records = fasta_file
+    created = compress_file(path, str(tmp_path / "comp.fa.dnaz"), 1000)
+    with pytest.raises(ValueError):
+        extract(created, 10, 5)
+    with pytest.raises(ValueError):
+        extract(created, 0, 10, record="missing")
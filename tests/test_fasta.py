@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Reading of the sequence files : plain text, FASTA and FASTQ files, the
+letters are checked and the qualities of FASTQ files are checked and dropped.
+"""
+
+import pytest
+
+from fasta import detect_format, iter_chunks, load_sequence, read_records
+
+
+def test_text(tmp_path):
+    path = tmp_path / "sequence.txt"
+    path.write_text("acgt\nNNAC GT\r\n")
+    assert detect_format(str(path)) == "text"
+    assert load_sequence(str(path)) == b"ACGTNNACGT"
+    assert load_sequence(str(path), keep_case=True) == b"acgtNNACGT"
+    assert list(read_records(str(path))) == [("sequence", "ACGTNNACGT")]
+
+
+def test_fasta(tmp_path):
+    path = tmp_path / "records.fa"
+    path.write_text(">first record\nACGT\nAC\n>second\nggtt\n")
+    assert detect_format(str(path)) == "fasta"
+    assert list(read_records(str(path))) == [("first record", "ACGTAC"), ("second", "GGTT")]
+    chunks = list(iter_chunks(str(path), chunk_size=4))
+    assert b"".join(chunk for number, name, chunk in chunks if number == 0) == b"ACGTAC"
+
+
+@pytest.mark.parametrize("content", ["ACGTXACGT", ">first\nACGU\n", "ACGT\n>first\nACGT\n",
+                                     ">first\n>second\nACGT\n", ">first\nACGT\n>second\n\n"])
+def test_invalid(tmp_path, content):
+    path = tmp_path / "invalid.fa"
+    path.write_text(content)
+    with pytest.raises(ValueError):
+        load_sequence(str(path))
+
+
+def test_fastq(tmp_path):
+    path = tmp_path / "reads.fq"
+    path.write_text("@read1\nACGT\n+\n!I~#\n@read2\nAC\nGT\n+read2\n@@\n##\n")
+    assert list(read_records(str(path))) == [("read1", "ACGT"), ("read2", "ACGT")]
+
+
+def test_fastq_empty_read(tmp_path):
+    path = tmp_path / "reads.fq"
+    path.write_text("@read1\nACGT\n+\n!I~#\n@read2\n+\n@read3\nAC\n+\n!!\n")
+    with pytest.raises(ValueError, match="read2"):
+        list(iter_chunks(str(path)))
+
+
+@pytest.mark.parametrize("qualities", ["!I #", "!I\x7f#", "!I~", "!I~##"])
+def test_fastq_invalid_qualities(tmp_path, qualities):
+    path = tmp_path / "reads.fq"
+    path.write_text("@read1\nACGT\n+\n" + qualities + "\n")
+    with pytest.raises(ValueError):
+        list(read_records(str(path)))
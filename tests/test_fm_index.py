@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FM-index : count and locate compared with a search in the sequence,
+and the index saved and loaded.
+"""
+
+import pytest
+
+import api
+from fm_index import FMIndex, index_path, load_index
+
+from conftest import random_sequence
+
+SEQUENCE = random_sequence(2000, "ACGT", seed=10) + "ACGTACGTACGT" * 5
+PATTERNS = ["A", "ACG", "ACGTACGTACGT", "TTTT", "GATTACA", "acg", "N", ""]
+
+
+def positions(pattern):
+    """
+    This function returns the positions of a pattern found by a plain search.
+    """
+    pattern = pattern.upper()
+    return [i for i in range(len(SEQUENCE) - len(pattern) + 1)
+            if SEQUENCE.startswith(pattern, i)]
+
+
+@pytest.mark.parametrize("occ_step, sa_step", [(64, 32), (1, 1), (7, 5)])
+@pytest.mark.parametrize("pattern", PATTERNS)
+def test_count_locate(occ_step, sa_step, pattern):
+    index = FMIndex(api.transform_sequence(SEQUENCE), occ_step=occ_step, sa_step=sa_step)
+    expected = positions(pattern) if pattern else list(range(len(SEQUENCE) + 1))
+    assert index.count(pattern) == len(expected)
+    if pattern:
+        assert index.locate(pattern) == expected
+
+
+def test_save_load(tmp_path):
+    bwt_file = tmp_path / "sequence_bwt.txt"
+    bwt_file.write_text(api.transform_sequence(SEQUENCE))
+    assert index_path(str(bwt_file)) == str(tmp_path / "sequence_bwt.fmi")
+    index = load_index(str(bwt_file))
+    loaded = FMIndex.load(index_path(str(bwt_file)))
+    for pattern in PATTERNS[:5]:
+        assert loaded.count(pattern) == index.count(pattern)
+        assert loaded.locate(pattern) == index.locate(pattern) == positions(pattern)
+
+
+def test_load_invalid(tmp_path):
+    path = tmp_path / "invalid.fmi"
+    path.write_bytes(b"not an index" * 10)
+    with pytest.raises(ValueError):
+        FMIndex.load(str(path))
+    with pytest.raises(ValueError):
+        FMIndex("ACGT")
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Huffman codes : the heap builder, the canonical codes, the lookup
+table encoding and the decoding table.
+"""
+
+import pytest
+
+import huffman
+from huffman import canonical_code, code_lengths, decode_bits, decoding_table
+from huffman import encode_sequence, huffman_construction, huffman_tree_code, pack_bits
+
+from conftest import random_sequence
+
+LENGTHS = [{"A": 1}, {"A": 1, "C": 1}, {"A": 1, "C": 2, "G": 3, "T": 3},
+           {"A": 2, "C": 2, "G": 2, "N": 3, "T": 3},
+           {"A": 1, "C": 3, "G": 3, "N": 4, "T": 4, "$": 3}]
+
+
+@pytest.mark.parametrize("lengths", LENGTHS)
+def test_canonical_code(lengths):
+    huffman_code = canonical_code(lengths)
+    assert {letter: len(code) for letter, code in huffman_code.items()} == lengths
+    codes = sorted(huffman_code.values())
+    #no code is the prefix of another code
+    for first, second in zip(codes, codes[1:]):
+        assert not second.startswith(first)
+
+
+@pytest.mark.parametrize("lengths", LENGTHS[1:])
+def test_decode_bits(lengths):
+    huffman_code = canonical_code(lengths)
+    sequence = random_sequence(999, "".join(sorted(lengths)), seed=12)
+    added, packed = pack_bits("".join(huffman_code[letter] for letter in sequence))
+    assert decode_bits(packed, huffman_code, added) == sequence
+    assert decode_bits(b"", huffman_code) == ""
+
+
+def test_decoding_table():
+    huffman_code = canonical_code({"A": 1, "C": 2, "G": 3, "T": 3})
+    table, children = decoding_table(huffman_code)
+    assert len(table) == 256 * len(children)
+    #0 | 10 | 110 | 11 : the last code continues in the next byte
+    letters, state = table[int("01011011", 2)]
+    assert letters == "ACG" and state != 0
+    assert table[state | int("10000000", 2)] == ("T" + "A" * 7, 0)
+
+
+def test_decode_invalid():
+    huffman_code = {"A": "0", "C": "10"}
+    with pytest.raises(ValueError):
+        decode_bits(bytes((0b11000000,)), huffman_code, 0)
+    with pytest.raises(ValueError):
+        decode_bits(bytes((0b01000000,)), huffman_code, 6)
+
+
+def optimal_bits(sequence):
+    """
+    This function returns the number of bits of an optimal prefix code of
+    a sequence : the sum of the weights of the merged nodes.
+    """
+    weights = sorted(sequence.count(letter) for letter in set(sequence))
+    total = 0
+    while len(weights) > 1:
+        merged = weights.pop(0) + weights.pop(0)
+        total += merged
+        weights = sorted(weights + [merged])
+    return total
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_huffman_tree_code(seed):
+    sequence = random_sequence(2000, "ACGTN", seed) + "A" * (500 * seed)
+    huffman_code = huffman_tree_code(sequence)
+    assert huffman_code == canonical_code(code_lengths(huffman_code))
+    assert sum(len(huffman_code[letter]) for letter in sequence) == optimal_bits(sequence)
+    assert huffman_tree_code(sequence) == huffman_code
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+@pytest.mark.parametrize("chunk", [7, 1 << 20])
+def test_encode_sequence(monkeypatch, backend, chunk):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(huffman, "BIT_BACKEND", backend)
+    sequence = random_sequence(1001, "ACGTN", seed=13)
+    huffman_code, binary_seq = huffman_construction(sequence)
+    added, packed = encode_sequence(sequence, huffman_code, chunk)
+    assert (added, packed) == (binary_seq.added, binary_seq.packed)
+    assert str(binary_seq) == "".join(huffman_code[letter] for letter in sequence)
+    assert decode_bits(packed, huffman_code, added) == sequence
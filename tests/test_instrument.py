@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Instrumentation hooks of the stages of the pipeline.
+"""
+
+import json
+
+import api
+import instrument
+from instrument import add_hook, remove_hook, trace, traced
+
+
+@traced("double")
+def double(sequence):
+    return sequence + sequence
+
+
+def test_hook():
+    records = []
+    add_hook(records.append)
+    try:
+        assert double("ACG") == "ACGACG"
+    finally:
+        remove_hook(records.append)
+    assert len(records) == 1
+    record = records[0]
+    assert (record["stage"], record["bytes_in"], record["bytes_out"]) == ("double", 3, 6)
+    assert record["symbols"] == {"A": 1, "C": 1, "G": 1}
+    assert record["peak_bytes"] is None
+    double("ACG")
+    assert len(records) == 1 and not instrument.HOOKS
+
+
+def test_trace(tmp_path, text_file):
+    path = tmp_path / "trace.jsonl"
+    with trace(str(path), memory=True) as recorder:
+        api.compress_file(text_file[0], str(tmp_path / "comp.dnaz"), 1000, mtf=True, rle=True)
+    totals = recorder.totals()
+    for stage in ("validation", "suffix_array", "bwt", "mtf", "rle", "huffman_encode"):
+        assert totals[stage]["calls"] >= 1
+    assert totals["suffix_array"]["bytes_in"] == len(text_file[1]) + 5
+    with open(path) as file:
+        records = [json.loads(line) for line in file]
+    assert len(records) == len(recorder.records)
+    assert all(record["peak_bytes"] is not None for record in records)
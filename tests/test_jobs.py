@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Operations of the interface run in a separate process.
+"""
+
+import time
+
+import api
+from jobs import Job, Progress, file_size
+
+
+def wait(job, timeout=120):
+    """
+    This function polls a job until it is finished.
+    """
+    end = time.monotonic() + timeout
+    while not job.poll():
+        assert time.monotonic() < end
+        time.sleep(0.05)
+
+
+def test_progress():
+    progress = Progress(["validation", "bwt"], 100)
+    assert progress.fraction() == 0.0
+    progress.update("validation", 50)
+    assert progress.fraction() == 0.25
+    progress.update("validation", 80)
+    progress.update("bwt", 100)
+    progress.update("other", 100)
+    assert progress.fraction() == 1.0
+
+
+def test_job(text_file):
+    path, sequence = text_file
+    job = Job(api.transform_sequence, (sequence,), ["suffix_array", "bwt"],
+              file_size(path)).start()
+    wait(job)
+    assert job.error is None and not job.cancelled
+    assert job.result == api.transform_sequence(sequence)
+    assert job.progress.fraction() == 1.0
+
+
+def test_job_error():
+    job = Job(api.transform_sequence, ("ACGTX",)).start()
+    wait(job)
+    assert job.result is None and job.error
+
+
+def test_cancel():
+    job = Job(time.sleep, (60,)).start()
+    job.cancel()
+    assert job.finished and job.cancelled
+    assert job.poll()
+    assert file_size("missing file") == 0
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+rANS coder : the quantized frequencies and the round trips of the blocks.
+"""
+
+import pytest
+
+import api
+from rans import SCALE_BITS, normalize_frequencies, rans_decode, rans_encode
+from streaming import compress_file, decompress_file
+
+from conftest import random_sequence
+
+SEQUENCES = ["A", "AC", "AAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAN",
+             random_sequence(3001, "ACGTN", seed=20), "A" * 5000 + "CGT"]
+
+
+@pytest.mark.parametrize("sequence", SEQUENCES)
+def test_frequencies(sequence):
+    frequencies = normalize_frequencies(sequence)
+    assert set(frequencies) == set(sequence)
+    assert sum(frequencies.values()) == 1 << SCALE_BITS
+    assert min(frequencies.values()) >= 1
+
+
+@pytest.mark.parametrize("streams", [1, 4])
+@pytest.mark.parametrize("sequence", SEQUENCES)
+def test_rans(sequence, streams):
+    frequencies = normalize_frequencies(sequence)
+    payload = rans_encode(sequence, frequencies, streams)
+    assert rans_decode(payload, frequencies, len(sequence), streams) == sequence
+
+
+@pytest.mark.parametrize("mtf", [False, True])
+def test_roundtrip(tmp_path, text_file, fasta_file, mtf):
+    for path, expected in (text_file, (fasta_file[0], "".join(">%s\n%s\n" % record
+                                                               for record in fasta_file[1]))):
+        created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000, mtf=mtf, rle=mtf,
+                                coder="rans")
+        result = decompress_file(created, str(tmp_path / "out.txt"), workers=2)
+        with open(result) as file:
+            assert file.read() == expected
+    sequence = random_sequence(3000, "ACGTN", seed=6)
+    data = api.compress_bytes(sequence, block_size=700, coder="rans")
+    assert api.decompress_bytes(data).decode("ascii") == sequence
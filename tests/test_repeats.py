@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Repeats found from the suffix and LCP arrays, compared with a brute force search.
+"""
+
+import pytest
+
+from burrows_wheeler_transform import lcp_array, suffix_array
+from repeats import join_records, repeat_report, sequence_arrays, tandem_repeats
+
+from conftest import random_sequence
+
+
+def brute_maximal_repeats(data, min_length):
+    """
+    This function finds the maximal repeats by listing every substring.
+    """
+    occurrences = {}
+    for length in range(min_length, len(data)):
+        for start in range(len(data) - length + 1):
+            occurrences.setdefault(data[start:start + length], []).append(start)
+    repeats = set()
+    for substring, positions in occurrences.items():
+        if len(positions) < 2:
+            continue
+        rights = {data[position + len(substring):position + len(substring) + 1]
+                  for position in positions}
+        lefts = {data[position - 1:position] if position else b"" for position in positions}
+        if len(rights) > 1 and (len(lefts) > 1 or b"" in lefts):
+            repeats.add((len(substring), tuple(positions)))
+    return repeats
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_lcp_array(seed):
+    data = (random_sequence(300, "ACGTN", seed) + "$").encode("ascii")
+    sa = suffix_array(data)
+    lcp = lcp_array(data, sa)
+    for row in range(1, len(data)):
+        first, second = data[sa[row - 1]:], data[sa[row]:]
+        length = 0
+        while length < min(len(first), len(second)) and first[length] == second[length]:
+            length += 1
+        assert lcp[row] == length
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_maximal_repeats(seed):
+    sequence = random_sequence(120, "ACG", seed)
+    report = repeat_report(sequence, min_length=4, limit=10 ** 6)
+    found = {(repeat["length"], tuple(repeat["positions"])) for repeat in report["maximal_repeats"]}
+    data = sequence_arrays(sequence)[0]
+    assert found == brute_maximal_repeats(data, 4)
+    longest = report["longest_repeat"]
+    assert longest["length"] == max(length for length, positions in found)
+    for position in longest["positions"]:
+        assert sequence[position:position + longest["length"]] == longest["sequence"]
+
+
+def test_tandem_repeats():
+    sequence = b"GG" + b"CA" * 5 + b"T" + b"ACG" * 3 + b"NNNNNN" + b"AAAAT"
+    assert list(tandem_repeats(sequence, max_period=4, min_copies=3)) == \
+        [(28, 1, 4, "A"), (2, 2, 5, "CA"), (13, 3, 3, "ACG")]
+
+
+def letter_positions(data, positions, separators):
+    """
+    This function converts positions of a sequence with separators in
+    positions of the sequence without them.
+    """
+    return tuple(position - sum(data[:position].count(separator) for separator in separators)
+                 for position in positions)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_records_separated(tmp_path, seed):
+    records = [random_sequence(50, "ACG", seed * 3 + number) for number in range(3)]
+    path = tmp_path / "records.fa"
+    path.write_text("".join(">r%d\n%s\n" % record for record in enumerate(records)))
+    report = repeat_report(join_records(str(path)), min_length=4, limit=10 ** 6)
+    found = {(repeat["length"], tuple(repeat["positions"])) for repeat in report["maximal_repeats"]}
+    #every separator of the brute force search is a different letter
+    data = (records[0] + "#" + records[1] + "|" + records[2] + "$").encode("ascii")
+    expected = {(length, letter_positions(data, positions, b"#|"))
+                for length, positions in brute_maximal_repeats(data, 4)
+                if not any(separator in data[positions[0]:positions[0] + length]
+                           for separator in b"#|$")}
+    assert found == expected
+    assert report["length"] == 150
+
+
+def test_repeats_not_across_records(tmp_path):
+    path = tmp_path / "records.fa"
+    path.write_text(">first\nGGTTACAC\n>second\nACACGG\n")
+    report = repeat_report(join_records(str(path)), min_length=2, max_period=2, min_copies=3)
+    assert report["tandem_repeats"] == []
+    assert report["longest_repeat"]["length"] == 4
+    assert report["longest_repeat"]["positions"] == [4, 8]
+    assert report["longest_repeat"]["sequence"] == "ACAC"
+
+
+def test_report_limit():
+    sequence = random_sequence(400, "ACG", seed=9)
+    everything = repeat_report(sequence, min_length=3, limit=10 ** 6)
+    limited = repeat_report(sequence, min_length=3, limit=5)
+    assert limited["maximal_repeats"] == everything["maximal_repeats"][:5]
+    assert limited["tandem_repeats"] == everything["tandem_repeats"][:5]
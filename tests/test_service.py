@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Smoke test of the HTTP service on an ephemeral port.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import api
+import service
+
+from conftest import random_sequence
+
+
+@pytest.fixture(scope="module")
+def port():
+    """
+    A service of one worker accepting a single request at once, the batcher
+    waits 0.5 s so that a second request arrives while the first one runs.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    state = {}
+
+    def ready(server):
+        state["port"] = server.sockets[0].getsockname()[1]
+        started.set()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        state["task"] = loop.create_task(service.serve(port=0, ready=ready, workers=1,
+                                                       max_pending=1, delay=0.5))
+        try:
+            loop.run_until_complete(state["task"])
+        except BaseException as error:
+            state["error"] = error
+        finally:
+            started.set()
+            loop.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(120) and "port" in state, state.get("error")
+    yield state["port"]
+    loop.call_soon_threadsafe(state["task"].cancel)
+    thread.join(30)
+
+
+def test_operations(port):
+    sequence = random_sequence(500, seed=7)
+    status, bwt = service.call("transform", sequence, port=port)
+    assert status == 200
+    assert bwt.decode("ascii") == api.transform_sequence(sequence)
+    status, data = service.call("compress", sequence, port=port, rle=1)
+    assert status == 200
+    status, payload = service.call("decompress", data, port=port)
+    assert (status, payload.decode("ascii")) == (200, sequence)
+
+
+def test_invalid_requests(port):
+    assert service.call("compress", "ACGT", port=port, block_size=0)[0] == 400
+    assert service.call("transform", "ACGTX", port=port)[0] == 400
+    assert service.call("count", "ACGT", port=port, pattern="A", file="../secret.txt")[0] \
+        in (403, 404)
+    assert service.call("unknown", "ACGT", port=port)[0] == 404
+
+
+def test_call_query(monkeypatch):
+    requests = []
+
+    class Connection():
+        def __init__(self, host, port, timeout):
+            pass
+
+        def request(self, method, url, body):
+            requests.append(url)
+            raise OSError("not sent")
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(service.http.client, "HTTPConnection", Connection)
+    with pytest.raises(OSError):
+        service.call("count", "ACGT", pattern=["ACG", "TT"], file="runs/a b&c=1.txt")
+    assert requests == ["/count?pattern=ACG&pattern=TT&file=runs%2Fa+b%26c%3D1.txt"]
+    path, _, query = requests[0].partition("?")
+    assert service.parse_qs(query) == {"pattern": ["ACG", "TT"], "file": ["runs/a b&c=1.txt"]}
+
+
+def test_busy(port):
+    with ThreadPoolExecutor(2) as executor:
+        statuses = sorted(executor.map(lambda i: service.call("transform", "ACGT", port=port)[0],
+                                       range(2)))
+    assert statuses == [200, 503]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Move-to-front and run-length stages between the bwt and the compression.
+"""
+
+import itertools
+
+import pytest
+
+import api
+from container import FLAG_MTF, FLAG_RLE
+from stages import decode_run, encode_run, move_to_front, run_length_encode, undo_stages
+from streaming import compress_file, decompress_file, stage_flags
+
+from conftest import random_sequence
+
+#(bwt, mtf, rle) : the run-length stage needs the move-to-front stage
+STAGES = [(bwt, mtf, rle) for bwt, mtf, rle in itertools.product([True, False], repeat=3)
+          if mtf or not rle]
+
+
+def test_move_to_front():
+    assert move_to_front("CCAGGG") == ("ACG", "\x01\x00\x01\x02\x00\x00")
+
+
+@pytest.mark.parametrize("length", range(1, 70))
+def test_encode_run(length):
+    assert decode_run(encode_run(length)) == length
+
+
+@pytest.mark.parametrize("sequence", ["A", "AAAAAAAAAA", "ACGTTTTTTTTTTTTTNNNNNA",
+                                      api.transform_sequence(random_sequence(3000, seed=15))])
+def test_undo_stages(sequence):
+    alphabet, indices = move_to_front(sequence)
+    assert undo_stages(indices, FLAG_MTF, alphabet) == sequence
+    symbols = run_length_encode(indices)
+    assert undo_stages(symbols, FLAG_MTF | FLAG_RLE, alphabet) == sequence
+
+
+def test_rle_needs_mtf():
+    with pytest.raises(ValueError):
+        stage_flags(mtf=False, rle=True)
+
+
+@pytest.mark.parametrize("bwt, mtf, rle", STAGES)
+@pytest.mark.parametrize("block_size", [1000, 1 << 20])
+def test_roundtrip(tmp_path, text_file, bwt, mtf, rle, block_size):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), block_size, bwt, mtf=mtf,
+                            rle=rle)
+    result = decompress_file(created, str(tmp_path / "out.txt"))
+    with open(result) as file:
+        assert file.read() == sequence
+
+
+@pytest.mark.parametrize("bwt, mtf, rle", STAGES)
+def test_roundtrip_records(tmp_path, fasta_file, bwt, mtf, rle):
+    path, records = fasta_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000, bwt, mtf=mtf, rle=rle)
+    result = decompress_file(created, str(tmp_path / "out.fa"), workers=2)
+    with open(result) as file:
+        assert file.read() == "".join(">%s\n%s\n" % record for record in records)
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Block compression of the files : the blocks of the sequences and the
+round trips of the compression.
+"""
+
+import pytest
+
+from streaming import compress_file, decompress_file, ordered_map, split_blocks
+
+
+def test_split_blocks():
+    chunks = [(0, "first", b"ACGTA"), (0, "first", b"CG"), (1, "second", b"TT"),
+              (2, "third", b"ACGTACGT")]
+    assert list(split_blocks(chunks, 3)) == [("first", "ACG"), (None, "TAC"), (None, "G"),
+                                             ("second", "TT"), ("third", "ACG"),
+                                             (None, "TAC"), (None, "GT")]
+
+
+@pytest.mark.parametrize("bwt", [True, False])
+@pytest.mark.parametrize("block_size", [1, 1000, 1 << 20])
+def test_roundtrip_text(tmp_path, text_file, bwt, block_size):
+    path, sequence = text_file
+    if block_size == 1:
+        sequence = sequence[:300]
+        with open(path, "w") as file:
+            file.write(sequence)
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), block_size, bwt)
+    result = decompress_file(created, str(tmp_path / "out.txt"))
+    with open(result) as file:
+        assert file.read() == sequence
+
+
+@pytest.mark.parametrize("bwt", [True, False])
+def test_roundtrip_records(tmp_path, fasta_file, bwt):
+    path, records = fasta_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000, bwt)
+    result = decompress_file(created, str(tmp_path / "out.fa"))
+    with open(result) as file:
+        assert file.read() == "".join(">%s\n%s\n" % record for record in records)
+
+
+def test_block_size_below_one(tmp_path, text_file):
+    path, sequence = text_file
+    created = tmp_path / "comp.dnaz"
+    with pytest.raises(ValueError):
+        compress_file(path, str(created), 0)
+    assert not created.exists()
+    with pytest.raises(ValueError):
+        list(split_blocks([(0, None, b"ACGT")], -1))
+
+
+def test_invalid_letter_no_output(tmp_path, text_file):
+    path, sequence = text_file
+    #the invalid letter is in the last block, after blocks already written
+    with open(path, "a") as file:
+        file.write("X")
+    created = tmp_path / "comp.dnaz"
+    with pytest.raises(ValueError):
+        compress_file(path, str(created), 1000)
+    assert not created.exists()
+    created.write_bytes(b"previous")
+    with pytest.raises(ValueError):
+        compress_file(path, str(created), 1000)
+    assert created.read_bytes() == b"previous"
+    assert sorted(child.name for child in tmp_path.iterdir()) == ["comp.dnaz", "sequence.txt"]
+
+
+def test_workers(tmp_path, fasta_file):
+    path, records = fasta_file
+    single = compress_file(path, str(tmp_path / "single.dnaz"), 500)
+    parallel = compress_file(path, str(tmp_path / "parallel.dnaz"), 500, workers=2,
+                             max_pending=3)
+    with open(single, "rb") as first, open(parallel, "rb") as second:
+        assert first.read() == second.read()
+    result = decompress_file(parallel, str(tmp_path / "out.fa"), workers=2, max_pending=1)
+    with open(result) as file:
+        assert file.read() == "".join(">%s\n%s\n" % record for record in records)
+
+
+def test_ordered_map():
+    assert list(ordered_map(abs, range(-20, 0), workers=2, max_pending=3)) == \
+        list(range(20, 0, -1))
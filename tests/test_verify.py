@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Verify mode : a corrupted or truncated file is reported by verify and
+refused by the decompression.
+"""
+
+import pytest
+
+from api import transform_sequence
+from container import open_container, read_container
+from huffman import decompression_inversion_path
+from streaming import compress_file, decompress_file, verify_file, verify_files
+
+from conftest import random_sequence
+from test_container import write_legacy
+
+
+@pytest.mark.parametrize("coder", ["huffman", "rans"])
+def test_verify_valid(tmp_path, text_file, coder):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000, coder=coder)
+    for full in (False, True):
+        report = verify_file(created, full=full)
+        assert report["errors"] == []
+        assert report["checksums"]
+        assert report["blocks"] == 5
+
+
+def payload_offset(created):
+    """
+    This function returns the position of the last byte of the payload of
+    the first block of a compressed file.
+    """
+    return block_end(created) - 1
+
+
+
+def block_end(created):
+    """
+    This function returns the position following the first block of a
+    compressed file, where the header of the second block starts.
+    """
+    with open(created, "rb") as file:
+        header, blocks = open_container(file)
+        next(blocks)
+        return file.tell()
+
+
+@pytest.mark.parametrize("full", [False, True])
+def test_verify_corrupted_payload(tmp_path, text_file, full):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    with open(created, "r+b") as file:
+        file.seek(payload_offset(created))
+        byte = file.read(1)
+        file.seek(-1, 1)
+        file.write(bytes((byte[0] ^ 0x5a,)))
+    report = verify_file(created, full=full)
+    assert report["errors"] == ["block 0 : payload checksum"]
+    with pytest.raises(ValueError):
+        decompress_file(created, str(tmp_path / "out.txt"))
+
+
+def test_verify_truncated(tmp_path, text_file):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    with open(created, "r+b") as file:
+        file.truncate(payload_offset(created))
+    assert verify_file(created)["errors"]
+
+
+@pytest.mark.parametrize("cut", [0, 1, 3])
+@pytest.mark.parametrize("full", [False, True])
+def test_verify_truncated_block_header(tmp_path, text_file, cut, full):
+    path, sequence = text_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    with open(created, "r+b") as file:
+        file.truncate(block_end(created) + cut)
+    assert verify_file(created, full=full)["errors"] == ["Truncated compressed file"]
+    with pytest.raises(ValueError, match="Truncated"):
+        decompress_file(created, str(tmp_path / "out.txt"))
+
+
+@pytest.mark.parametrize("content", [b"DNAZ", b"DNAZ\x01", b"[1, 2]\n", b"{}\nACGT"])
+def test_read_header_only(tmp_path, content):
+    path = tmp_path / "comp.dnaz"
+    path.write_bytes(content)
+    with pytest.raises(ValueError):
+        read_container(str(path))
+
+
+def test_verify_not_compressed(text_file):
+    path, sequence = text_file
+    assert verify_file(path)["errors"]
+
+
+def test_verify_files(tmp_path, text_file):
+    path, sequence = text_file
+    files = [compress_file(path, str(tmp_path / ("comp%d.dnaz" % i)), 1000) for i in range(3)]
+    reports = list(verify_files(files + [path], workers=2, full=True))
+    assert [report["file"] for report in reports] == files + [path]
+    assert [bool(report["errors"]) for report in reports] == [False, False, False, True]
+
+
+def test_gui_decompression_inversion(tmp_path, fasta_file):
+    path, records = fasta_file
+    created = compress_file(path, str(tmp_path / "comp.dnaz"), 1000)
+    dna_seq, comp_seq, inverse_bwt, created_file = decompression_inversion_path(created)
+    assert inverse_bwt == "".join(">%s\n%s\n" % record for record in records)
+    with open(created_file) as file:
+        assert file.read() == inverse_bwt
+    with open(created, "r+b") as file:
+        file.seek(payload_offset(created))
+        byte = file.read(1)
+        file.seek(-1, 1)
+        file.write(bytes((byte[0] ^ 0x5a,)))
+    (tmp_path / created_file).unlink()
+    with pytest.raises(ValueError, match="checksum"):
+        decompression_inversion_path(created)
+    assert not (tmp_path / created_file).exists()
+
+
+def test_gui_decompression_inversion_legacy(tmp_path):
+    sequence = random_sequence(500, seed=21)
+    path = tmp_path / "legacy_bwt_compressed.txt"
+    write_legacy(str(path), transform_sequence(sequence))
+    result = decompression_inversion_path(str(path))
+    assert result[2] == sequence
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Scrolling viewer of the interface : the lines are read from the sequences
+only when they are visible.
+"""
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+from huffman import PackedBits
+from viewer import SequenceViewer
+
+
+class Sequence():
+    """
+    A class of sequence recording the slices read by the viewer.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.reads = []
+
+    def __len__(self):
+        return len(self.text)
+
+    def __getitem__(self, index):
+        self.reads.append(index)
+        return self.text[index]
+
+
+@pytest.fixture
+def viewer(monkeypatch):
+    """
+    A viewer without window : render only keeps the visible lines.
+    """
+    viewer = SequenceViewer.__new__(SequenceViewer)
+    viewer.height = 4
+    viewer.line_length = 10
+    viewer.sections = []
+    viewer.offsets = []
+    viewer.total = 0
+    viewer.top = 0
+    monkeypatch.setattr(viewer, "render", lambda: setattr(viewer, "visible", [
+        viewer.line(number) for number in range(viewer.top, min(viewer.top + viewer.height,
+                                                                viewer.total))]))
+    return viewer
+
+
+def test_lines(viewer):
+    sequence = Sequence("ACGT" * 1000)
+    viewer.show([("Title", sequence), ("Bits", PackedBits(b"\xf0\x0f", 3))])
+    #title, 400 lines and an empty line, then title, 2 lines and an empty line
+    assert viewer.total == 402 + 4
+    assert viewer.visible == ["Title", "ACGTACGTAC", "GTACGTACGT", "ACGTACGTAC"]
+    assert len(sequence.reads) == 3
+    viewer.scroll("moveto", "1.0")
+    assert viewer.top == viewer.total - viewer.height
+    assert viewer.visible == ["Bits", "1111000000", "001", ""]
+    viewer.scroll("scroll", "-1", "pages")
+    assert viewer.top == viewer.total - 2 * viewer.height
+    viewer.scroll("scroll", "-1000", "units")
+    assert viewer.top == 0
+    assert len(sequence.reads) < 20